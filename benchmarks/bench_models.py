@@ -0,0 +1,52 @@
+"""Compares memory use and construction time of the default models against the
+compact and frozen variants when parsing a large synthetic budget.
+
+Run from the repository root with: python -m benchmarks.bench_models
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from pynab import factory
+from pynab.compact import COMPACT_MODELS, FROZEN_MODELS
+from benchmarks.synthetic import generate_budget
+
+VARIANTS = {"default": None, "compact": COMPACT_MODELS, "frozen": FROZEN_MODELS}
+COLLECTIONS = ["accounts", "payees", "categories", "transactions", "subtransactions"]
+
+
+def measure(json, models):
+    """Parses a budget and creates every entity of the measured collections,
+    returning the time taken and the memory held by the created entities
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    budget = factory.parse(json, models=models)
+    for collection in COLLECTIONS:
+        for _ in getattr(budget, collection):
+            pass
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--transactions-per-month", type=int, default=1000)
+    args = parser.parse_args()
+
+    json = generate_budget(years=args.years, transactions_per_month=args.transactions_per_month)
+    transactions = len(json["data"]["budget"]["transactions"])
+    print(f"Budget with {transactions} transactions")
+    print(f"{'variant':<10}{'time (s)':>12}{'memory (MB)':>14}{'peak (MB)':>12}")
+    for name, models in VARIANTS.items():
+        elapsed, current, peak = measure(json, models)
+        print(f"{name:<10}{elapsed:>12.3f}{current / 2 ** 20:>14.1f}{peak / 2 ** 20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""Offline stand-in for the YNAB API serving synthetic budgets, used to measure
+the client at scale without touching the real API or its rate limit.
+
+Run from the repository root with: python -m benchmarks.fake_server
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import generate_budget
+
+_KEYS = {"months": "month"}
+
+
+class FakeBudget:
+    """A synthetic budget that records the server knowledge at which each entity
+    last changed, so that delta requests can be answered
+    """
+
+    def __init__(self, **options):
+        data = generate_budget(**options)["data"]
+        self.budget = data["budget"]
+        self.id = self.budget["id"]
+        self.server_knowledge = data["server_knowledge"]
+        self.changes = []
+        self.lock = threading.Lock()
+        self.positions = {
+            collection: {
+                entity[_KEYS.get(collection, "id")]: index for index, entity in enumerate(value)
+            }
+            for collection, value in self.budget.items()
+            if isinstance(value, list)
+        }
+        self.import_ids = {entity["import_id"] for entity in self.budget["transactions"]}
+
+    def summary(self):
+        return {
+            key: self.budget[key]
+            for key in ["id", "name", "last_modified_on", "date_format", "currency_format"]
+        }
+
+    def change(self, collection, entity):
+        """Replaces or adds an entity, recording the change for delta requests"""
+        key = _KEYS.get(collection, "id")
+        with self.lock:
+            entities = self.budget[collection]
+            positions = self.positions[collection]
+            if entity[key] in positions:
+                entities[positions[entity[key]]] = entity
+            else:
+                positions[entity[key]] = len(entities)
+                entities.append(entity)
+            if collection == "transactions":
+                self.import_ids.add(entity.get("import_id"))
+            self.server_knowledge += 1
+            self.changes.append((self.server_knowledge, collection, entity))
+
+    def mutate(self, count, seed=0):
+        """Changes the amount of a number of transactions and deletes one"""
+        transactions = self.budget["transactions"]
+        for index in range(count):
+            transaction = dict(transactions[(index * 7919 + seed) % len(transactions)])
+            transaction["amount"] -= 10
+            self.change("transactions", transaction)
+        if count:
+            self.change("transactions", dict(transactions[seed % len(transactions)], deleted=True))
+
+    def delta(self, last_knowledge):
+        """Gets the budget containing only the entities changed after a knowledge"""
+        with self.lock:
+            delta = {
+                collection: []
+                for collection, value in self.budget.items()
+                if isinstance(value, list)
+            }
+            latest = {}
+            for knowledge, collection, entity in self.changes:
+                if knowledge > last_knowledge:
+                    key = entity[_KEYS.get(collection, "id")]
+                    latest[(collection, key)] = (collection, entity)
+            for collection, entity in latest.values():
+                delta[collection].append(entity)
+            delta.update(self.summary())
+            return delta, self.server_knowledge
+
+
+class FakeYnabServer:
+    """Threaded HTTP server implementing the parts of the YNAB API used by Pynab.
+    Requests are limited per access token to rate_limit requests per rate_period
+    seconds, responding with too_many_requests once exceeded.
+    """
+
+    def __init__(
+        self, budgets=1, rate_limit=None, rate_period=3600.0, latency=0.0, **budget_options
+    ):
+        self.budgets = {}
+        for seed in range(budgets):
+            budget = FakeBudget(seed=seed, **budget_options)
+            self.budgets[budget.id] = budget
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.latency = latency
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, token):
+        """Records a request for a token, returning the number made in the period"""
+        now = time.monotonic()
+        with self._lock:
+            times = self.requests.get(token, [])
+            times = [made for made in times if now - made < self.rate_period]
+            times.append(now)
+            self.requests[token] = times
+            return len(times)
+
+    def route(self, method, path, query, body):
+        """Gets the status and json to respond to a request with"""
+        parts = [part for part in path.split("/") if part][1:]
+        if parts == ["user"]:
+            return 200, {"data": {"user": {"id": "fake-user"}}}
+        if parts == ["budgets"]:
+            summaries = [budget.summary() for budget in self.budgets.values()]
+            return 200, {"data": {"budgets": summaries}}
+        if len(parts) < 2 or parts[0] != "budgets" or parts[1] not in self.budgets:
+            return 404, _error("404.2", "resource_not_found", "Resource not found")
+        budget = self.budgets[parts[1]]
+        resource = parts[2:]
+        if resource == [] and method == "GET":
+            knowledge = int(query.get("last_knowledge_of_server", ["0"])[0])
+            if knowledge:
+                data, knowledge = budget.delta(knowledge)
+            else:
+                data, knowledge = budget.budget, budget.server_knowledge
+            return 200, {"data": {"budget": data, "server_knowledge": knowledge}}
+        if resource == ["settings"]:
+            settings = {key: budget.budget[key] for key in ["date_format", "currency_format"]}
+            return 200, {"data": {"settings": settings}}
+        if resource == ["transactions"] and method == "POST":
+            return self._create_transactions(budget, json.loads(body))
+        if method == "GET":
+            return self._resource(budget.budget, resource, query)
+        return 404, _error("404.1", "not_found", "URI not found")
+
+    def _resource(self, budget, resource, query):
+        """Answers requests for the per resource endpoints of a budget"""
+        not_found = 404, _error("404.2", "resource_not_found", "Resource not found")
+        collection, *rest = resource
+        if collection == "transactions" and not rest:
+            return 200, {"data": {"transactions": _filter(budget["transactions"], query)}}
+        if collection == "months" and not rest:
+            months = [_without(month, "categories") for month in budget["months"]]
+            return 200, {"data": {"months": months}}
+        if collection == "months":
+            months = {month["month"]: month for month in budget["months"]}
+            month = budget["months"][-1] if rest[0] == "current" else months.get(rest[0])
+            if month is None:
+                return not_found
+            if rest[1:2] == ["categories"] and len(rest) == 3:
+                category = _find(month["categories"], rest[2])
+                return (200, {"data": {"category": category}}) if category else not_found
+            return 200, {"data": {"month": month}}
+        if collection == "categories" and not rest:
+            categories = {}
+            for category in budget["categories"]:
+                categories.setdefault(category["category_group_id"], []).append(category)
+            groups = [
+                dict(group, categories=categories.get(group["id"], []))
+                for group in budget["category_groups"]
+            ]
+            return 200, {"data": {"category_groups": groups}}
+        singular = {
+            "accounts": "account",
+            "categories": "category",
+            "payees": "payee",
+            "scheduled_transactions": "scheduled_transaction",
+        }
+        if collection not in singular:
+            return 404, _error("404.1", "not_found", "URI not found")
+        if not rest:
+            return 200, {"data": {collection: budget[collection]}}
+        entity = _find(budget[collection], rest[0])
+        if entity is None:
+            return not_found
+        if rest[1:] == ["transactions"]:
+            key = f"{singular[collection]}_id"
+            transactions = [
+                transaction for transaction in budget["transactions"] if transaction[key] == rest[0]
+            ]
+            return 200, {"data": {"transactions": _filter(transactions, query)}}
+        return 200, {"data": {singular[collection]: entity}}
+
+    def _create_transactions(self, budget, body):
+        created = []
+        duplicates = []
+        for row in body.get("transactions", []):
+            if row.get("import_id") is not None and row["import_id"] in budget.import_ids:
+                duplicates.append(row["import_id"])
+                continue
+            transaction = {
+                "id": str(uuid.uuid4()),
+                "memo": None,
+                "cleared": "uncleared",
+                "approved": False,
+                "flag_color": None,
+                "payee_id": None,
+                "category_id": None,
+                "transfer_account_id": None,
+                "transfer_transaction_id": None,
+                "import_id": None,
+                "deleted": False,
+            }
+            transaction.update(row)
+            budget.change("transactions", transaction)
+            created.append(dict(transaction, subtransactions=[]))
+        data = {
+            "transaction_ids": [transaction["id"] for transaction in created],
+            "transactions": created,
+            "duplicate_import_ids": duplicates,
+            "server_knowledge": budget.server_knowledge,
+        }
+        return 201, {"data": data}
+
+
+def _find(entities, id):
+    return next((entity for entity in entities if entity["id"] == id), None)
+
+
+def _without(entity, key):
+    return {name: value for name, value in entity.items() if name != key}
+
+
+def _filter(transactions, query):
+    """Filters transactions by the since_date and type query parameters, returning
+    them in date order as the YNAB API does
+    """
+    since_date = query.get("since_date", [""])[0]
+    type = query.get("type", [None])[0]
+    filtered = [
+        transaction
+        for transaction in transactions
+        if transaction["date"] >= since_date
+        and (type != "uncategorized" or transaction["category_id"] is None)
+        and (type != "unapproved" or not transaction["approved"])
+    ]
+    return sorted(filtered, key=lambda transaction: transaction["date"])
+
+
+def _error(id, name, detail):
+    return {"error": {"id": id, "name": name, "detail": detail}}
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def _respond(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            token = re.sub(r"^Bearer ", "", self.headers.get("Authorization", ""))
+            used = server.count(token)
+            if server.latency:
+                time.sleep(server.latency)
+            if server.rate_limit is not None and used > server.rate_limit:
+                status, data = 429, _error("429", "too_many_requests", "Too many requests")
+            else:
+                url = urlparse(self.path)
+                status, data = server.route(method, url.path, parse_qs(url.query), body)
+            payload = json.dumps(data, separators=(",", ":")).encode()
+            etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+            if method == "GET" and status == 200 and self.headers.get("If-None-Match") == etag:
+                status, payload = 304, b""
+            self.send_response(status)
+            if method == "GET" and status in {200, 304}:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            if server.rate_limit is not None:
+                self.send_header("X-Rate-Limit", f"{used}/{server.rate_limit}")
+            if payload and "gzip" in self.headers.get("Accept-Encoding", ""):
+                payload = gzip.compress(payload, compresslevel=1)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budgets", type=int, default=1)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--transactions-per-month", type=int, default=400)
+    parser.add_argument("--rate-limit", type=int, default=None)
+    args = parser.parse_args()
+    server = FakeYnabServer(
+        budgets=args.budgets,
+        rate_limit=args.rate_limit,
+        years=args.years,
+        transactions_per_month=args.transactions_per_month,
+    )
+    with server:
+        print(f"Serving {len(server.budgets)} budgets at {server.url}")
+        for budget_id in server.budgets:
+            print(f"  {budget_id}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
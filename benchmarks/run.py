@@ -0,0 +1,112 @@
+"""Benchmark suite measuring latency, throughput and peak memory of each client
+endpoint against the offline fake YNAB server.
+
+Run from the repository root with: python -m benchmarks.run
+"""
+import argparse
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+
+from pynab import Pynab
+from pynab.models import NewTransaction
+from benchmarks.fake_server import FakeYnabServer
+
+
+def _import_rows(count, offset):
+    return [
+        NewTransaction(
+            account_id="account",
+            date="2018-12-01",
+            amount=-1000,
+            import_id=f"benchmark:{offset}:{index}",
+        )
+        for index in range(count)
+    ]
+
+
+def scenarios(client, server):
+    """Gets the callables to benchmark, each making one logical client call"""
+    budget_id = next(iter(server.budgets))
+    fake_budget = server.budgets[budget_id]
+    synced = client.budget(budget_id)
+    counter = iter(range(10 ** 9))
+
+    def sync_budget():
+        fake_budget.mutate(50, seed=next(counter))
+        client.sync_budget(synced)
+
+    def import_transactions():
+        client.import_transactions(budget_id, _import_rows(500, next(counter)), chunk_size=100)
+
+    return {
+        "user": lambda: client.user,
+        "budgets_list": client.budgets_list,
+        "budget_settings": lambda: client.budget_settings(budget_id),
+        "budget": lambda: client.budget(budget_id),
+        "budget (stream)": lambda: client.budget(budget_id, stream=True),
+        "sync_budget (50 changes)": sync_budget,
+        "import_transactions (500 rows)": import_transactions,
+    }
+
+
+def measure(function, iterations):
+    """Calls a function repeatedly, measuring latency and peak memory of the calls"""
+    function()
+    latencies = []
+    gc.collect()
+    tracemalloc.start()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "throughput_per_s": iterations / sum(latencies),
+        "peak_memory_mb": peak / 2 ** 20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--transactions-per-month", type=int, default=400)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--only", help="only run scenarios containing this text")
+    parser.add_argument("--json", help="write the results to this file as json")
+    args = parser.parse_args()
+
+    server = FakeYnabServer(years=args.years, transactions_per_month=args.transactions_per_month)
+    with server:
+        client = Pynab("benchmark", base_url=server.url)
+        transactions = len(next(iter(server.budgets.values())).budget["transactions"])
+        print(f"Fake server at {server.url} with {transactions} transactions per budget")
+        print(
+            f"{'scenario':<32}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'calls/s':>10}{'peak MB':>10}"
+        )
+        results = {}
+        for name, function in scenarios(client, server).items():
+            if args.only and args.only not in name:
+                continue
+            result = results[name] = measure(function, args.iterations)
+            print(
+                f"{name:<32}{result['mean_ms']:>10.1f}{result['p50_ms']:>10.1f}"
+                f"{result['p95_ms']:>10.1f}{result['throughput_per_s']:>10.1f}"
+                f"{result['peak_memory_mb']:>10.1f}"
+            )
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Generates synthetic budgets shaped like the responses of the YNAB API"""
+import random
+import uuid
+from datetime import date
+
+CURRENCY_FORMAT = {
+    "iso_code": "GBP",
+    "example_format": "123,456.78",
+    "decimal_digits": 2,
+    "decimal_separator": ".",
+    "symbol_first": True,
+    "group_separator": ",",
+    "currency_symbol": "£",
+    "display_symbol": True,
+}
+
+
+def _id(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _months(years, end=date(2018, 12, 1)):
+    return [
+        date(end.year - (offset // 12), 12 - (offset % 12), 1).isoformat()
+        for offset in reversed(range(12 * years))
+    ]
+
+
+def generate_budget(
+    accounts=10,
+    category_groups=8,
+    categories_per_group=6,
+    payees=200,
+    years=5,
+    transactions_per_month=400,
+    split_ratio=0.05,
+    scheduled_transactions=50,
+    seed=0,
+):
+    """Generates the json of a full budget response
+
+    :param accounts: number of accounts in the budget
+    :param category_groups: number of category groups in the budget
+    :param categories_per_group: number of categories in each category group
+    :param payees: number of payees in the budget
+    :param years: number of years of months and transaction history
+    :param transactions_per_month: number of transactions in each month
+    :param split_ratio: fraction of transactions split into subtransactions
+    :param scheduled_transactions: number of scheduled transactions in the budget
+    :param seed: seed for the random generator so budgets are reproducible
+    :return: the budget response as a dict
+    """
+    rng = random.Random(seed)
+    account_list = [
+        {
+            "id": _id(rng),
+            "name": f"Account {index}",
+            "type": rng.choice(["checking", "savings", "creditCard", "cash"]),
+            "on_budget": True,
+            "closed": False,
+            "note": None,
+            "balance": 0,
+            "cleared_balance": 0,
+            "uncleared_balance": 0,
+            "transfer_payee_id": _id(rng),
+            "deleted": False,
+        }
+        for index in range(accounts)
+    ]
+    payee_list = [
+        {"id": _id(rng), "name": f"Payee {index}", "transfer_account_id": None, "deleted": False}
+        for index in range(payees)
+    ]
+    group_list = [
+        {"id": _id(rng), "name": f"Group {index}", "hidden": False, "deleted": False}
+        for index in range(category_groups)
+    ]
+    category_list = [
+        {
+            "id": _id(rng),
+            "category_group_id": group["id"],
+            "name": f"Category {group_index}.{index}",
+            "hidden": False,
+            "original_category_group_id": None,
+            "note": None,
+            "budgeted": 0,
+            "activity": 0,
+            "balance": 0,
+            "goal_type": None,
+            "goal_creation_month": None,
+            "goal_target": 0,
+            "goal_target_month": None,
+            "goal_percentage_complete": None,
+            "deleted": False,
+        }
+        for group_index, group in enumerate(group_list)
+        for index in range(categories_per_group)
+    ]
+
+    months = []
+    transactions = []
+    subtransactions = []
+    for month in _months(years):
+        month_categories = []
+        for category in category_list:
+            budgeted = rng.randrange(0, 500000, 1000)
+            month_categories.append(dict(category, budgeted=budgeted))
+        income = 0
+        activity = 0
+        for _ in range(transactions_per_month):
+            account = rng.choice(account_list)
+            category = rng.choice(category_list)
+            amount = -rng.randrange(100, 200000, 10)
+            if rng.random() < 0.05:
+                amount = rng.randrange(100000, 5000000, 1000)
+                income += amount
+            else:
+                activity += amount
+            account["balance"] += amount
+            account["cleared_balance"] += amount
+            transaction = {
+                "id": _id(rng),
+                "date": f"{month[:8]}{rng.randrange(1, 29):02d}",
+                "amount": amount,
+                "memo": None,
+                "cleared": rng.choice(["cleared", "uncleared", "reconciled"]),
+                "approved": True,
+                "flag_color": None,
+                "account_id": account["id"],
+                "payee_id": rng.choice(payee_list)["id"],
+                "category_id": category["id"],
+                "transfer_account_id": None,
+                "transfer_transaction_id": None,
+                "import_id": None,
+                "deleted": False,
+            }
+            transactions.append(transaction)
+            if rng.random() < split_ratio:
+                for part in (amount // 2, amount - amount // 2):
+                    subtransactions.append(
+                        {
+                            "id": _id(rng),
+                            "transaction_id": transaction["id"],
+                            "amount": part,
+                            "memo": None,
+                            "payee_id": transaction["payee_id"],
+                            "category_id": rng.choice(category_list)["id"],
+                            "transfer_account_id": None,
+                            "deleted": False,
+                        }
+                    )
+        months.append(
+            {
+                "month": month,
+                "note": None,
+                "income": income,
+                "budgeted": sum(category["budgeted"] for category in month_categories),
+                "activity": activity,
+                "to_be_budgeted": 0,
+                "age_of_money": rng.randrange(10, 90),
+                "categories": month_categories,
+                "deleted": False,
+            }
+        )
+
+    scheduled = [
+        {
+            "id": _id(rng),
+            "date_first": "2018-01-01",
+            "date_next": "2019-01-01",
+            "frequency": "monthly",
+            "amount": -rng.randrange(1000, 100000, 10),
+            "memo": None,
+            "flag_color": None,
+            "account_id": rng.choice(account_list)["id"],
+            "payee_id": rng.choice(payee_list)["id"],
+            "category_id": rng.choice(category_list)["id"],
+            "transfer_account_id": None,
+            "deleted": False,
+        }
+        for _ in range(scheduled_transactions)
+    ]
+    budget = {
+        "id": _id(rng),
+        "name": "Synthetic Budget",
+        "last_modified_on": "2018-12-31T00:00:00.000Z",
+        "date_format": {"format": "DD/MM/YYYY"},
+        "currency_format": CURRENCY_FORMAT,
+        "accounts": account_list,
+        "payees": payee_list,
+        "payee_locations": [],
+        "category_groups": group_list,
+        "categories": category_list,
+        "months": months,
+        "transactions": transactions,
+        "subtransactions": subtransactions,
+        "scheduled_transactions": scheduled,
+        "scheduled_subtransactions": [],
+    }
+    return {"data": {"budget": budget, "server_knowledge": len(transactions)}}
@@ -1,7 +1,11 @@
+from .cache import ResponseCache
+from .orchestrator import SyncOrchestrator
 from .pynab import Pynab
+from .ratelimit import RateLimiter
+from .store import BudgetStore
 
 __version__ = "0.0.1"
 
 __author__ = "Tim Thompson <me@tim-thompson.co.uk>"
 
-__all__ = ["Pynab"]
+__all__ = ["Pynab", "BudgetStore", "RateLimiter", "ResponseCache", "SyncOrchestrator"]
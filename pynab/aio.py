@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - aiohttp is an optional dependency
+    aiohttp = None
+
+from pynab.factory import parse, merge
+from pynab.exceptions import PynabAuthenticationError, PynabConnectionError, PynabError
+from pynab.pynab import Pynab, create_session
+
+
+class AsyncPynab:
+    """Asyncio client for the YNAB API exposing the same endpoints as Pynab.
+    Requests are made concurrently up to the concurrency limit and responses are
+    parsed in a worker thread so that large budgets do not block the event loop.
+    Budgets returned make any further requests, such as to create transactions,
+    with a requests session of their own, as Budget is synchronous.
+    Should be used as an async context manager or closed when finished with.
+    """
+
+    _base_url = Pynab._base_url
+
+    def __init__(self, access_token: str, concurrency: int = 10, models=None, base_url=None):
+        if aiohttp is None:
+            raise PynabError("aiohttp is required for the async client: pip install pynab[async]")
+        if access_token is None or len(access_token) == 0:
+            raise PynabAuthenticationError("No access token specified")
+        self.models = models
+        if base_url is not None:
+            self._base_url = base_url
+        self._headers = {"Authorization": f"Bearer {access_token}"}
+        # The session budgets make further requests with
+        self.session = create_session(access_token)
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._session = None
+
+    def __repr__(self):
+        return f"<AsyncPynab Client>"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
+
+    async def close(self):
+        """Closes the HTTP session used by the client"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self.session.close()
+
+    async def _get(self, path, params=None):
+        """Makes a GET request within the concurrency limit and returns the raw body"""
+        # Created on first use so that they belong to the running event loop
+        if self._session is None:
+            self._session = aiohttp.ClientSession(headers=self._headers)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            try:
+                async with self._session.get(path, params=params) as response:
+                    return await response.read()
+            except aiohttp.ClientConnectionError:
+                raise PynabConnectionError
+
+    async def _parse(self, body, **options):
+        """Decodes and parses a response body in a worker thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: parse(json.loads(body), **options))
+
+    async def _fetch(self, path, **options):
+        """Makes a GET request and parses the response in a worker thread"""
+        return await self._parse(await self._get(path), **options)
+
+    @property
+    def user(self):
+        """Gets information about the currently authenticated user, to be awaited
+        as in await client.user
+
+        :rtype: pynab.models.User
+        :return: a user object of the currently authenticated user
+        """
+        return self._fetch(f"{self._base_url}/user")
+
+    async def budgets_list(self):
+        """Gets a list containing a limited subset of information from each budget.
+        Should be used to retrieve budget IDs to make further requests.
+
+        :rtype: List[pynab.models.BudgetSummary]
+        :return: a list containing summary information of each budget
+        """
+        return await self._parse(await self._get(f"{self._base_url}/budgets"))
+
+    async def budget(self, budget_id):
+        """Gets a single budget by id
+
+        :rtype: pynab.models.Budget
+        :param budget_id: the UUID of the budget that should be returned
+        :return: a new budget object
+        """
+        path = f"{self._base_url}/budgets/{budget_id}"
+        budget = await self._fetch(path, session=self.session, models=self.models)
+        budget.base_url = self._base_url
+        return budget
+
+    async def budgets(self, budget_ids):
+        """Gets several budgets by id concurrently
+
+        :rtype: List[pynab.models.Budget]
+        :param budget_ids: the UUIDs of the budgets that should be returned
+        :return: a list of new budget objects in the same order as the ids
+        """
+        return await asyncio.gather(*(self.budget(budget_id) for budget_id in budget_ids))
+
+    async def sync_budget(self, budget):
+        """Brings a budget up to date by requesting only the changes made since its
+        server knowledge and merging them into the budget in place
+
+        :rtype: pynab.models.Budget
+        :param budget: a budget previously returned by the budget method
+        :return: the same budget object with the latest changes applied, merged in a
+            worker thread
+        """
+        if budget.server_knowledge is None:
+            raise PynabError("Budget has no server knowledge to request changes from")
+        path = f"{self._base_url}/budgets/{budget.budget_id}"
+        params = {"last_knowledge_of_server": budget.server_knowledge}
+        body = await self._get(path, params=params)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: merge(json.loads(body), budget))
+
+    async def budget_settings(self, budget_id):
+        """Gets the settings for a single budget by id
+
+        :rtype: pynab.models.BudgetSettings
+        :param budget_id: the UUID of the budget that contains the settings to be retrieved
+        :return: a new budget settings object
+        """
+        return await self._parse(await self._get(f"{self._base_url}/budgets/{budget_id}/settings"))
@@ -0,0 +1,40 @@
+import dataclasses
+from functools import lru_cache
+
+from pynab.exceptions import PynabError
+
+
+@lru_cache(maxsize=None)
+def builder(model):
+    """Gets a function that creates an instance of a model from a dict of json
+    returned by the YNAB API. The fields of the model are worked out once per
+    model, so the common case of a dict matching the model is a single call,
+    while keys the model does not have, such as fields added to the API after
+    the model was written, are dropped instead of failing.
+
+    :param model: the class to create instances of
+    :return: a function accepting a dict and returning a new instance of the model
+    """
+    if not dataclasses.is_dataclass(model):
+        return lambda data: model(**data)
+    fields = [field for field in dataclasses.fields(model) if field.init]
+    names = frozenset(field.name for field in fields)
+    required = [
+        field.name
+        for field in fields
+        if field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+    ]
+
+    def build(data):
+        try:
+            return model(**data)
+        except TypeError:
+            if names.issuperset(data) and all(name in data for name in required):
+                raise
+        for name in required:
+            if name not in data:
+                raise PynabError(f"Missing field {name!r} in response from YNAB API")
+        return model(**{key: value for key, value in data.items() if key in names})
+
+    build.__doc__ = f"Creates a {model.__name__} from a dict of json"
+    return build
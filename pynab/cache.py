@@ -0,0 +1,361 @@
+import fnmatch
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from pynab.exceptions import PynabError
+
+# Seconds responses of each endpoint are cached for by default, matched against
+# the path of the request relative to the base URL of the API
+DEFAULT_TTLS = {
+    "/user": 300,
+    "/budgets": 60,
+    "/budgets/*/settings": 300,
+}
+
+
+class MemoryBackend:
+    """Cache backend holding entries in memory, evicting the least recently used
+    entry once more than max_entries are held
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self._entries)}/{self.max_entries}>"
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self, prefix=""):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+class DiskBackend:
+    """Cache backend persisting entries in a local SQLite database, so that they
+    survive restarts, evicting the least recently used entries once more than
+    max_entries are held
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, entry TEXT, used REAL)"
+            )
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.path}>"
+
+    def close(self):
+        """Closes the connection to the underlying database"""
+        self.connection.close()
+
+    def get(self, key):
+        with self._lock, self.connection:
+            row = self.connection.execute(
+                "SELECT entry FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE responses SET used = ? WHERE key = ?", (time.time(), key)
+            )
+            return json.loads(row[0])
+
+    def set(self, key, entry):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, entry, used) VALUES (?, ?, ?)",
+                (key, json.dumps(entry), time.time()),
+            )
+            self.connection.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key):
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def invalidate(self, prefix=""):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM responses WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+
+
+class SharedFileBackend:
+    """Cache backend keeping entries in a single file locked on each access, so that
+    one cache can be shared by several processes, evicting the least recently used
+    entries once more than max_entries are held. Reads only take a shared lock and
+    leave the file as it is, recording the entry read in a log of uses beside it,
+    which the next write applies to the order of the entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 256):
+        if fcntl is None:
+            raise PynabError("Sharing a cache between processes is not supported here")
+        self.path = path
+        self.max_entries = max_entries
+        self._uses_path = f"{path}.uses"
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.path}>"
+
+    def get(self, key):
+        with self._lock:
+            try:
+                cache_file = open(self.path)
+            except FileNotFoundError:
+                return None
+            with cache_file:
+                fcntl.flock(cache_file, fcntl.LOCK_SH)
+                try:
+                    entry = _load_entries(cache_file).get(key)
+                finally:
+                    fcntl.flock(cache_file, fcntl.LOCK_UN)
+        if entry is not None:
+            self._record_use(key)
+        return entry
+
+    def set(self, key, entry):
+        def change(entries):
+            entries.pop(key, None)
+            entries[key] = entry
+            for evicted in list(entries)[: max(0, len(entries) - self.max_entries)]:
+                del entries[evicted]
+
+        self._update(change)
+
+    def delete(self, key):
+        self._update(lambda entries: entries.pop(key, None))
+
+    def invalidate(self, prefix=""):
+        def change(entries):
+            for key in [key for key in entries if key.startswith(prefix)]:
+                del entries[key]
+
+        self._update(change)
+
+    def _record_use(self, key):
+        """Appends a key read to the log of uses, applying the log once it holds
+        several uses of every entry so that it stays small while only reads are made
+        """
+        with open(self._uses_path, "a") as uses_file:
+            uses_file.write(json.dumps(key) + "\n")
+            size = uses_file.tell()
+        if size > 4 * self.max_entries * (len(key) + 3):
+            self._update(lambda entries: None)
+
+    def _update(self, change):
+        """Applies a change to the entries of the file under an exclusive lock,
+        with the entries ordered from least to most recently used
+        """
+        with self._lock, open(self.path, "a+") as cache_file:
+            fcntl.flock(cache_file, fcntl.LOCK_EX)
+            try:
+                cache_file.seek(0)
+                entries = _load_entries(cache_file)
+                for key in _read_uses(self._uses_path):
+                    if key in entries:
+                        entries.move_to_end(key)
+                result = change(entries)
+                cache_file.seek(0)
+                cache_file.truncate()
+                cache_file.write(json.dumps(entries))
+                cache_file.flush()
+                open(self._uses_path, "w").close()
+                return result
+            finally:
+                fcntl.flock(cache_file, fcntl.LOCK_UN)
+
+
+def _load_entries(cache_file):
+    try:
+        return json.loads(cache_file.read(), object_pairs_hook=OrderedDict)
+    except ValueError:
+        return OrderedDict()
+
+
+def _read_uses(path):
+    """Gets the keys in a log of uses from oldest to newest, skipping a line left
+    incomplete by a read being recorded at the same time
+    """
+    try:
+        with open(path) as uses_file:
+            lines = uses_file.readlines()
+    except FileNotFoundError:
+        return []
+    keys = []
+    for line in lines:
+        try:
+            keys.append(json.loads(line))
+        except ValueError:
+            continue
+    return keys
+
+
+class ResponseCache:
+    """Cache of responses to GET requests made by a client. Responses are reused
+    until the TTL of their endpoint expires, after which they are revalidated with
+    a conditional request when the server returned an ETag or Last-Modified header.
+    Only endpoints with a TTL are cached, and entries for a budget are invalidated
+    whenever the client changes the budget. Full budgets and delta requests are
+    never cached, as a cached delta would hide changes made since it was received.
+    """
+
+    def __init__(self, backend=None, ttls: dict = None, default_ttl: float = None):
+        """
+        :param backend: the backend entries are kept in, in memory by default
+        :param ttls: seconds to cache each endpoint for keyed by path patterns such as
+            /budgets/*/settings, in place of DEFAULT_TTLS
+        :param default_ttl: seconds to cache endpoints not in ttls for, or None to not
+            cache them
+        """
+        self.backend = MemoryBackend() if backend is None else backend
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.hits} hits, {self.misses} misses>"
+
+    def ttl(self, endpoint: str):
+        """Gets the number of seconds responses of an endpoint are cached for
+
+        :param endpoint: the path of the request relative to the base URL
+        :return: the TTL in seconds, or None if the endpoint is not cached
+        """
+        for pattern, ttl in self.ttls.items():
+            if fnmatch.fnmatchcase(endpoint, pattern):
+                return ttl
+        return self.default_ttl
+
+    def fetch(self, endpoint: str, url: str, params, send, on_decode=None):
+        """Gets the json of a response from the cache, or by sending the request
+        when it is not cached or has expired
+
+        :param endpoint: the path of the request relative to the base URL
+        :param url: the URL of the request
+        :param params: query parameters sent with the request
+        :param send: function sending the request with extra headers, returning
+            the requests.Response
+        :param on_decode: called with the number of seconds taken to decode the
+            json, whether it came from the cache or the response
+        :return: the json of the response as a dict
+        """
+        ttl = self.ttl(endpoint)
+        if ttl is None or not _cacheable(endpoint, params):
+            return _decode(send({}).text, on_decode)
+        key = _key(url, params)
+        entry = self.backend.get(key)
+        now = time.time()
+        if entry is not None and entry["expires"] > now:
+            self._count("hits")
+            return _decode(entry["body"], on_decode)
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = send(headers)
+        if response.status_code == 304 and entry is not None:
+            self._count("revalidations")
+            self.backend.set(key, dict(entry, expires=now + ttl))
+            return _decode(entry["body"], on_decode)
+
+        self._count("misses")
+        if response.status_code == 200:
+            entry = {
+                "body": response.text,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "expires": now + ttl,
+            }
+            self.backend.set(key, entry)
+        return _decode(response.text, on_decode)
+
+    def invalidate(self, url_prefix: str = ""):
+        """Removes every cached response whose URL starts with a prefix
+
+        :param url_prefix: the start of the URLs to remove, all entries by default
+        """
+        self.backend.invalidate(url_prefix)
+
+    def discard(self, url: str, params=None):
+        """Removes the cached response of a single request, if there is one
+
+        :param url: the URL of the request
+        :param params: query parameters sent with the request
+        """
+        self.backend.delete(_key(url, params))
+
+    def _count(self, counter):
+        """Increments a counter, which may be done by several threads at once"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def _decode(body, on_decode):
+    if on_decode is None:
+        return json.loads(body)
+    start = time.perf_counter()
+    value = json.loads(body)
+    on_decode(time.perf_counter() - start)
+    return value
+
+
+def _cacheable(endpoint, params):
+    """Whether responses of a request may be cached, which excludes full budgets
+    and any request for the changes since a server knowledge
+    """
+    if params and "last_knowledge_of_server" in params:
+        return False
+    segments = endpoint.strip("/").split("/")
+    return not (len(segments) == 2 and segments[0] == "budgets")
+
+
+def _key(url, params):
+    """Gets the key of a request in the cache from its URL and query parameters"""
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
@@ -0,0 +1,61 @@
+import threading
+
+
+class _Call:
+    """A call in flight, which the threads making the same call wait for"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces identical calls made at the same time by many threads, so that
+    only the first runs and the rest wait for it and share its result, or the
+    exception it raised. A call made after the first has finished runs again, so
+    results are only shared by calls that overlap.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.coalesced} of {self.calls} calls coalesced>"
+
+    def do(self, key, function):
+        """Runs a function unless a call with the same key is already in flight, in
+        which case waits for that call instead
+
+        :param key: a hashable key identifying the call, such as the URL requested
+        :param function: the function making the call, run without arguments
+        :return: a tuple of the result and whether it was shared from another call
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result, False
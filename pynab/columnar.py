@@ -0,0 +1,178 @@
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+from pynab.exceptions import PynabError
+
+
+def _require_numpy():
+    if np is None:
+        raise PynabError("numpy is required for columnar tables: pip install pynab[columnar]")
+
+
+def _factorize(values):
+    """Encodes values as integer codes into a list of the distinct values"""
+    labels = {}
+    codes = np.fromiter((labels.setdefault(value, len(labels)) for value in values), np.int32)
+    return codes, list(labels)
+
+
+def _values(entities, key):
+    if hasattr(entities, "attribute_values"):
+        return entities.attribute_values(key)
+    return (getattr(entity, key) for entity in entities)
+
+
+@dataclass
+class Pivot:
+    """Data Class to represent totals grouped by two columns of a table"""
+
+    rows: list
+    columns: list
+    values: "np.ndarray"
+
+    def get(self, row, column):
+        """Gets the total for a single row and column, zero if there is none"""
+        try:
+            return int(self.values[self.rows.index(row), self.columns.index(column)])
+        except ValueError:
+            return 0
+
+
+class TransactionTable:
+    """Class to represent the transactions of a budget as NumPy columns, with one
+    row per transaction or, for split transactions, one row per subtransaction.
+    Amounts are in milliunits, dates are datetime64 days and ids are stored as
+    integer codes into the lists held in labels.
+    """
+
+    def __init__(self, amount, date, account, category, payee, transaction_id, labels):
+        self.amount = amount
+        self.date = date
+        self.account = account
+        self.category = category
+        self.payee = payee
+        self.transaction_id = transaction_id
+        self.labels = labels
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self)} rows>"
+
+    def __len__(self):
+        return len(self.amount)
+
+    @classmethod
+    def from_budget(cls, budget, include_deleted: bool = False):
+        """Creates a table from the transactions and subtransactions of a budget,
+        reading the json of entities that have not been created yet
+
+        :rtype: pynab.columnar.TransactionTable
+        :param budget: the budget containing the transactions
+        :param include_deleted: whether deleted transactions should be included
+        :return: a new transaction table
+        """
+        _require_numpy()
+        columns = ["id", "date", "amount", "account_id", "category_id", "payee_id", "deleted"]
+        transactions = {key: list(_values(budget.transactions, key)) for key in columns}
+        subtransactions = {
+            key: list(_values(budget.subtransactions, key))
+            for key in ["transaction_id", "amount", "category_id", "payee_id", "deleted"]
+        }
+
+        positions = {
+            transaction_id: position
+            for position, transaction_id in enumerate(transactions["id"])
+        }
+        parents = np.fromiter(
+            (positions.get(parent, -1) for parent in subtransactions["transaction_id"]),
+            np.int64,
+            len(subtransactions["transaction_id"]),
+        )
+        keep = np.ones(len(transactions["id"]), dtype=bool)
+        sub_keep = parents >= 0
+        if not include_deleted:
+            keep &= ~np.array(transactions["deleted"], dtype=bool)
+            sub_keep &= ~np.array(subtransactions["deleted"], dtype=bool)
+            sub_keep[sub_keep] &= keep[parents[sub_keep]]
+        # Split transactions are represented by their subtransactions instead
+        keep[parents[sub_keep]] = False
+        rows = np.flatnonzero(keep)
+        sub_rows = np.flatnonzero(sub_keep)
+        sub_parents = parents[sub_rows]
+
+        def column(values, sub_values):
+            values = np.asarray(values, dtype=object)
+            sub_values = np.asarray(sub_values, dtype=object)
+            return np.concatenate([values[rows], sub_values[sub_rows]])
+
+        dates = np.asarray(transactions["date"], dtype="datetime64[D]")
+        account = np.asarray(transactions["account_id"], dtype=object)
+        ids = np.asarray(transactions["id"], dtype=object)
+        labels = {}
+        codes = {}
+        for name, values in [
+            ("account", np.concatenate([account[rows], account[sub_parents]])),
+            ("category", column(transactions["category_id"], subtransactions["category_id"])),
+            ("payee", column(transactions["payee_id"], subtransactions["payee_id"])),
+            ("transaction_id", np.concatenate([ids[rows], ids[sub_parents]])),
+        ]:
+            codes[name], labels[name] = _factorize(values)
+        return cls(
+            amount=np.concatenate(
+                [
+                    np.asarray(transactions["amount"], dtype=np.int64)[rows],
+                    np.asarray(subtransactions["amount"], dtype=np.int64)[sub_rows],
+                ]
+            ),
+            date=np.concatenate([dates[rows], dates[sub_parents]]),
+            labels=labels,
+            **codes,
+        )
+
+    @property
+    def month(self):
+        """The month of each row as datetime64 months"""
+        return self.date.astype("datetime64[M]")
+
+    def total_by(self, column: str):
+        """Sums amounts grouped by one of the id columns
+
+        :param column: one of account, category, payee or transaction_id
+        :return: a dict of each id to the total of its amounts in milliunits
+        """
+        labels = self.labels[column]
+        totals = np.bincount(getattr(self, column), weights=self.amount, minlength=len(labels))
+        return {label: int(total) for label, total in zip(labels, totals)}
+
+    def spend_by_category_month(self):
+        """Sums amounts grouped by category and month
+
+        :rtype: pynab.columnar.Pivot
+        :return: totals with a row for each category and a column for each month
+        """
+        return self._pivot(self.category, self.labels["category"])
+
+    def balance_by_account_month(self):
+        """Calculates the running balance of each account at the end of each month
+
+        :rtype: pynab.columnar.Pivot
+        :return: balances with a row for each account and a column for each month
+        """
+        pivot = self._pivot(self.account, self.labels["account"])
+        pivot.values = np.cumsum(pivot.values, axis=1)
+        return pivot
+
+    def _pivot(self, codes, labels):
+        months, month_codes = np.unique(self.month, return_inverse=True)
+        flat = codes.astype(np.int64) * len(months) + month_codes
+        values = np.bincount(
+            flat, weights=self.amount, minlength=len(labels) * len(months)
+        ).astype(np.int64)
+        return Pivot(
+            rows=list(labels),
+            columns=[str(month) for month in months],
+            values=values.reshape(len(labels), len(months)),
+        )
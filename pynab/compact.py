@@ -0,0 +1,114 @@
+import dataclasses
+
+from pynab.builders import builder
+from pynab.models import (
+    Account,
+    Category,
+    Payee,
+    ScheduledTransaction,
+    Subtransaction,
+    Transaction,
+)
+
+
+def compact(model, frozen: bool = False, name: str = None, namespace: dict = None):
+    """Creates a variant of a model data class that stores its fields in __slots__
+    rather than a per instance __dict__, using far less memory for each instance.
+    The variant has exactly the same public fields as the model.
+
+    :param model: the data class to create a compact variant of
+    :param frozen: whether instances of the variant should be immutable
+    :param name: the name of the variant, defaults to the model name prefixed with Compact
+    :param namespace: methods to add to the variant in place of those of the model
+    :return: the compact data class
+    """
+    if name is None:
+        name = f"{'Frozen' if frozen else 'Compact'}{model.__name__}"
+    fields = [
+        (field.name, field.type, dataclasses.field(default=field.default))
+        if field.default is not dataclasses.MISSING
+        else (field.name, field.type)
+        for field in dataclasses.fields(model)
+    ]
+    base = dataclasses.make_dataclass(name, fields, namespace=namespace, frozen=frozen)
+
+    # Slots cannot be added to an existing class and conflict with the class
+    # attributes holding field defaults, so the class is recreated without them
+    namespace = dict(base.__dict__)
+    field_names = tuple(field.name for field in dataclasses.fields(base))
+    for field_name in field_names:
+        namespace.pop(field_name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = field_names
+    namespace["__doc__"] = f"Compact variant of {model.__name__} using __slots__"
+    namespace["__module__"] = __name__
+    namespace["__getstate__"] = _getstate
+    namespace["__setstate__"] = _setstate
+    return type(name, (), namespace)
+
+
+def _getstate(self):
+    return tuple(getattr(self, name) for name in self.__slots__)
+
+
+def _setstate(self, state):
+    for name, value in zip(self.__slots__, state):
+        object.__setattr__(self, name, value)
+
+
+def _subtransactions_post_init(subtransaction_model, container):
+    def __post_init__(self):
+        if self.subtransactions is not None:
+            build = builder(subtransaction_model)
+            subtransactions = container(
+                subtransaction
+                if isinstance(subtransaction, subtransaction_model)
+                else build(subtransaction)
+                for subtransaction in self.subtransactions
+            )
+            object.__setattr__(self, "subtransactions", subtransactions)
+
+    return {"__post_init__": __post_init__}
+
+
+CompactAccount = compact(Account)
+CompactPayee = compact(Payee)
+CompactCategory = compact(Category)
+CompactSubtransaction = compact(Subtransaction)
+CompactScheduledTransaction = compact(ScheduledTransaction)
+CompactTransaction = compact(
+    Transaction, namespace=_subtransactions_post_init(CompactSubtransaction, list)
+)
+
+# Frozen transactions hold their subtransactions in a tuple so that they cannot
+# be changed either
+FrozenAccount = compact(Account, frozen=True)
+FrozenPayee = compact(Payee, frozen=True)
+FrozenCategory = compact(Category, frozen=True)
+FrozenSubtransaction = compact(Subtransaction, frozen=True)
+FrozenScheduledTransaction = compact(ScheduledTransaction, frozen=True)
+FrozenTransaction = compact(
+    Transaction,
+    frozen=True,
+    namespace=_subtransactions_post_init(FrozenSubtransaction, tuple),
+)
+
+# Models to be passed to a Budget to use compact variants for its largest collections
+COMPACT_MODELS = {
+    "accounts": CompactAccount,
+    "payees": CompactPayee,
+    "categories": CompactCategory,
+    "transactions": CompactTransaction,
+    "subtransactions": CompactSubtransaction,
+    "scheduled_transactions": CompactScheduledTransaction,
+}
+
+FROZEN_MODELS = {
+    "accounts": FrozenAccount,
+    "payees": FrozenPayee,
+    "categories": FrozenCategory,
+    "transactions": FrozenTransaction,
+    "subtransactions": FrozenSubtransaction,
+    "scheduled_transactions": FrozenScheduledTransaction,
+}
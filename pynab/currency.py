@@ -0,0 +1,175 @@
+from dataclasses import astuple
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+from pynab.exceptions import PynabError
+
+# Amounts are given by the YNAB API in milliunits, thousandths of a unit of currency
+MILLIUNITS = 1000
+
+# Character separating formatted amounts while they are translated together
+_SEPARATOR = "\n"
+
+
+class CurrencyFormatter:
+    """Converts amounts in milliunits to and from the strings and decimals shown
+    for a currency format. Conversions are made a column at a time: the rounding
+    is done with NumPy when given an array, the decimal parts are looked up from
+    a table made once per format, and the group separators of every amount are
+    replaced together with a single str.translate rather than once per amount.
+
+    Use formatter to get the cached formatter of a currency format.
+    """
+
+    def __init__(self, currency_format):
+        """
+        :param currency_format: the CurrencyFormat of a budget
+        """
+        digits = currency_format.decimal_digits
+        if not 0 <= digits <= 3:
+            raise PynabError(f"Cannot format amounts with {digits} decimal digits")
+        self.currency_format = currency_format
+        self.digits = digits
+        # The number of milliunits in the smallest amount shown and in a unit
+        self._step = 10 ** (3 - digits)
+        self._unit = 10**digits
+        # The decimal part of every amount, looked up rather than formatted each time
+        separator = currency_format.decimal_separator
+        self._fractions = [""]
+        if digits:
+            self._fractions = [f"{separator}{value:0{digits}d}" for value in range(self._unit)]
+        self._translation = None
+        if currency_format.group_separator != ",":
+            self._translation = str.maketrans({",": currency_format.group_separator})
+        symbol = currency_format.currency_symbol if currency_format.display_symbol else ""
+        if currency_format.symbol_first:
+            self._prefix, self._suffix = symbol, ""
+        else:
+            self._prefix, self._suffix = "", symbol
+        self._symbol = symbol
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.currency_format.iso_code}>"
+
+    def _split(self, amounts):
+        """Rounds amounts to the smallest amount shown, returning the sign of each
+        along with its whole units and the remainder in the smallest amount shown
+        """
+        if np is not None and isinstance(amounts, np.ndarray):
+            values = np.abs(amounts.astype(np.int64))
+            values = (values + self._step // 2) // self._step
+            whole, fraction = np.divmod(values, self._unit)
+            return (amounts < 0).tolist(), whole.tolist(), fraction.tolist()
+        step, half, unit = self._step, self._step // 2, self._unit
+        amounts = list(amounts)
+        rounded = [(abs(amount) + half) // step for amount in amounts]
+        return (
+            [amount < 0 for amount in amounts],
+            [value // unit for value in rounded],
+            [value % unit for value in rounded],
+        )
+
+    def format(self, amount: int):
+        """Formats an amount in milliunits as it is shown in YNAB, such as -$1,234.56
+
+        :param amount: the amount in milliunits
+        :return: the formatted amount
+        """
+        return self.format_many([amount])[0]
+
+    def format_many(self, amounts):
+        """Formats a column of amounts in milliunits as they are shown in YNAB
+
+        :param amounts: a list, iterable or NumPy array of amounts in milliunits
+        :return: a list of the formatted amounts
+        """
+        negative, whole, fraction = self._split(amounts)
+        group = "{:,}".format
+        numbers = [group(value) for value in whole]
+        if self._translation is not None and numbers:
+            numbers = _SEPARATOR.join(numbers).translate(self._translation).split(_SEPARATOR)
+        fractions = self._fractions
+        prefix, negative_prefix, suffix = self._prefix, "-" + self._prefix, self._suffix
+        return [
+            (negative_prefix if sign else prefix) + number + fractions[value] + suffix
+            for sign, number, value in zip(negative, numbers, fraction)
+        ]
+
+    def to_decimals(self, amounts):
+        """Converts a column of amounts in milliunits to decimals of units of the
+        currency, rounded to the decimal digits of the format
+
+        :param amounts: a list, iterable or NumPy array of amounts in milliunits
+        :return: a list of Decimal
+        """
+        negative, whole, fraction = self._split(amounts)
+        unit = self._unit
+        digits = -self.digits
+        return [
+            Decimal(-value if sign else value).scaleb(digits)
+            for sign, value in zip(negative, (w * unit + f for w, f in zip(whole, fraction)))
+        ]
+
+    def from_decimals(self, values):
+        """Converts a column of amounts in units of the currency, such as decimals,
+        floats or strings like 12.34, to milliunits
+
+        :param values: an iterable of amounts in units of the currency
+        :return: a list of amounts in milliunits
+        """
+        return [
+            int((Decimal(str(value)) * MILLIUNITS).to_integral_value(ROUND_HALF_UP))
+            for value in values
+        ]
+
+    def parse(self, text: str):
+        """Parses an amount formatted as it is shown in YNAB to milliunits
+
+        :param text: the formatted amount, such as -$1,234.56
+        :return: the amount in milliunits
+        """
+        return self.parse_many([text])[0]
+
+    def parse_many(self, texts):
+        """Parses a column of amounts formatted as they are shown in YNAB to milliunits
+
+        :param texts: an iterable of formatted amounts
+        :return: a list of the amounts in milliunits
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        joined = _SEPARATOR.join(texts)
+        if self._symbol:
+            joined = joined.replace(self._symbol, "")
+        fmt = self.currency_format
+        if fmt.group_separator:
+            joined = joined.replace(fmt.group_separator, "")
+        if fmt.decimal_separator:
+            joined = joined.replace(fmt.decimal_separator, ".")
+        try:
+            return self.from_decimals(joined.split(_SEPARATOR))
+        except ArithmeticError:
+            raise PynabError(f"Cannot parse amounts in {fmt.iso_code} format") from None
+
+
+@lru_cache(maxsize=None)
+def _cached_formatter(*fields):
+    from pynab.models import CurrencyFormat
+
+    return CurrencyFormatter(CurrencyFormat(*fields))
+
+
+def formatter(currency_format):
+    """Gets the formatter of a currency format, created once per distinct format
+
+    :rtype: pynab.currency.CurrencyFormatter
+    :param currency_format: the CurrencyFormat of a budget
+    :return: the formatter
+    """
+    return _cached_formatter(*astuple(currency_format))
@@ -0,0 +1,262 @@
+import dataclasses
+import gzip
+import json
+from operator import attrgetter
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is an optional dependency
+    msgpack = None
+
+from pynab.exceptions import PynabError
+from pynab.lazy import LazyEntityList
+from pynab.models import Budget, Category, Subtransaction
+
+# Version of the layout of exported files, checked when they are loaded
+FORMAT_VERSION = 1
+
+FORMATS = ("msgpack", "jsonl", "columnar")
+
+# Fields holding lists of nested entities and the model of those entities
+_NESTED = {"categories": Category, "subtransactions": Subtransaction}
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise PynabError("msgpack is required for binary exports: pip install pynab[export]")
+
+
+def _fields(model):
+    return tuple(field.name for field in dataclasses.fields(model) if field.init)
+
+
+def _rows(entities, fields):
+    """Generates the values of the fields of every entity as tuples"""
+    if hasattr(entities, "rows"):
+        return entities.rows(fields)
+    get = attrgetter(*fields)
+    return (
+        tuple(map(entity.get, fields)) if isinstance(entity, dict) else get(entity)
+        for entity in entities
+    )
+
+
+def _nested_rows(values, fields):
+    return None if values is None else [list(row) for row in _rows(values, fields)]
+
+
+def _collection_rows(entities, fields, nested):
+    """Generates the rows of a collection as lists, with nested entities as rows"""
+    if not nested:
+        return (list(row) for row in _rows(entities, fields))
+    positions = [(fields.index(name), nested_fields) for name, nested_fields in nested.items()]
+
+    def convert(row):
+        row = list(row)
+        for position, nested_fields in positions:
+            row[position] = _nested_rows(row[position], nested_fields)
+        return row
+
+    return (convert(row) for row in _rows(entities, fields))
+
+
+def _header(budget):
+    return {
+        "format": "pynab",
+        "version": FORMAT_VERSION,
+        "budget": {
+            "id": budget.budget_id,
+            "name": budget.name,
+            "last_modified_on": budget.last_modified_on,
+            "date_format": {"format": budget.date_format},
+            "currency_format": dataclasses.asdict(budget.currency_format),
+        },
+        "server_knowledge": budget.server_knowledge,
+    }
+
+
+class _Writer:
+    """Writes records to a binary file in one of the export formats"""
+
+    def __init__(self, file, format):
+        if format not in FORMATS:
+            raise PynabError(f"Unknown export format {format}, expected one of {FORMATS}")
+        self.file = file
+        self.columnar = format == "columnar"
+        if format == "jsonl":
+            encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+            self._encode = lambda record: (encoder.encode(record) + "\n").encode()
+        else:
+            _require_msgpack()
+            self._encode = msgpack.Packer(use_bin_type=True).pack
+
+    def write(self, record):
+        self.file.write(self._encode(record))
+
+    def write_collection(self, name, entities, model):
+        fields = _fields(model)
+        nested = {
+            field: _fields(nested_model)
+            for field, nested_model in _NESTED.items()
+            if field in fields
+        }
+        rows = _collection_rows(entities, fields, nested)
+        if self.columnar:
+            columns = [list(column) for column in zip(*rows)] or [[] for _ in fields]
+            record = {"collection": name, "fields": fields, "nested": nested}
+            self.write(dict(record, columns=columns))
+            return
+        self.write(
+            {"collection": name, "fields": fields, "nested": nested, "count": len(entities)}
+        )
+        for row in rows:
+            self.write(row)
+
+
+def _reader(file, format):
+    """Generates the records of a binary file in one of the export formats"""
+    if format not in FORMATS:
+        raise PynabError(f"Unknown export format {format}, expected one of {FORMATS}")
+    if format == "jsonl":
+        return (json.loads(line) for line in file)
+    _require_msgpack()
+    return iter(msgpack.Unpacker(file, raw=False, use_list=True, strict_map_key=False))
+
+
+def _open(path_or_file, mode):
+    """Opens a path for binary reading or writing, compressing paths ending with .gz,
+    or returns a file that is already open along with whether it should be closed
+    """
+    if not isinstance(path_or_file, str):
+        return path_or_file, False
+    if path_or_file.endswith(".gz"):
+        return gzip.open(path_or_file, mode + "b", compresslevel=6), True
+    return open(path_or_file, mode + "b"), True
+
+
+def export_budget(budget: Budget, path_or_file, format: str = "msgpack", collections=None):
+    """Writes a budget to a file, entity by entity, without creating a dict for
+    each entity or the entities of a lazy list that have not been accessed.
+    Rows hold the values of the fields of each model in order, so the names of the
+    fields are written once per collection rather than once per entity.
+
+    :param budget: the budget to be exported
+    :param path_or_file: a path, compressed with gzip if it ends with .gz, or a
+        binary file
+    :param format: msgpack or jsonl to write a row per entity, or columnar to write
+        the values of each field of a collection together
+    :param collections: the names of the collections to export, all by default
+    """
+    file, close = _open(path_or_file, "w")
+    try:
+        writer = _Writer(file, format)
+        writer.write(_header(budget))
+        for name in collections or Budget._collections:
+            writer.write_collection(name, getattr(budget, name), budget.models[name])
+    finally:
+        if close:
+            file.close()
+
+
+def export_collection(entities, path_or_file, format: str = "msgpack", model=None):
+    """Writes a collection of entities, such as the transactions of a budget, to a
+    file in the same way as export_budget
+
+    :param entities: a list of entities of a single model
+    :param path_or_file: a path, compressed with gzip if it ends with .gz, or a
+        binary file
+    :param format: msgpack, jsonl or columnar
+    :param model: the model of the entities, by default that of the lazy list or
+        the first entity, so is needed for an empty list
+    """
+    if model is None:
+        model = getattr(entities, "model", None)
+    if model is None:
+        if len(entities) == 0:
+            raise PynabError("The model of an empty collection must be given")
+        model = type(entities[0])
+    file, close = _open(path_or_file, "w")
+    try:
+        writer = _Writer(file, format)
+        writer.write({"format": "pynab", "version": FORMAT_VERSION})
+        writer.write_collection(model.__name__, entities, model)
+    finally:
+        if close:
+            file.close()
+
+
+def load_collection(path_or_file, model, format: str = "msgpack"):
+    """Loads a collection written by export_collection into a lazy list, so that
+    each entity is only created when it is first accessed
+
+    :rtype: pynab.lazy.LazyEntityList
+    :param path_or_file: a path, decompressed with gzip if it ends with .gz, or a
+        binary file
+    :param model: the model to create the entities with
+    :param format: the format the collection was exported in
+    :return: a lazy list of the entities
+    """
+    file, close = _open(path_or_file, "r")
+    try:
+        records = _reader(file, format)
+        _check_header(next(records, None))
+        record = next(records, None)
+        entities = [] if record is None else list(_read_collection(record, records))
+    finally:
+        if close:
+            file.close()
+    return LazyEntityList(model, entities)
+
+
+def load_budget(path_or_file, format: str = "msgpack", session=None, models=None):
+    """Loads a budget written by export_budget. Entities are kept as json in lazy
+    lists, so are only created when they are first accessed
+
+    :rtype: pynab.models.Budget
+    :param path_or_file: a path, decompressed with gzip if it ends with .gz, or a
+        binary file
+    :param format: the format the budget was exported in
+    :param session: the requests session the budget should use for further requests
+    :param models: models to use in place of the defaults for collections of the budget
+    :return: the loaded budget
+    """
+    file, close = _open(path_or_file, "r")
+    try:
+        records = _reader(file, format)
+        header = _check_header(next(records, None))
+        data = dict(header["budget"])
+        for collection in Budget._collections:
+            data[collection] = []
+        for record in records:
+            data[record["collection"]] = list(_read_collection(record, records))
+    finally:
+        if close:
+            file.close()
+    return Budget(session, server_knowledge=header["server_knowledge"], models=models, **data)
+
+
+def _check_header(header):
+    if not isinstance(header, dict) or header.get("format") != "pynab":
+        raise PynabError("File was not exported by Pynab")
+    if header.get("version") != FORMAT_VERSION:
+        raise PynabError(f"Unsupported export version {header.get('version')}")
+    return header
+
+
+def _read_collection(record, records):
+    """Generates the entities of a collection as dicts of json"""
+    fields = record["fields"]
+    nested = [
+        (fields.index(name), nested_fields) for name, nested_fields in record["nested"].items()
+    ]
+    if "columns" in record:
+        rows = zip(*record["columns"])
+    else:
+        rows = (next(records) for _ in range(record["count"]))
+    for row in rows:
+        entity = dict(zip(fields, row))
+        for position, nested_fields in nested:
+            values = row[position]
+            if values is not None:
+                entity[fields[position]] = [dict(zip(nested_fields, value)) for value in values]
+        yield entity
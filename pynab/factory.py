@@ -1,5 +1,18 @@
-import pynab.pynab as pynab
-from pynab.models import User, BudgetSummary, Budget, BudgetSettings, Transaction
+from pynab.builders import builder
+from pynab.models import (
+    User,
+    BudgetSummary,
+    Budget,
+    BudgetSettings,
+    Transaction,
+    Account,
+    CategoryGroup,
+    Category,
+    Payee,
+    PayeeLocation,
+    Month,
+    ScheduledTransaction,
+)
 
 from pynab.exceptions import (
     PynabError,
@@ -37,46 +50,60 @@ parse_errors = {
 }
 
 
-def parse(json):
+def parse(json, **options):
     """
     Client component for factory that accepts json returned from
     the YNAB API and parses it to establish what is contained within
     the response and create an appropriate object to represent the data
     :param json: json in the form a dict to be parsed to an appropriate object
+    :param options: options passed on to the product component creating the object
     :return: Object created by parsing the json
     """
     if "error" in json:
         _handle_error_response(json["error"])
 
     parser = _get_parser(json["data"])
-    return parser(json)
+    return parser(json, **options)
+
+
+def merge(json, budget, copy_on_write=False):
+    """
+    Client component for factory that accepts a delta json returned from
+    the YNAB API and merges the changes it contains into an existing budget
+    :param json: json in the form a dict containing the changes to be merged
+    :param budget: the budget object the changes should be merged into
+    :param copy_on_write: whether the changes are merged into a new budget that
+        shares the collections without changes, leaving the existing budget as it was
+    :return: the budget with the changes merged in
+    """
+    if "error" in json:
+        _handle_error_response(json["error"])
+
+    changes = json["data"]["budget"]
+    if copy_on_write:
+        budget = budget.fork(
+            [collection for collection in Budget._collections if changes.get(collection)]
+        )
+    budget.apply_delta(json["data"].get("server_knowledge"), **changes)
+    return budget
 
 
 def _get_parser(data_type):
     """
     Creator component for factory that determines the type of data being
-    parsed and returns the correct function to use for parsing the data
-    :param data_type:
+    parsed and returns the correct function to use for parsing the data.
+    The parser is looked up in the registry by each key of the data in turn.
+    :param data_type: the data of the response to be parsed
     :return: the correct method for parsing the requested data type
     """
-    if "user" in data_type:
-        return _parse_user
-    elif "budgets" in data_type:
-        return _parse_budgets
-    elif "budget" in data_type:
-        return _parse_budget
-    elif "settings" in data_type:
-        return _parse_settings
-    elif "transaction" in data_type:
-        return _parse_transaction
-    elif "transactions" in data_type:
-        return _parse_transactions
-    else:
-        # TODO: Create proper exception
-        raise PynabError("Unable to parse response from YNAB API")
+    for key in data_type:
+        parser = _parsers.get(key)
+        if parser is not None:
+            return parser
+    raise PynabError("Unable to parse response from YNAB API")
 
 
-def _parse_user(json):
+def _parse_user(json, **options):
     """
     Product component for factory that creates a User object from user data
     :rtype: pynab.models.User
@@ -86,7 +113,7 @@ def _parse_user(json):
     return User(json["data"]["user"]["id"])
 
 
-def _parse_budgets(json):
+def _parse_budgets(json, **options):
     """
     Product component for factory that creates a list of Budget Summary objects
     from budget summary data
@@ -94,23 +121,28 @@ def _parse_budgets(json):
     :param json:
     :return: list of budget summaries parsed from json
     """
-    return [BudgetSummary(**summary) for summary in json["data"]["budgets"]]
+    build = builder(BudgetSummary)
+    return [build(summary) for summary in json["data"]["budgets"]]
 
 
-def _parse_budget(json):
+def _parse_budget(json, session=None, models=None, **options):
     """
     Product component for factory that creates a Budget object from budget data
     :rtype: pynab.models.Budget
     :param json:
+    :param session: the requests session the budget should use for further requests
+    :param models: models to use in place of the defaults for collections of the budget
     :return: budget parsed from json
     """
-    if pynab.requests_session is None:
-        # TODO: Decide if a new exception is required here
-        raise PynabError("Requests Session should not be none. Please raise an issue on Pynab Github")
-    return Budget(pynab.requests_session, **json["data"]["budget"])
+    return Budget(
+        session,
+        server_knowledge=json["data"].get("server_knowledge"),
+        models=models,
+        **json["data"]["budget"],
+    )
 
 
-def _parse_settings(json):
+def _parse_settings(json, **options):
     """
     Product component for factory that creates a BudgetSettings object from
     budget settings data
@@ -121,7 +153,7 @@ def _parse_settings(json):
     return BudgetSettings(**json["data"]["settings"])
 
 
-def _parse_transaction(json):
+def _parse_transaction(json, **options):
     """
     Product component for factory that creates a Transaction object from
     transaction data
@@ -129,10 +161,10 @@ def _parse_transaction(json):
     :param json: 
     :return: transaction parsed from json
     """
-    return Transaction(**json["data"]["transaction"])
+    return builder(Transaction)(json["data"]["transaction"])
 
 
-def _parse_transactions(json):
+def _parse_transactions(json, **options):
     """
     Product component for factory that creates a list of Transaction objects
     from transaction data
@@ -140,7 +172,67 @@ def _parse_transactions(json):
     :param json: 
     :return: list of transactions parsed from json
     """
-    return [Transaction(**transaction) for transaction in json["data"]["transactions"]]
+    build = builder(Transaction)
+    return [build(transaction) for transaction in json["data"]["transactions"]]
+
+
+def _entity(key, model):
+    """
+    Creates a product component for factory that creates a single model object
+    from the data under a key of the response
+    :param key: the key of the response data containing the entity
+    :param model: the data class representing the entity
+    :return: function parsing json to a model object
+    """
+
+    def parse_entity(json, **options):
+        return builder(model)(json["data"][key])
+
+    parse_entity.__doc__ = f"Product component for factory that creates a {model.__name__} object"
+    return parse_entity
+
+
+def _entities(key, model):
+    """
+    Creates a product component for factory that creates a list of model objects
+    from the data under a key of the response
+    :param key: the key of the response data containing the list of entities
+    :param model: the data class representing each entity
+    :return: function parsing json to a list of model objects
+    """
+
+    def parse_entities(json, **options):
+        build = builder(model)
+        return [build(entity) for entity in json["data"][key]]
+
+    parse_entities.__doc__ = (
+        f"Product component for factory that creates a list of {model.__name__} objects"
+    )
+    return parse_entities
+
+
+# Registry of the product components for factory keyed by the key of the
+# response data they parse
+_parsers = {
+    "user": _parse_user,
+    "budgets": _parse_budgets,
+    "budget": _parse_budget,
+    "settings": _parse_settings,
+    "transaction": _parse_transaction,
+    "transactions": _parse_transactions,
+    "accounts": _entities("accounts", Account),
+    "account": _entity("account", Account),
+    "category_groups": _entities("category_groups", CategoryGroup),
+    "category": _entity("category", Category),
+    "payees": _entities("payees", Payee),
+    "payee": _entity("payee", Payee),
+    "payee_locations": _entities("payee_locations", PayeeLocation),
+    "payee_location": _entity("payee_location", PayeeLocation),
+    "months": _entities("months", Month),
+    "month": _entity("month", Month),
+    "scheduled_transactions": _entities("scheduled_transactions", ScheduledTransaction),
+    "scheduled_transaction": _entity("scheduled_transaction", ScheduledTransaction),
+}
 
 
 def _handle_error_response(error):
@@ -0,0 +1,121 @@
+from bisect import bisect_left, bisect_right
+
+from pynab.exceptions import PynabNotFoundError
+
+
+def _stamp(entities):
+    return id(entities), getattr(entities, "version", None), len(entities)
+
+
+class Index:
+    """Index of the positions of entities within a list by the value of one of their
+    attributes. The index is built on first use and rebuilt whenever the list it
+    was built from has changed since.
+    """
+
+    def __init__(self, key: str, unique: bool = True):
+        self.key = key
+        self.unique = unique
+        self._stamp = None
+        self._positions = {}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.key}>"
+
+    def positions(self, entities):
+        """Gets the mapping of attribute values to positions for a list of entities,
+        building it if the list has changed since the index was last built
+        """
+        if self._stamp != _stamp(entities):
+            self._build(entities)
+        return self._positions
+
+    def mark_current(self, entities):
+        """Records that the positions held by the index have been kept up to date
+        with changes made to the list, so the index does not need to be rebuilt
+        """
+        self._stamp = _stamp(entities)
+
+    def get(self, entities, value, default=None):
+        """Gets the entity with the given value of the indexed attribute
+
+        :param entities: the list of entities the index covers
+        :param value: the value of the indexed attribute to look up
+        :param default: the value returned when no entity matches
+        :return: the matching entity or the default
+        """
+        position = self.positions(entities).get(value)
+        if position is None:
+            return default
+        if self.unique:
+            return entities[position]
+        return [entities[index] for index in position]
+
+    def _build(self, entities):
+        key = self.key
+        if hasattr(entities, "attribute_values"):
+            # Lazy lists can be indexed without creating each entity
+            values = entities.attribute_values(key)
+        else:
+            values = (getattr(entity, key) for entity in entities)
+        positions = {}
+        if self.unique:
+            for index, value in enumerate(values):
+                positions.setdefault(value, index)
+        else:
+            for index, value in enumerate(values):
+                positions.setdefault(value, []).append(index)
+        self._positions = positions
+        self._stamp = _stamp(entities)
+
+
+class SortedIndex:
+    """Index of the positions of entities within a list ordered by the value of one
+    of their attributes, so that entities with values in a range, such as dates,
+    can be found without scanning the list. Entities without a value are left out.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._stamp = None
+        self._values = []
+        self._positions = []
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.key}>"
+
+    def range(self, entities, low=None, high=None):
+        """Gets the positions of the entities with a value between two bounds
+
+        :param entities: the list of entities the index covers
+        :param low: the lowest value included, or None for no lower bound
+        :param high: the highest value included, or None for no upper bound
+        :return: a list of positions in order of the values
+        """
+        if self._stamp != _stamp(entities):
+            self._build(entities)
+        start = 0 if low is None else bisect_left(self._values, low)
+        end = len(self._values) if high is None else bisect_right(self._values, high)
+        return self._positions[start:end]
+
+    def _build(self, entities):
+        if hasattr(entities, "attribute_values"):
+            values = entities.attribute_values(self.key)
+        else:
+            values = (getattr(entity, self.key) for entity in entities)
+        pairs = sorted(
+            (value, position) for position, value in enumerate(values) if value is not None
+        )
+        self._values = [value for value, _ in pairs]
+        self._positions = [position for _, position in pairs]
+        self._stamp = _stamp(entities)
+
+
+def lookup(index, entities, value, name):
+    """Gets a single entity from an index, raising a not found error naming the
+    type of entity when there is no entity with the given value
+    """
+    entity = index.get(entities, value)
+    if entity is None:
+        raise PynabNotFoundError(f"No {name} found with {index.key} {value}")
+    return entity
@@ -0,0 +1,138 @@
+import re
+import threading
+from dataclasses import dataclass
+
+# Path segments following a collection, such as budget ids and months, which are
+# replaced so that metrics are grouped by endpoint rather than by resource
+_RESOURCE = re.compile(r"(/[^/]+/)[^/]+")
+
+
+def endpoint(path: str):
+    """Gets the endpoint a request path belongs to, replacing resource ids
+
+    :param path: the path of the request relative to the base URL, e.g.
+        /budgets/d1f2/accounts/a3b4/transactions
+    :return: the path with ids replaced, e.g. /budgets/{id}/accounts/{id}/transactions
+    """
+    return _RESOURCE.sub(r"\1{id}", path)
+
+
+@dataclass
+class Event:
+    """Data Class to represent an instrumentation event emitted by the client.
+
+    The name of an event is one of request_start, request_end, retry, decode,
+    build or coalesced, the last emitted when a call shares the result of an
+    identical call already in flight rather than making a request. Durations are
+    in seconds, with request_end covering the HTTP request up to the response
+    being received, which includes reading the whole body unless the response is
+    streamed, decode covering decoding the json of the response and build covering
+    creating models from the json. The size of a response is the number of bytes
+    of its body as sent by the server, so is compressed when the response is, or
+    None when a streamed response does not give its length.
+    """
+
+    name: str
+    endpoint: str
+    method: str = "GET"
+    url: str = None
+    status: int = None
+    duration: float = None
+    size: int = None
+    attempt: int = 0
+    rate_limit_remaining: int = None
+    delay: float = None
+
+
+@dataclass
+class EndpointStats:
+    """Data Class to represent the metrics aggregated for a single endpoint"""
+
+    endpoint: str
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    coalesced: int = 0
+    bytes: int = 0
+    http_time: float = 0.0
+    max_http_time: float = 0.0
+    decode_time: float = 0.0
+    build_time: float = 0.0
+    min_rate_limit_remaining: int = None
+
+    @property
+    def total_time(self):
+        """The total number of seconds spent on requests to the endpoint"""
+        return self.http_time + self.decode_time + self.build_time
+
+    @property
+    def mean_http_time(self):
+        """The mean number of seconds each request took to be answered"""
+        return self.http_time / self.requests if self.requests else 0.0
+
+
+class Stats:
+    """In-process aggregator of instrumentation events, given to a client as a
+    hook to collect metrics for each endpoint, e.g. Pynab(token, hooks=[stats])
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self.endpoints)} endpoints>"
+
+    def __call__(self, event: Event):
+        with self._lock:
+            stats = self.endpoints.get(event.endpoint)
+            if stats is None:
+                stats = self.endpoints[event.endpoint] = EndpointStats(event.endpoint)
+            if event.name == "request_end":
+                stats.requests += 1
+                if event.status is None or event.status >= 400:
+                    stats.errors += 1
+                stats.bytes += event.size or 0
+                stats.http_time += event.duration
+                stats.max_http_time = max(stats.max_http_time, event.duration)
+                remaining = event.rate_limit_remaining
+                if remaining is not None and (
+                    stats.min_rate_limit_remaining is None
+                    or remaining < stats.min_rate_limit_remaining
+                ):
+                    stats.min_rate_limit_remaining = remaining
+            elif event.name == "retry":
+                stats.retries += 1
+            elif event.name == "coalesced":
+                stats.coalesced += 1
+            elif event.name == "decode":
+                stats.decode_time += event.duration
+            elif event.name == "build":
+                stats.build_time += event.duration
+
+    def hot_paths(self, limit: int = None):
+        """Gets the metrics of each endpoint ordered by the total time spent on it
+
+        :param limit: the maximum number of endpoints to return
+        :return: a list of EndpointStats, slowest first
+        """
+        with self._lock:
+            ordered = sorted(self.endpoints.values(), key=lambda stats: -stats.total_time)
+        return ordered[:limit]
+
+    def report(self):
+        """Gets a table of the metrics of each endpoint, slowest first
+
+        :return: the table as a str
+        """
+        lines = [
+            f"{'endpoint':<48} {'requests':>8} {'errors':>6} {'retries':>7} {'shared':>6} "
+            f"{'kB':>10} {'http s':>8} {'decode s':>8} {'build s':>8}"
+        ]
+        for stats in self.hot_paths():
+            lines.append(
+                f"{stats.endpoint:<48} {stats.requests:>8} {stats.errors:>6} "
+                f"{stats.retries:>7} {stats.coalesced:>6} {stats.bytes / 1000:>10.1f} "
+                f"{stats.http_time:>8.3f} {stats.decode_time:>8.3f} {stats.build_time:>8.3f}"
+            )
+        return "\n".join(lines)
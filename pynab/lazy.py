@@ -0,0 +1,127 @@
+from collections.abc import MutableSequence
+from dataclasses import asdict
+from operator import attrgetter
+
+from pynab.builders import builder
+
+
+class LazyEntityList(MutableSequence):
+    """List of entities that keeps the json returned from the YNAB API and only
+    creates the model object for an entity the first time it is accessed. The list
+    keeps a version number which is incremented whenever it is changed so that
+    indexes built over it can tell when they are stale.
+
+    A list that is no longer changed can be read from several threads at once.
+    Each entity is held as either json or a created object, and an object is
+    stored before its json is discarded, so readers check the json first.
+    """
+
+    def __init__(self, model, raw=()):
+        self.model = model
+        self.version = 0
+        self._build = builder(model)
+        self._raw = list(raw)
+        self._items = [None] * len(self._raw)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyEntityList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._materialize(position) for position in range(len(self))[index]]
+        return self._materialize(index)
+
+    def __iter__(self):
+        for position in range(len(self._items)):
+            yield self._materialize(position)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            self._items[index] = value
+            self._raw[index] = [None] * len(value)
+        else:
+            self._items[index] = value
+            self._raw[index] = None
+        self.version += 1
+
+    def __delitem__(self, index):
+        del self._items[index]
+        del self._raw[index]
+        self.version += 1
+
+    def insert(self, index, value):
+        self._items.insert(index, value)
+        self._raw.insert(index, None)
+        self.version += 1
+
+    def sort(self, *, key=None, reverse=False):
+        """Sorts the list in place, creating every entity that has not been created"""
+        self[:] = sorted(self, key=key, reverse=reverse)
+
+    @property
+    def materialized(self):
+        """The number of entities in the list that have been created"""
+        return sum(item is not None for item in self._items)
+
+    def attribute_values(self, key: str):
+        """Generates the value of an attribute of every entity in the list, reading
+        it from the json of entities that have not been created yet
+        """
+        for raw, item in zip(self._raw, self._items):
+            yield raw.get(key) if raw is not None else getattr(item, key)
+
+    def attribute(self, position: int, key: str):
+        """Gets the value of an attribute of a single entity, reading it from the
+        json if the entity has not been created yet rather than creating it
+        """
+        raw = self._raw[position]
+        return raw.get(key) if raw is not None else getattr(self._items[position], key)
+
+    def rows(self, keys):
+        """Generates a tuple of the values of several attributes of every entity in
+        the list, reading them from the json of entities that have not been created
+        yet rather than creating them
+
+        :param keys: the names of two or more attributes
+        """
+        get = attrgetter(*keys)
+        for raw, item in zip(self._raw, self._items):
+            yield tuple(map(raw.get, keys)) if raw is not None else get(item)
+
+    def as_dicts(self):
+        """Generates every entity in the list as a dict, using the json of entities
+        that have not been created yet rather than creating them
+        """
+        for raw, item in zip(self._raw, self._items):
+            yield raw if raw is not None else asdict(item)
+
+    def copy(self):
+        """Creates a new list of the same entities that can be changed without
+        changing this list, sharing the entities and json rather than copying them
+
+        :rtype: pynab.lazy.LazyEntityList
+        """
+        other = LazyEntityList(self.model)
+        other._raw = list(self._raw)
+        other._items = list(self._items)
+        return other
+
+    def _materialize(self, position):
+        item = self._items[position]
+        if item is None:
+            raw = self._raw[position]
+            if raw is None:
+                # Created by another thread since the item was read
+                return self._items[position]
+            item = self._items[position] = self._build(raw)
+            self._raw[position] = None
+        return item
@@ -1,16 +1,59 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 
 import pynab
+import pynab.currency
 import pynab.exceptions
 import pynab.factory
+from pynab.builders import builder
+from pynab.columnar import TransactionTable
+from pynab.index import Index, SortedIndex, lookup
+from pynab.lazy import LazyEntityList
+from pynab.query import TransactionQuery
+from pynab.rollups import Rollups, Totals
 
 
 def get_from_list(list_search, key, value):
     """Return the first element of a list where the key parameter
     of the list equals the value parameter.
     """
-    # TODO: Handle iteration error better
-    return next(element for element in list_search if getattr(element, key) == value)
+    try:
+        return next(element for element in list_search if getattr(element, key) == value)
+    except StopIteration:
+        raise pynab.exceptions.PynabNotFoundError(f"No element found with {key} {value}")
+
+
+def _merge_entities(entities, changes, model, key, index=None):
+    """Upserts changed entities into a list in place, replacing existing entities
+    that share the same key and removing those that have been marked as deleted.
+    When an index over the list is given it is used to find existing entities and
+    kept up to date with the entities added.
+    """
+    build = builder(model)
+    if index is not None:
+        positions = index.positions(entities)
+    else:
+        if hasattr(entities, "attribute_values"):
+            values = entities.attribute_values(key)
+        else:
+            values = (getattr(entity, key) for entity in entities)
+        positions = {value: position for position, value in enumerate(values)}
+    deleted = []
+    for change in changes:
+        entity = change if isinstance(change, model) else build(change)
+        value = getattr(entity, key)
+        if entity.deleted:
+            if value in positions:
+                deleted.append(positions.pop(value))
+        elif value in positions:
+            entities[positions[value]] = entity
+        else:
+            positions[value] = len(entities)
+            entities.append(entity)
+    # Deleted by position, last first, so that the rest of a lazy list is not created
+    for position in sorted(deleted, reverse=True):
+        del entities[position]
+    if not deleted and index is not None:
+        index.mark_current(entities)
 
 
 @dataclass
@@ -80,6 +123,14 @@ class CategoryGroup:
     name: str
     hidden: bool
     deleted: bool
+    categories: list = None
+
+    def __post_init__(self):
+        if self.categories is not None:
+            self.categories = [
+                category if isinstance(category, Category) else builder(Category)(category)
+                for category in self.categories
+            ]
 
 
 @dataclass
@@ -129,6 +180,12 @@ class NewTransaction:
                 "Please provide a valid value for each mandatory field: account_id, date, amount"
             )
 
+    def to_json(self):
+        """Gets the transaction as a dict to be sent to the YNAB API, leaving out
+        fields that have not been set
+        """
+        return {key: value for key, value in self.__dict__.items() if value is not None}
+
 
 @dataclass
 class Transaction:
@@ -156,7 +213,12 @@ class Transaction:
 
     def __post_init__(self):
         if self.subtransactions is not None:
-            self.subtransactions = [Subtransaction(**subtransaction) for subtransaction in self.subtransactions]
+            self.subtransactions = [
+                subtransaction
+                if isinstance(subtransaction, Subtransaction)
+                else builder(Subtransaction)(subtransaction)
+                for subtransaction in self.subtransactions
+            ]
 
 
 @dataclass
@@ -216,11 +278,15 @@ class Month:
     activity: int
     to_be_budgeted: int
     age_of_money: int
-    categories: dict
+    categories: list = None
     deleted: bool = None
 
     def __post_init__(self):
-        self.categories = [Category(**category) for category in self.categories]
+        if self.categories is not None:
+            self.categories = [
+                category if isinstance(category, Category) else builder(Category)(category)
+                for category in self.categories
+            ]
 
 
 @dataclass
@@ -239,6 +305,26 @@ class BudgetSummary:
         self.date_format = self.date_format.get("format")
 
 
+@dataclass
+class ImportResult:
+    """Data Class to represent the outcome of importing transactions in bulk"""
+
+    created: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    server_knowledge: int = None
+
+    @property
+    def complete(self):
+        """Whether every transaction was either created or found to be a duplicate"""
+        return len(self.failed) == 0
+
+    @property
+    def failed_transactions(self):
+        """The NewTransaction objects that failed, to be passed to a new import"""
+        return [new_transaction for new_transaction, _ in self.failed]
+
+
 class BudgetSettings:
     """Class to represent Budget Settings data returned from YNAB API"""
 
@@ -253,40 +339,147 @@ class BudgetSettings:
 class Budget:
     """Class to represent Budget data returned from YNAB API"""
 
-    def __init__(self, requests_session, **data):
+    # Maps each collection of a budget to the model used to represent its entities
+    # and the attribute that uniquely identifies an entity within the collection
+    _collections = {
+        "accounts": (Account, "id"),
+        "payees": (Payee, "id"),
+        "payee_locations": (PayeeLocation, "id"),
+        "category_groups": (CategoryGroup, "id"),
+        "categories": (Category, "id"),
+        "months": (Month, "month"),
+        "transactions": (Transaction, "id"),
+        "subtransactions": (Subtransaction, "id"),
+        "scheduled_transactions": (ScheduledTransaction, "id"),
+        "scheduled_subtransactions": (ScheduledSubtransaction, "id"),
+    }
+
+    def __init__(self, requests_session, server_knowledge=None, models=None, **data):
         self.budget_id = data.get("id")
         self.session = requests_session
+        # The URL of the API further requests are made to, set by the client
+        self.base_url = pynab.Pynab._base_url
+        # The client further requests are made through, set by the client
+        self.client = None
+        self.server_knowledge = server_knowledge
         self.name = data.get("name")
         self.last_modified_on = data.get("last_modified_on")
         self.date_format = data.get("date_format").get("format")
         self.currency_format = CurrencyFormat(**data.get("currency_format"))
-        self.accounts = [Account(**account) for account in data.get("accounts")]
-        self.payees = [Payee(**payee) for payee in data.get("payees")]
-        self.payee_locations = [
-            PayeeLocation(**payee_location)
-            for payee_location in data.get("payee_locations")
-        ]
-        self.category_groups = [
-            CategoryGroup(**category_group)
-            for category_group in data.get("category_groups")
-        ]
-        self.categories = [Category(**category) for category in data.get("categories")]
-        self.months = [Month(**month) for month in data.get("months")]
-        self.transactions = [
-            Transaction(**transaction) for transaction in data.get("transactions")
-        ]
-        self.subtransactions = [
-            Subtransaction(**subtransaction)
-            for subtransaction in data.get("subtransactions")
-        ]
-        self.scheduled_transactions = [
-            ScheduledTransaction(**scheduled_transaction)
-            for scheduled_transaction in data.get("scheduled_transactions")
-        ]
-        self.scheduled_subtransactions = [
-            ScheduledSubtransaction(**scheduled_subtransaction)
-            for scheduled_subtransaction in data.get("scheduled_subtransactions")
-        ]
+        self.models = self.resolve_models(models)
+        # Entities are only created from the json when they are first accessed
+        for collection, model in self.models.items():
+            setattr(self, collection, LazyEntityList(model, data.get(collection)))
+        self._indexes = {}
+        self._rollups = None
+
+    @classmethod
+    def resolve_models(cls, models=None):
+        """Gets the model used for each collection of a budget, where the defaults can
+        be replaced per collection, such as by the compact variants
+
+        :param models: a dict of collection names to the models to use in their place
+        :return: a dict of every collection name to its model
+        """
+        resolved = {collection: model for collection, (model, _) in cls._collections.items()}
+        resolved.update(models or {})
+        return resolved
+
+    def fork(self, collections=()):
+        """Creates a new budget sharing the entities of this one, where only the
+        collections given are copied so that they can be changed without changing
+        this budget. Indexes of the shared collections are shared as well.
+
+        :rtype: pynab.models.Budget
+        :param collections: the names of the collections to be copied
+        :return: the new budget
+        """
+        budget = Budget.__new__(Budget)
+        budget.__dict__.update(self.__dict__)
+        for collection in collections:
+            entities = getattr(self, collection)
+            setattr(budget, collection, entities.copy())
+        budget._indexes = {
+            key: index for key, index in self._indexes.items() if key[0] not in collections
+        }
+        # Rollups are kept up to date in place, so each budget updates its own copy
+        rollups = self._current_rollups()
+        budget._rollups = None if rollups is None else rollups.copy()
+        if rollups is not None:
+            budget._rollups.mark_current(budget)
+        return budget
+
+    def apply_delta(self, server_knowledge, **data):
+        """Merges changes returned by a delta request into this budget in place.
+        Entities present in the delta replace the existing entity with the same
+        id or are added if new, entities marked as deleted are removed and the
+        categories of changed months are merged with the existing month.
+
+        :param server_knowledge: the server knowledge returned with the delta
+        :param data: the budget data returned by the delta request
+        """
+        if data.get("name") is not None:
+            self.name = data.get("name")
+        if data.get("last_modified_on") is not None:
+            self.last_modified_on = data.get("last_modified_on")
+        if data.get("date_format") is not None:
+            self.date_format = data.get("date_format").get("format")
+        if data.get("currency_format") is not None:
+            self.currency_format = CurrencyFormat(**data.get("currency_format"))
+        rollups = self._current_rollups()
+        for collection, (_, key) in self._collections.items():
+            changes = data.get(collection)
+            if changes:
+                entities = getattr(self, collection)
+                if collection == "months":
+                    changes = [self._merge_month(change) for change in changes]
+                _merge_entities(
+                    entities,
+                    changes,
+                    self.models[collection],
+                    key,
+                    self._index(collection, key),
+                )
+        if rollups is not None:
+            rollups.apply_subtransactions(data.get("subtransactions") or [])
+            rollups.apply_transactions(data.get("transactions") or [])
+            rollups.mark_current(self)
+        self.server_knowledge = server_knowledge
+
+    def _merge_month(self, change):
+        """Merges the categories of an existing month into a month returned by a
+        delta request, as a delta only contains the categories that have changed
+        """
+        existing = self._index("months", "month").get(self.months, change.get("month"))
+        if existing is None:
+            return change
+        categories = list(existing.categories or [])
+        _merge_entities(categories, change.get("categories") or [], Category, "id")
+        return {**change, "categories": categories}
+
+    def _index(self, collection: str, key: str, unique: bool = True):
+        """Gets the index of a collection by an attribute, creating it on first use"""
+        index = self._indexes.get((collection, key, unique))
+        if index is None:
+            index = self._indexes[(collection, key, unique)] = Index(key, unique)
+        return index
+
+    def _sorted_index(self, collection: str, key: str):
+        """Gets the index of a collection ordered by an attribute, creating it on first use"""
+        index = self._indexes.get((collection, key, "sorted"))
+        if index is None:
+            index = self._indexes[(collection, key, "sorted")] = SortedIndex(key)
+        return index
+
+    def _lookup(self, collection: str, key: str, value, name: str):
+        """Gets a single entity of a collection by the value of a unique attribute"""
+        return lookup(self._index(collection, key), getattr(self, collection), value, name)
+
+    def _find_all(self, collection: str, key: str, value):
+        """Gets all entities of a collection with the given value of an attribute"""
+        return self._index(collection, key, unique=False).get(
+            getattr(self, collection), value, []
+        )
 
     def account(self, account_id: str):
         """Gets a single account by account id
@@ -295,7 +488,7 @@ class Budget:
         :param account_id: the UUID of the account to be retrieved
         :return: a new account object
         """
-        return get_from_list(self.accounts, "id", account_id)
+        return self._lookup("accounts", "id", account_id, "account")
 
     def category(self, category_id: str):
         """Gets a single category by category id
@@ -304,7 +497,7 @@ class Budget:
         :param category_id: the UUID of the category to be retrieved
         :return: a new category object
         """
-        return get_from_list(self.categories, "id", category_id)
+        return self._lookup("categories", "id", category_id, "category")
 
     def update_category(self, category: str):
         # TODO: finish implementation
@@ -317,7 +510,7 @@ class Budget:
         :param payee_id: the UUID of the payee to be retrieved
         :return: a new payee object
         """
-        return get_from_list(self.payees, "id", payee_id)
+        return self._lookup("payees", "id", payee_id, "payee")
 
     def payee_location(self, payee_location_id: str):
         """Gets a single payee location by payee location id
@@ -326,7 +519,7 @@ class Budget:
         :param payee_location_id: the UUID of the payee location to be retrieved
         :return: a new payee location object
         """
-        return get_from_list(self.payee_locations, "id", payee_location_id)
+        return self._lookup("payee_locations", "id", payee_location_id, "payee location")
 
     def month(self, month: str):
         """Gets a single month by month id
@@ -335,7 +528,7 @@ class Budget:
         :param month: the month to be returned
         :return: a new month object
         """
-        return get_from_list(self.months, "month", month)
+        return self._lookup("months", "month", month, "month")
 
     def transaction(self, transaction_id: str):
         """Gets a single transaction by transaction id
@@ -344,28 +537,170 @@ class Budget:
         :param transaction_id: the UUID of the transaction to be retrieved
         :return: a new transaction object
         """
-        return get_from_list(self.transactions, "id", transaction_id)
+        return self._lookup("transactions", "id", transaction_id, "transaction")
+
+    def account_transactions(self, account_id: str):
+        """Gets all transactions belonging to an account
+
+        :rtype: List[pynab.models.Transaction]
+        :param account_id: the UUID of the account the transactions belong to
+        :return: a list of the transactions in the account
+        """
+        return self._find_all("transactions", "account_id", account_id)
+
+    def category_transactions(self, category_id: str):
+        """Gets all transactions assigned to a category
+
+        :rtype: List[pynab.models.Transaction]
+        :param category_id: the UUID of the category the transactions are assigned to
+        :return: a list of the transactions in the category
+        """
+        return self._find_all("transactions", "category_id", category_id)
+
+    def payee_transactions(self, payee_id: str):
+        """Gets all transactions with a payee
+
+        :rtype: List[pynab.models.Transaction]
+        :param payee_id: the UUID of the payee of the transactions
+        :return: a list of the transactions with the payee
+        """
+        return self._find_all("transactions", "payee_id", payee_id)
+
+    def query(self):
+        """Gets a query over the transactions of the budget, which can be narrowed
+        with filter, ordered with order_by and limited with limit, e.g.
+        budget.query().filter(account_id=account_id, since="2018-11-01").sum()
+
+        :rtype: pynab.query.TransactionQuery
+        :return: a new query matching every transaction
+        """
+        return TransactionQuery(budget=self)
+
+    def transaction_table(self, include_deleted: bool = False):
+        """Gets the transactions of the budget as NumPy columns for fast aggregation.
+        Requires numpy to be installed
+
+        :rtype: pynab.columnar.TransactionTable
+        :param include_deleted: whether deleted transactions should be included
+        :return: a new transaction table
+        """
+        return TransactionTable.from_budget(self, include_deleted)
+
+    @property
+    def formatter(self):
+        """The formatter converting amounts in milliunits to and from the strings
+        shown for the currency format of the budget, a column at a time
+
+        :rtype: pynab.currency.CurrencyFormatter
+        """
+        return pynab.currency.formatter(self.currency_format)
 
     def create_transactions(self, new_transactions):
-        """Creates one or more transactions within a budget
+        """Creates one or more transactions within a budget in a single request and
+        adds them to the budget. Use Pynab.import_transactions for large imports
 
-        :rtype: List[pynab.models.NewTransaction]
-        :param new_transactions: list of dicts representing each transaction
+        :rtype: List[pynab.models.Transaction]
+        :param new_transactions: list of NewTransaction objects to be created
         :return: a list of all transactions created
         """
         if new_transactions is None or len(new_transactions) == 0:
             # TODO: Create proper exception for this
             raise pynab.exceptions.PynabError
+        if self.client is not None:
+            # Made through the client so that it waits for the rate limiter, is
+            # retried and is seen by its hooks
+            transactions = self.client.create_transactions(self.budget_id, new_transactions)
+        elif self.session is not None:
+            path = f"{self.base_url}/budgets/{self.budget_id}/transactions"
+            data = {
+                "transactions": [new_transaction.to_json() for new_transaction in new_transactions]
+            }
+            response = self.session.post(path, json=data)
+            transactions = pynab.factory.parse(response.json())
+        else:
+            raise pynab.exceptions.PynabError("Budget has no session to make requests with")
+        self.add_transactions(transactions)
+        return transactions
+
+    def add_transactions(self, transactions):
+        """Adds transactions created outside of the budget, such as by an import,
+        replacing any existing transactions with the same id
+
+        :param transactions: list of Transaction objects to be added
+        """
+        rollups = self._current_rollups()
+        _merge_entities(
+            self.transactions,
+            transactions,
+            self.models["transactions"],
+            "id",
+            self._index("transactions", "id"),
+        )
+        if rollups is not None:
+            rollups.apply_transactions(transactions)
+            rollups.mark_current(self)
+
+    def _current_rollups(self):
+        """Gets the rollups of the budget if they have been built and are up to date"""
+        if self._rollups is not None and self._rollups.is_current(self):
+            return self._rollups
+        return None
+
+    def _rollup(self):
+        """Gets the rollups of the budget, building them on first use or when the
+        transactions have been changed without keeping the rollups up to date
+        """
+        rollups = self._current_rollups()
+        if rollups is None:
+            rollups = self._rollups = Rollups()
+            rollups.build(self)
+        return rollups
+
+    def account_balance(self, account_id: str, month: str = None):
+        """Gets the balance of the transactions of an account, maintained as
+        transactions are added and synced rather than summed on each call
+
+        :param account_id: the UUID of the account
+        :param month: the month, such as 2018-11-01, to get the balance at the end
+            of, or None for the current balance
+        :return: the balance in milliunits
+        """
+        rollups = self._rollup()
+        if month is None:
+            return rollups.accounts.get(account_id, 0)
+        return rollups.account_balance(account_id, month)
 
-        path = f"{pynab.Pynab._base_url}/budgets/{self.budget_id}/transactions"
-        data = {
-            "transactions": [
-                new_transaction.__dict__ for new_transaction in new_transactions
-            ]
-        }
-        print(data)
-        response = self.session.post(path, json=data)
-        return pynab.factory.PynabFactory.parse(response.json(), self.budget_id)
+    def month_totals(self, month: str):
+        """Gets the inflow, outflow and number of the transactions in a month
+
+        :rtype: pynab.rollups.Totals
+        :param month: the month, such as 2018-11-01
+        :return: the totals of the month
+        """
+        totals = self._rollup().months.get(month)
+        return Totals() if totals is None else replace(totals)
+
+    def category_activity(self, category_id: str, month: str):
+        """Gets the total of the transactions assigned to a category in a month,
+        including the parts of split transactions
+
+        :param category_id: the UUID of the category
+        :param month: the month, such as 2018-11-01
+        :return: the activity in milliunits
+        """
+        return self._rollup().categories.get((category_id, month), 0)
+
+    def category_group_totals(self, category_group_id: str, month: str):
+        """Gets the budgeted, activity and balance of the categories of a group in
+        a month, calculated once per month rather than on each call
+
+        :rtype: pynab.rollups.GroupTotals
+        :param category_group_id: the UUID of the category group
+        :param month: the month, such as 2018-11-01
+        :return: the totals of the group
+        """
+        totals = self._rollup().group_totals(self.month(month), category_group_id)
+        return replace(totals)
 
     def update_transaction(self, transaction):
         # TODO: complete implementation
@@ -378,6 +713,6 @@ class Budget:
         :param scheduled_transaction_id: the UUID of the scheduled transaction to be retrieved
         :return: a new scheduled transaction object
         """
-        return get_from_list(
-            self.scheduled_transactions, "id", scheduled_transaction_id
+        return self._lookup(
+            "scheduled_transactions", "id", scheduled_transaction_id, "scheduled transaction"
         )
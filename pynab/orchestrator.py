@@ -0,0 +1,295 @@
+import hashlib
+import inspect
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from pynab.pynab import Pynab, create_session
+from pynab.ratelimit import RateLimiter
+from pynab.store import BudgetStore
+
+
+@dataclass(frozen=True)
+class SyncTarget:
+    """Data Class to represent a budget to be synced with the access token to sync it with"""
+
+    access_token: str
+    budget_id: str
+
+    def __repr__(self):
+        # The access token is left out so that it does not end up in logs
+        return f"{self.__class__.__name__}(budget_id={self.budget_id!r})"
+
+
+@dataclass
+class SyncResult:
+    """Data Class to represent the outcome of syncing a single budget"""
+
+    target: SyncTarget
+    budget: object = None
+    server_knowledge: int = None
+    delta: bool = False
+    error: Exception = None
+    duration: float = 0.0
+
+    @property
+    def ok(self):
+        """Whether the budget was synced successfully"""
+        return self.error is None
+
+
+@dataclass
+class Progress:
+    """Data Class to represent the progress of a run of an orchestrator"""
+
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+
+    @property
+    def remaining(self):
+        """The number of budgets still to be synced"""
+        return self.total - self.completed - self.failed
+
+
+class SyncOrchestrator:
+    """Syncs many budgets across many access tokens in parallel. Each access token
+    has its own session and rate limiter shared by every budget synced with it,
+    and budgets are synced in order of how long ago they were last synced so the
+    most stale are brought up to date first.
+
+    With threads the synced budgets are kept in memory and later runs request only
+    the changes since the last run. With processes, the work is spread across
+    cores, the rate limit of each token is shared through a state file, and
+    budgets are kept in the BudgetStore at store_path between runs rather than
+    returned.
+    """
+
+    def __init__(
+        self,
+        targets=(),
+        workers: int = None,
+        processes: bool = False,
+        store_path: str = None,
+        state_dir: str = None,
+        limit: int = 200,
+        period: float = 3600.0,
+        **client_options,
+    ):
+        """
+        :param targets: SyncTarget objects or (access_token, budget_id) tuples to sync
+        :param workers: the number of budgets synced at once, by default based on
+            the number of cores
+        :param processes: whether budgets are synced in a process pool rather than threads
+        :param store_path: the path of a BudgetStore budgets are loaded from and saved to
+        :param state_dir: the directory rate limiter state files are kept in when
+            using processes, the temporary directory by default
+        :param limit: the number of requests each access token may make per period
+        :param period: the number of seconds the limit of each token applies to
+        :param client_options: options passed to the Pynab client of each token
+        """
+        self.targets = []
+        self.workers = workers
+        self.processes = processes
+        self.store_path = store_path
+        self.state_dir = tempfile.gettempdir() if state_dir is None else state_dir
+        self.limit = limit
+        self.period = period
+        self.client_options = client_options
+        self.budgets = {}
+        self.last_synced = {}
+        self.progress = Progress()
+        self._sessions = {}
+        self._rate_limiters = {}
+        self._lock = threading.Lock()
+        for target in targets:
+            if not isinstance(target, SyncTarget):
+                target = SyncTarget(*target)
+            self.add_target(target)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self.targets)} budgets>"
+
+    def add(self, access_token: str, budget_id: str):
+        """Adds a budget to be synced with an access token
+
+        :rtype: pynab.orchestrator.SyncTarget
+        :param access_token: the access token used to sync the budget
+        :param budget_id: the UUID of the budget
+        :return: the target added
+        """
+        return self.add_target(SyncTarget(access_token, budget_id))
+
+    def add_target(self, target: SyncTarget):
+        """Adds a target to be synced, unless it has already been added
+
+        :rtype: pynab.orchestrator.SyncTarget
+        :param target: the target to be added
+        :return: the target added
+        """
+        if target not in self.targets:
+            self.targets.append(target)
+        return target
+
+    def schedule(self):
+        """Gets the targets in the order they will be synced, those never synced
+        first followed by the rest from the longest ago synced
+
+        :rtype: List[pynab.orchestrator.SyncTarget]
+        """
+        return sorted(self.targets, key=lambda target: self.last_synced.get(target, 0.0))
+
+    def run(self, callback=None):
+        """Syncs every budget, blocking until all have finished
+
+        :param callback: called with each SyncResult and the Progress as budgets finish
+        :return: a list of SyncResult in the order the budgets finished
+        """
+        return list(self.iter_run(callback))
+
+    def iter_run(self, callback=None):
+        """Syncs every budget, generating each SyncResult as soon as it finishes
+
+        :param callback: called with each SyncResult and the Progress as budgets finish
+        :return: a generator of SyncResult
+        """
+        schedule = self.schedule()
+        self.progress = Progress(total=len(schedule))
+        if self.processes:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+        with executor:
+            futures = {self._submit(executor, target): target for target in schedule}
+            for future in as_completed(futures):
+                result = _result(future, futures[future])
+                with self._lock:
+                    if result.ok:
+                        self.progress.completed += 1
+                        self.last_synced[result.target] = time.time()
+                        if result.budget is not None:
+                            self.budgets[result.target] = result.budget
+                    else:
+                        self.progress.failed += 1
+                if callback is not None:
+                    callback(result, self.progress)
+                yield result
+
+    def _submit(self, executor, target):
+        """Submits the sync of a single budget to a pool"""
+        if not self.processes:
+            return executor.submit(self._sync, target)
+        return executor.submit(
+            _sync_in_process,
+            target,
+            self.store_path,
+            self._state_path(target.access_token),
+            self.limit,
+            self.period,
+            self.client_options,
+        )
+
+    def _sync(self, target):
+        """Syncs a single budget in a worker thread"""
+        session, rate_limiter = self._token_state(target.access_token)
+        budget = self.budgets.get(target)
+        store = None if self.store_path is None else BudgetStore(self.store_path)
+        client = Pynab(
+            target.access_token,
+            store=store,
+            rate_limiter=rate_limiter,
+            session=session,
+            **self.client_options,
+        )
+        try:
+            return _sync_budget(client, target, budget)
+        finally:
+            if store is not None:
+                store.close()
+
+    def _token_state(self, access_token):
+        """Gets the session and rate limiter of an access token, creating them on first use"""
+        with self._lock:
+            if access_token not in self._sessions:
+                self._sessions[access_token] = create_session(
+                    access_token, **self._session_options()
+                )
+                self._rate_limiters[access_token] = RateLimiter(self.limit, self.period)
+            return self._sessions[access_token], self._rate_limiters[access_token]
+
+    def _session_options(self):
+        """Gets the options of the client options that are passed to create_session"""
+        parameters = inspect.signature(create_session).parameters
+        return {
+            name: value
+            for name, value in self.client_options.items()
+            if name in parameters and name != "access_token"
+        }
+
+    def _state_path(self, access_token):
+        """Gets the path of the rate limiter state file shared by the processes using
+        an access token, named by a hash so that the token is not written to disk
+        """
+        digest = hashlib.sha256(access_token.encode()).hexdigest()[:16]
+        return os.path.join(self.state_dir, f"pynab-rate-limit-{digest}.json")
+
+
+def _sync_budget(client, target, budget=None):
+    """Syncs a budget with a client, requesting only changes when the budget has
+    already been synced, and reports the outcome rather than raising
+    """
+    start = time.perf_counter()
+    try:
+        if budget is None or budget.server_knowledge is None:
+            has_saved = (
+                client.store is not None
+                and client.store.server_knowledge(target.budget_id) is not None
+            )
+            budget = client.budget(target.budget_id)
+            delta = has_saved
+        else:
+            budget = client.sync_budget(budget)
+            delta = True
+    except Exception as error:
+        # Any failure is reported for this budget alone so the rest of the run goes on
+        return SyncResult(target, error=error, duration=time.perf_counter() - start)
+    return SyncResult(
+        target,
+        budget=budget,
+        server_knowledge=budget.server_knowledge,
+        delta=delta,
+        duration=time.perf_counter() - start,
+    )
+
+
+def _result(future, target):
+    """Gets the result of the sync of a budget, reporting an error raised outside
+    of the sync itself, such as by creating the client, as a failed result
+    """
+    try:
+        return future.result()
+    except Exception as error:
+        return SyncResult(target, error=error)
+
+
+def _sync_in_process(target, store_path, state_path, limit, period, client_options):
+    """Syncs a single budget in a worker process, returning the result without the
+    budget, which is kept in the store rather than sent back to the parent process
+    """
+    store = None if store_path is None else BudgetStore(store_path)
+    client = Pynab(
+        target.access_token,
+        store=store,
+        rate_limiter=RateLimiter(limit, period, path=state_path),
+        **client_options,
+    )
+    try:
+        result = _sync_budget(client, target)
+    finally:
+        if store is not None:
+            store.close()
+    result.budget = None
+    return result
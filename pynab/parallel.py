@@ -0,0 +1,149 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from pynab.factory import parse
+from pynab.models import Budget
+
+# Collections of a budget large enough to be worth decoding in parallel
+_SPLIT = ("transactions", "subtransactions")
+
+# Marks the start of an object following another in an array. The same characters
+# can also end a string, such as a memo ending in },{ followed by its closing
+# quote, so every part is checked to start and end where an object does, and the
+# response is decoded at once whenever one does not
+_BOUNDARY = '},{"'
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+_OK, _ENDED, _OVERRUN = "ok", "ended", "overrun"
+
+
+def _decode_elements(chunk: str, final: bool):
+    """Decodes the objects of part of a json array, starting at an object and
+    ending just before the start of the object after the last one in the chunk
+
+    :param chunk: the part of the array
+    :param final: whether the chunk is the last part of the array, so decoding
+        continues until the end of the array
+    :return: a tuple of the objects decoded, the position after the last one, and
+        whether the chunk ended cleanly, at the end of the array or overran
+    """
+    decoder = json.JSONDecoder()
+    elements = []
+    position = 0
+    while True:
+        try:
+            element, position = decoder.raw_decode(chunk, position)
+        except ValueError:
+            return elements, position, _OVERRUN
+        elements.append(element)
+        position = _WHITESPACE.match(chunk, position).end()
+        if position >= len(chunk):
+            return elements, position, _OVERRUN
+        if chunk[position] == "]":
+            return elements, position, _ENDED
+        if chunk[position] != ",":
+            return elements, position, _OVERRUN
+        position = _WHITESPACE.match(chunk, position + 1).end()
+        if position == len(chunk) and not final:
+            return elements, position, _OK
+
+
+def _split(text, start, end, parts):
+    """Gets the positions of the objects to start decoding from in each part of an
+    array, spread evenly between its start and a position it ends before
+    """
+    starts = [start]
+    step = (end - start) // parts
+    for part in range(1, parts):
+        boundary = text.find(_BOUNDARY, start + part * step, end)
+        if boundary == -1:
+            break
+        if boundary + 2 > starts[-1]:
+            starts.append(boundary + 2)
+    return starts
+
+
+def _array_limit(text, start):
+    """Gets a position a collection array starting at a position must end before,
+    which is the next member of the budget holding another collection
+    """
+    positions = [text.find(f'"{collection}":', start) for collection in Budget._collections]
+    return min((position for position in positions if position != -1), default=len(text))
+
+
+def _decode_array(executor, text, start, parts):
+    """Decodes the objects of an array in parallel, returning them along with the
+    position of the end of the array, or None if the array could not be split
+    """
+    limit = _array_limit(text, start)
+    starts = _split(text, start, limit, parts)
+    ends = starts[1:] + [limit]
+    futures = [
+        executor.submit(_decode_elements, text[begin:end], end == limit)
+        for begin, end in zip(starts, ends)
+    ]
+    elements = []
+    for begin, future in zip(starts, futures):
+        decoded, position, status = future.result()
+        elements.extend(decoded)
+        if status == _ENDED:
+            return elements, begin + position
+        if status == _OVERRUN:
+            # The part did not end at an object of this array
+            return None
+    return None
+
+
+def parse_budget_parallel(
+    text: str, workers: int = None, session=None, models=None, threshold: int = 4000000
+):
+    """Creates a Budget from the text of a budget response, decoding the largest
+    collections in a process pool. Each worker is sent only its part of the text
+    and returns the json of its entities, which are kept in lazy lists so that
+    models are created on first access. Falls back to decoding the whole response
+    at once when it is smaller than the threshold or cannot be split. Only worth
+    using with several cores, as the entities decoded by workers are copied back.
+
+    :rtype: pynab.models.Budget
+    :param text: the body of the budget response
+    :param workers: the number of processes, by default the number of cores
+    :param session: the requests session the budget should use for further requests
+    :param models: models to use in place of the defaults for collections of the budget
+    :param threshold: the size in characters of responses below which they are
+        decoded in a single process
+    :return: the parsed budget
+    """
+    if len(text) < threshold:
+        return parse(json.loads(text), session=session, models=models)
+    collections = {}
+    spans = []
+    parts = max(2, workers or os.cpu_count() or 2)
+    with ProcessPoolExecutor(max_workers=parts) as executor:
+        for collection in _SPLIT:
+            key = f'"{collection}":'
+            start = text.find(key)
+            if start == -1:
+                continue
+            start = _WHITESPACE.match(text, start + len(key)).end()
+            if text.startswith("[]", start) or not text.startswith("[", start):
+                continue
+            element = _WHITESPACE.match(text, start + 1).end()
+            decoded = _decode_array(executor, text, element, parts)
+            if decoded is None:
+                return parse(json.loads(text), session=session, models=models)
+            collections[collection], end = decoded
+            spans.append((start, end + 1))
+    # The rest of the response is decoded with the arrays replaced by empty arrays
+    pieces = []
+    position = 0
+    for start, end in sorted(spans):
+        pieces.append(text[position:start])
+        pieces.append("[]")
+        position = end
+    pieces.append(text[position:])
+    response = json.loads("".join(pieces))
+    if "budget" in response.get("data", {}):
+        response["data"]["budget"].update(collections)
+    return parse(response, session=session, models=models)
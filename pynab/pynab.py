@@ -1,22 +1,294 @@
+import itertools
+import logging
+import time
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
-from pynab.factory import parse
-from pynab.exceptions import PynabAuthenticationError, PynabConnectionError
+from pynab.builders import builder
+from pynab.coalesce import SingleFlight
+from pynab.factory import parse, merge
+from pynab.models import Budget, ImportResult
+from pynab.query import TransactionQuery
+from pynab.exceptions import PynabAuthenticationError, PynabConnectionError, PynabError
+from pynab.instrumentation import Event, endpoint
+from pynab.parallel import parse_budget_parallel
+from pynab.ratelimit import RETRY_STATUSES, backoff, parse_rate_limit
+from pynab.streaming import decode_chunks, iter_budget, iter_transactions, parse_budget_stream
+from pynab.windows import TransactionWindows
+
+logger = logging.getLogger(__name__)
+
+
+def create_session(
+    access_token: str,
+    pool_connections: int = 10,
+    pool_maxsize: int = 10,
+    keep_alive: bool = True,
+    compress: bool = True,
+):
+    """Creates a requests session authenticated with an access token
 
-requests_session = requests.Session()
+    :rtype: requests.Session
+    :param access_token: the access token sent with each request
+    :param pool_connections: the number of hosts to keep connection pools for
+    :param pool_maxsize: the maximum number of connections kept open to each host
+    :param keep_alive: whether connections should be kept open between requests
+    :param compress: whether responses should be requested with gzip compression
+    :return: a new session
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {
+            "Authorization": f"Bearer {access_token}",
+            "Accept-Encoding": "gzip, deflate" if compress else "identity",
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+    )
+    return session
 
 
 class Pynab:
     _base_url = "https://api.youneedabudget.com/v1"
 
-    def __init__(self, access_token: str):
+    def __init__(
+        self,
+        access_token: str,
+        store=None,
+        models=None,
+        rate_limiter=None,
+        max_retries=0,
+        session=None,
+        timeout=None,
+        base_url=None,
+        cache=None,
+        hooks=None,
+        coalesce: bool = False,
+        **session_options,
+    ):
+        """
+        :param access_token: the access token used to authenticate with the YNAB API
+        :param store: a BudgetStore used to persist budgets between runs
+        :param models: models to use in place of the defaults for collections of budgets
+        :param rate_limiter: a RateLimiter that requests wait for before being sent
+        :param max_retries: the number of times rate limited and server error responses are retried
+        :param session: a requests session to use in place of one created for the client
+        :param timeout: the number of seconds to wait for a response, or None to wait forever
+        :param base_url: the URL of the API to use in place of the YNAB API
+        :param cache: a ResponseCache that responses to GET requests are reused from
+        :param hooks: callables given an instrumentation Event for each step of a
+            request, such as a pynab.instrumentation.Stats
+        :param coalesce: whether identical requests made at the same time by many
+            threads share a single request. The objects parsed from the response
+            are shared by those calls and should not be changed, except for
+            budgets, of which each call gets its own fork
+        :param session_options: options passed to create_session when creating the session
+        """
         if access_token is None or len(access_token) == 0:
             raise PynabAuthenticationError("No access token specified")
-        requests_session.headers.update({"Authorization": f"Bearer {access_token}"})
+        self.store = store
+        self.models = models
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.cache = cache
+        self.hooks = list(hooks or [])
+        self.single_flight = SingleFlight() if coalesce else None
+        if base_url is not None:
+            self._base_url = base_url
+        if session is None:
+            session = create_session(access_token, **session_options)
+        self.session = session
 
     def __repr__(self):
         return f"<Pynab Client>"
 
+    def _send(self, path, params=None, stream=False, method="GET", json=None, headers=None):
+        """Makes a request to the YNAB API, waiting for the rate limiter to allow it
+        and retrying rate limited and server error responses up to max_retries
+        times with a jittered exponential backoff. Requests other than GET are
+        only retried when rate limited, as the server will not have acted on them
+
+        :rtype: requests.Response
+        :param path: the URL to request
+        :param params: query parameters to send with the request
+        :param stream: whether the body should be left to be streamed by the caller
+        :param method: the HTTP method of the request
+        :param json: data to send as the json body of the request
+        :param headers: headers to send in addition to those of the session
+        :return: the response
+        """
+        retry_statuses = RETRY_STATUSES if method == "GET" else {429}
+        name = endpoint(path[len(self._base_url) :]) if self.hooks else None
+        for attempt in itertools.count():
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            if self.hooks:
+                self._emit("request_start", name, method=method, url=path, attempt=attempt)
+                start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method,
+                    path,
+                    params=params,
+                    json=json,
+                    headers=headers,
+                    timeout=self.timeout,
+                    stream=stream,
+                )
+            except requests.exceptions.RequestException as error:
+                # Every request that fails without a response is counted as an error
+                if self.hooks:
+                    duration = time.perf_counter() - start
+                    self._emit("request_end", name, method=method, url=path, duration=duration)
+                if isinstance(error, requests.exceptions.ConnectionError):
+                    raise PynabConnectionError
+                raise
+            if self.hooks:
+                duration = time.perf_counter() - start
+                self._emit_response(name, method, path, response, duration, stream)
+            if self.rate_limiter is not None:
+                if response.status_code == 429:
+                    self.rate_limiter.exhaust()
+                else:
+                    self.rate_limiter.update(response.headers.get("X-Rate-Limit"))
+            if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                return response
+            response.close()
+            delay = backoff(attempt, retry_after=response.headers.get("Retry-After"))
+            if self.hooks:
+                self._emit(
+                    "retry",
+                    name,
+                    method=method,
+                    url=path,
+                    status=response.status_code,
+                    attempt=attempt,
+                    delay=delay,
+                )
+            time.sleep(delay)
+
+    def _get(self, path, params=None):
+        """Makes a GET request to the YNAB API and decodes the response, reusing a
+        cached response when the client has a cache
+
+        :param path: the URL to request
+        :param params: query parameters to send with the request
+        :return: the json of the response as a dict
+        """
+        if self.cache is None:
+            return self._decode(self._send(path, params=params), path)
+        on_decode = None
+        if self.hooks:
+            name = endpoint(path[len(self._base_url) :])
+
+            def on_decode(duration):
+                self._emit("decode", name, duration=duration)
+
+        return self.cache.fetch(
+            path[len(self._base_url) :],
+            path,
+            params,
+            lambda headers: self._send(path, params=params, headers=headers),
+            on_decode,
+        )
+
+    def _decode(self, response, path):
+        """Decodes the json of a response, emitting its duration to the hooks"""
+        if not self.hooks:
+            return response.json()
+        start = time.perf_counter()
+        json = response.json()
+        name = endpoint(path[len(self._base_url) :])
+        self._emit("decode", name, duration=time.perf_counter() - start)
+        return json
+
+    def _fetch(self, path, params=None, **options):
+        """Makes a GET request to the YNAB API and parses the response to models
+
+        :param path: the URL to request
+        :param params: query parameters to send with the request
+        :param options: options passed on to the factory creating the models
+        :return: Object created by parsing the response
+        """
+        if self.single_flight is None:
+            return self._fetch_once(path, params, **options)
+        # Options such as models are compared by identity, as they may not be hashable
+        key = (
+            path,
+            tuple(sorted((params or {}).items())),
+            tuple((name, id(value)) for name, value in sorted(options.items())),
+        )
+        result, shared = self.single_flight.do(
+            key, lambda: self._fetch_once(path, params, **options)
+        )
+        if shared and self.hooks:
+            self._emit("coalesced", endpoint(path[len(self._base_url) :]))
+        return result
+
+    def _fetch_once(self, path, params=None, **options):
+        """Makes a GET request and parses the response, without coalescing"""
+        json = self._get(path, params=params)
+        if not self.hooks:
+            return parse(json, **options)
+        start = time.perf_counter()
+        result = parse(json, **options)
+        name = endpoint(path[len(self._base_url) :])
+        self._emit("build", name, duration=time.perf_counter() - start)
+        return result
+
+    def _emit(self, name, endpoint, **fields):
+        """Gives an instrumentation event to each of the hooks. An exception raised
+        by a hook is logged rather than failing the request
+        """
+        event = Event(name, endpoint, **fields)
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception:
+                logger.exception("Instrumentation hook %r failed", hook)
+
+    def _emit_response(self, name, method, path, response, duration, stream):
+        """Gives the hooks the event for a response that has been received"""
+        if "Content-Length" in response.headers:
+            size = int(response.headers["Content-Length"])
+        elif not stream and hasattr(response.raw, "tell"):
+            # The body has been read, so this is the number of bytes sent, before
+            # any decompression, as given by Content-Length
+            size = response.raw.tell()
+        else:
+            size = None
+        rate_limit = parse_rate_limit(response.headers.get("X-Rate-Limit"))
+        self._emit(
+            "request_end",
+            name,
+            method=method,
+            url=path,
+            status=response.status_code,
+            duration=duration,
+            size=size,
+            rate_limit_remaining=None if rate_limit is None else rate_limit[1] - rate_limit[0],
+        )
+
+    def _stream(self, path, params=None, chunk_size=65536):
+        """Makes a GET request to the YNAB API without reading the body up front
+
+        :param path: the URL to request
+        :param params: query parameters to send with the request
+        :param chunk_size: the number of bytes read from the response at a time
+        :return: a generator of text chunks of the response body
+        """
+        response = self._send(path, params=params, stream=True)
+        with response:
+            chunks = response.iter_content(chunk_size=chunk_size)
+            yield from decode_chunks(chunks, response.encoding or "utf-8")
+
     @property
     def user(self):
         """Gets information about the currently authenticated user
@@ -24,12 +296,7 @@ class Pynab:
         :rtype: pynab.models.User
         :return: a user object of the currently authenticated user
         """
-        path = f"{self._base_url}/user"
-        try:
-            response = requests_session.get(path)
-        except requests.exceptions.ConnectionError:
-            raise PynabConnectionError
-        return parse(response.json())
+        return self._fetch(f"{self._base_url}/user")
 
     def budgets_list(self):
         """Gets a list containing a limited subset of information from each budget.
@@ -38,20 +305,97 @@ class Pynab:
         :rtype: List[pynab.models.BudgetSummary]
         :return: a list containing summary information of each budget
         """
-        path = f"{self._base_url}/budgets"
-        response = requests_session.get(path)
-        return parse(response.json())
+        return self._fetch(f"{self._base_url}/budgets")
 
-    def budget(self, budget_id):
-        """Gets a single budget by id
+    def budget(self, budget_id, stream=False, workers: int = None):
+        """Gets a single budget by id. When the client has a store the budget is
+        loaded from it and only changes since it was saved are requested
 
         :rtype: pynab.models.Budget
         :param budget_id: the UUID of the budget that should be returned
+        :param stream: whether the budget should be parsed incrementally as the
+            response arrives, keeping peak memory low for large budgets
+        :param workers: the number of processes the transactions of a large budget
+            are decoded with, or None to decode the response in this process
         :return: a new budget object
         """
+        if self.single_flight is None:
+            return self._load_budget(budget_id, stream, workers)
+        budget, shared = self.single_flight.do(
+            ("budget", budget_id, stream, workers),
+            lambda: self._load_budget(budget_id, stream, workers),
+        )
+        if shared and self.hooks:
+            self._emit("coalesced", "/budgets/{id}")
+        # The budget loaded is shared by every coalesced call, so each gets a fork of
+        # its own that can be changed or synced without changing the others
+        return budget.fork(list(Budget._collections))
+
+    def _load_budget(self, budget_id, stream=False, workers=None):
+        """Loads a budget from the store and syncs it, or requests the full budget
+        and saves it to the store
+        """
+        if self.store is not None:
+            budget = self.store.load(budget_id, self.session, self.models)
+            if budget is not None:
+                budget.base_url = self._base_url
+                budget.client = self
+                return self.sync_budget(budget)
+
         path = f"{self._base_url}/budgets/{budget_id}"
-        response = requests_session.get(path)
-        return parse(response.json())
+        if stream:
+            chunks = self._stream(path)
+            budget = parse_budget_stream(chunks, session=self.session, models=self.models)
+        elif workers is not None:
+            text = self._send(path).text
+            budget = parse_budget_parallel(
+                text, workers, session=self.session, models=self.models
+            )
+        else:
+            budget = self._fetch(path, session=self.session, models=self.models)
+        budget.base_url = self._base_url
+        budget.client = self
+        if self.store is not None:
+            self.store.save(budget)
+        return budget
+
+    def iter_budget(self, budget_id):
+        """Streams the entities of a single budget by id, creating each one as it
+        arrives without keeping the budget in memory
+
+        :param budget_id: the UUID of the budget that should be streamed
+        :return: a generator of (collection, entity) tuples, such as
+            ("transactions", pynab.models.Transaction), along with
+            ("server_knowledge", int) and a tuple for each field of the budget
+        """
+        builders = {
+            name: builder(model) for name, model in Budget.resolve_models(self.models).items()
+        }
+        for name, value in iter_budget(self._stream(f"{self._base_url}/budgets/{budget_id}")):
+            if name in builders:
+                value = builders[name](value)
+            yield name, value
+
+    def sync_budget(self, budget, copy_on_write=False):
+        """Brings a budget up to date by requesting only the changes made since its
+        server knowledge and merging them into the budget in place
+
+        :rtype: pynab.models.Budget
+        :param budget: a budget previously returned by the budget method
+        :param copy_on_write: whether the changes are merged into a new budget that
+            shares the collections without changes, leaving the budget given unchanged
+        :return: the budget with the latest changes applied, which is the same
+            object unless copy_on_write is set
+        """
+        if budget.server_knowledge is None:
+            raise PynabError("Budget has no server knowledge to request changes from")
+        path = f"{self._base_url}/budgets/{budget.budget_id}"
+        params = {"last_knowledge_of_server": budget.server_knowledge}
+        json = self._get(path, params=params)
+        budget = merge(json, budget, copy_on_write)
+        if self.store is not None:
+            self.store.save_delta(budget, json["data"]["budget"])
+        return budget
 
     def budget_settings(self, budget_id):
         """Gets the settings for a single budget by id
@@ -60,6 +404,290 @@ class Pynab:
         :param budget_id: the UUID of the budget that contains the settings to be retrieved
         :return: a new budget settings object
         """
-        path = f"{self._base_url}/budgets/{budget_id}/settings"
-        response = requests_session.get(path)
-        return parse(response.json())
+        return self._fetch(f"{self._base_url}/budgets/{budget_id}/settings")
+
+    def accounts(self, budget_id):
+        """Gets the accounts of a single budget without downloading the whole budget
+
+        :rtype: List[pynab.models.Account]
+        :param budget_id: the UUID of the budget that contains the accounts
+        :return: a list of account objects
+        """
+        return self._fetch(f"{self._base_url}/budgets/{budget_id}/accounts")
+
+    def account(self, budget_id, account_id):
+        """Gets a single account by id
+
+        :rtype: pynab.models.Account
+        :param budget_id: the UUID of the budget that contains the account
+        :param account_id: the UUID of the account that should be returned
+        :return: a new account object
+        """
+        return self._fetch(f"{self._base_url}/budgets/{budget_id}/accounts/{account_id}")
+
+    def categories(self, budget_id):
+        """Gets the category groups of a single budget along with their categories
+
+        :rtype: List[pynab.models.CategoryGroup]
+        :param budget_id: the UUID of the budget that contains the categories
+        :return: a list of category group objects each with a list of categories
+        """
+        return self._fetch(f"{self._base_url}/budgets/{budget_id}/categories")
+
+    def category(self, budget_id, category_id, month=None):
+        """Gets a single category by id, for the current month or a given month
+
+        :rtype: pynab.models.Category
+        :param budget_id: the UUID of the budget that contains the category
+        :param category_id: the UUID of the category that should be returned
+        :param month: the month in ISO format, e.g. 2018-11-01, or current for the
+            current month, whose budgeted, activity and balance are returned
+        :return: a new category object
+        """
+        if month is None:
+            path = f"{self._base_url}/budgets/{budget_id}/categories/{category_id}"
+        else:
+            path = f"{self._base_url}/budgets/{budget_id}/months/{month}/categories/{category_id}"
+        return self._fetch(path)
+
+    def payees(self, budget_id):
+        """Gets the payees of a single budget
+
+        :rtype: List[pynab.models.Payee]
+        :param budget_id: the UUID of the budget that contains the payees
+        :return: a list of payee objects
+        """
+        return self._fetch(f"{self._base_url}/budgets/{budget_id}/payees")
+
+    def payee(self, budget_id, payee_id):
+        """Gets a single payee by id
+
+        :rtype: pynab.models.Payee
+        :param budget_id: the UUID of the budget that contains the payee
+        :param payee_id: the UUID of the payee that should be returned
+        :return: a new payee object
+        """
+        return self._fetch(f"{self._base_url}/budgets/{budget_id}/payees/{payee_id}")
+
+    def months(self, budget_id):
+        """Gets a summary of each month of a single budget, without the categories
+
+        :rtype: List[pynab.models.Month]
+        :param budget_id: the UUID of the budget that contains the months
+        :return: a list of month objects
+        """
+        return self._fetch(f"{self._base_url}/budgets/{budget_id}/months")
+
+    def month(self, budget_id, month="current"):
+        """Gets a single month along with the budgeted amounts of its categories
+
+        :rtype: pynab.models.Month
+        :param budget_id: the UUID of the budget that contains the month
+        :param month: the month in ISO format, e.g. 2018-11-01, or current
+        :return: a new month object
+        """
+        return self._fetch(f"{self._base_url}/budgets/{budget_id}/months/{month}")
+
+    def transactions(self, budget_id, since_date=None, type=None):
+        """Gets the transactions of a single budget
+
+        :rtype: List[pynab.models.Transaction]
+        :param budget_id: the UUID of the budget that contains the transactions
+        :param since_date: only transactions on or after this date are returned
+        :param type: only uncategorized or unapproved transactions are returned
+        :return: a list of transaction objects
+        """
+        path = f"{self._base_url}/budgets/{budget_id}/transactions"
+        return self._fetch(path, params=_transaction_params(since_date, type))
+
+    def iter_transactions(
+        self, budget_id, since_date=None, months: int = 1, type=None, prefetch: bool = True
+    ):
+        """Iterates over the transactions of a single budget a window of months at a
+        time, requesting the next window while the current one is processed, e.g.
+        for transaction in client.iter_transactions(budget_id, since_date="2018-01-01")
+
+        :rtype: pynab.windows.TransactionWindows
+        :param budget_id: the UUID of the budget that contains the transactions
+        :param since_date: the date to start from, such as the checkpoint of an
+            earlier iteration, by default the earliest transaction
+        :param months: the number of months in each window
+        :param type: only uncategorized or unapproved transactions are returned
+        :param prefetch: whether the next window is requested in the background
+        :return: an iterable of transaction objects
+        """
+        return TransactionWindows(self, budget_id, since_date, months, type, prefetch)
+
+    def _stream_transactions(self, budget_id, since_date=None, type=None):
+        """Streams the json of the transactions of a budget as they arrive"""
+        path = f"{self._base_url}/budgets/{budget_id}/transactions"
+        chunks = self._stream(path, params=_transaction_params(since_date, type))
+        with closing(chunks):
+            yield from iter_transactions(chunks)
+
+    def account_transactions(self, budget_id, account_id, since_date=None, type=None):
+        """Gets the transactions of a single account
+
+        :rtype: List[pynab.models.Transaction]
+        :param budget_id: the UUID of the budget that contains the account
+        :param account_id: the UUID of the account the transactions belong to
+        :param since_date: only transactions on or after this date are returned
+        :param type: only uncategorized or unapproved transactions are returned
+        :return: a list of transaction objects
+        """
+        path = f"{self._base_url}/budgets/{budget_id}/accounts/{account_id}/transactions"
+        return self._fetch(path, params=_transaction_params(since_date, type))
+
+    def category_transactions(self, budget_id, category_id, since_date=None, type=None):
+        """Gets the transactions of a single category, including subtransactions
+        of split transactions assigned to it
+
+        :rtype: List[pynab.models.Transaction]
+        :param budget_id: the UUID of the budget that contains the category
+        :param category_id: the UUID of the category the transactions belong to
+        :param since_date: only transactions on or after this date are returned
+        :param type: only uncategorized or unapproved transactions are returned
+        :return: a list of transaction objects
+        """
+        path = f"{self._base_url}/budgets/{budget_id}/categories/{category_id}/transactions"
+        return self._fetch(path, params=_transaction_params(since_date, type))
+
+    def payee_transactions(self, budget_id, payee_id, since_date=None, type=None):
+        """Gets the transactions of a single payee, including subtransactions of
+        split transactions assigned to it
+
+        :rtype: List[pynab.models.Transaction]
+        :param budget_id: the UUID of the budget that contains the payee
+        :param payee_id: the UUID of the payee the transactions belong to
+        :param since_date: only transactions on or after this date are returned
+        :param type: only uncategorized or unapproved transactions are returned
+        :return: a list of transaction objects
+        """
+        path = f"{self._base_url}/budgets/{budget_id}/payees/{payee_id}/transactions"
+        return self._fetch(path, params=_transaction_params(since_date, type))
+
+    def query(self, budget_id):
+        """Gets a query over the transactions of a budget that requests only the
+        transactions it needs, without downloading the budget. The account,
+        category or payee and start date filtered on are sent to the YNAB API
+
+        :rtype: pynab.query.TransactionQuery
+        :param budget_id: the UUID of the budget that contains the transactions
+        :return: a new query matching every transaction of the budget
+        """
+        return TransactionQuery(client=self, budget_id=budget_id)
+
+    def scheduled_transactions(self, budget_id):
+        """Gets the scheduled transactions of a single budget
+
+        :rtype: List[pynab.models.ScheduledTransaction]
+        :param budget_id: the UUID of the budget that contains the scheduled transactions
+        :return: a list of scheduled transaction objects
+        """
+        return self._fetch(f"{self._base_url}/budgets/{budget_id}/scheduled_transactions")
+
+    def scheduled_transaction(self, budget_id, scheduled_transaction_id):
+        """Gets a single scheduled transaction by id
+
+        :rtype: pynab.models.ScheduledTransaction
+        :param budget_id: the UUID of the budget that contains the scheduled transaction
+        :param scheduled_transaction_id: the UUID of the scheduled transaction
+        :return: a new scheduled transaction object
+        """
+        path = (
+            f"{self._base_url}/budgets/{budget_id}/scheduled_transactions/"
+            f"{scheduled_transaction_id}"
+        )
+        return self._fetch(path)
+
+    def create_transactions(self, budget_id, new_transactions):
+        """Creates one or more transactions within a budget in a single request
+
+        :rtype: List[pynab.models.Transaction]
+        :param budget_id: the UUID of the budget the transactions are created in
+        :param new_transactions: list of NewTransaction objects to be created
+        :return: a list of all transactions created
+        """
+        path = f"{self._base_url}/budgets/{budget_id}/transactions"
+        data = {"transactions": [row.to_json() for row in new_transactions]}
+        json = self._decode(self._send(path, method="POST", json=data), path)
+        self._invalidate_budget(budget_id)
+        return parse(json)
+
+    def import_transactions(self, budget_id, new_transactions, chunk_size=100, workers=1):
+        """Creates a large number of transactions in a budget, submitting them in
+        chunks, optionally in parallel, under the client's rate limiter. Rows are
+        deduplicated by import id before sending, and YNAB rejects rows whose import
+        id already exists, so an import that partly failed can safely be resumed by
+        importing the failed transactions again
+
+        :rtype: pynab.models.ImportResult
+        :param budget_id: the UUID of the budget the transactions are created in
+        :param new_transactions: list of NewTransaction objects to be created
+        :param chunk_size: the maximum number of transactions sent in each request
+        :param workers: the number of requests that may be in flight at once
+        :return: the transactions created, rows skipped as duplicates and rows that
+            failed along with the error raised
+        """
+        result = ImportResult()
+        unique = []
+        import_ids = set()
+        for new_transaction in new_transactions:
+            if new_transaction.import_id is None:
+                unique.append(new_transaction)
+            elif new_transaction.import_id in import_ids:
+                result.duplicates.append(new_transaction)
+            else:
+                import_ids.add(new_transaction.import_id)
+                unique.append(new_transaction)
+
+        path = f"{self._base_url}/budgets/{budget_id}/transactions"
+        chunks = [unique[start : start + chunk_size] for start in range(0, len(unique), chunk_size)]
+
+        def submit(chunk):
+            data = {"transactions": [row.to_json() for row in chunk]}
+            try:
+                json = self._decode(self._send(path, method="POST", json=data), path)
+                return chunk, json, parse(json), None
+            except Exception as error:
+                # Any failure is recorded for this chunk alone so the results of
+                # the chunks already created are kept
+                return chunk, None, None, error
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for chunk, json, created, error in executor.map(submit, chunks):
+                if error is not None:
+                    result.failed.extend((row, error) for row in chunk)
+                    continue
+                result.created.extend(created)
+                duplicate_ids = set(json["data"].get("duplicate_import_ids") or [])
+                result.duplicates.extend(row for row in chunk if row.import_id in duplicate_ids)
+                knowledge = json["data"].get("server_knowledge")
+                if knowledge is not None:
+                    result.server_knowledge = max(result.server_knowledge or 0, knowledge)
+        self._invalidate_budget(budget_id)
+        return result
+
+    def _invalidate_budget(self, budget_id):
+        """Removes the cached responses of a budget after it has been changed"""
+        if self.cache is not None:
+            self.cache.invalidate(f"{self._base_url}/budgets/{budget_id}")
+            # The list of budgets holds when each budget was last modified
+            self.cache.discard(f"{self._base_url}/budgets")
+
+
+def _transaction_params(since_date=None, type=None):
+    """Gets the query parameters filtering a request for transactions
+
+    :param since_date: a date, or a date in ISO format, transactions must be on or after
+    :param type: uncategorized or unapproved
+    :return: a dict of the parameters that have been given
+    """
+    params = {}
+    if since_date is not None:
+        params["since_date"] = getattr(since_date, "isoformat", lambda: since_date)()
+    if type is not None:
+        if type not in {"uncategorized", "unapproved"}:
+            raise PynabError("Transaction type must be uncategorized or unapproved")
+        params["type"] = type
+    return params
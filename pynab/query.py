@@ -0,0 +1,350 @@
+from dataclasses import replace
+from itertools import islice
+
+from pynab.exceptions import PynabError
+
+# Filters matched by equality, and those that can be answered from an index of
+# the budget or pushed down to a transactions endpoint of the YNAB API
+_EQUALS = (
+    "account_id",
+    "category_id",
+    "payee_id",
+    "cleared",
+    "approved",
+    "flag_color",
+    "deleted",
+)
+_INDEXED = ("account_id", "category_id", "payee_id")
+# Fields each subtransaction of a split transaction has its own value for, so that
+# filtering or grouping by them matches the parts of split transactions in place
+# of the transactions themselves, as the YNAB API does
+_SPLIT = ("category_id", "payee_id")
+# Fields a part of a split transaction takes from its subtransaction
+_PART = ("id", "amount", "memo", "payee_id", "category_id", "transfer_account_id")
+
+
+def _iso(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _narrow(current, new, choose):
+    """Combines a bound with one already set, keeping the narrower of the two"""
+    return new if current is None else choose(current, new)
+
+
+class TransactionQuery:
+    """Query over the transactions of a budget built up by chaining filter,
+    order_by and limit, each of which returns a new query. Unless ordered, the
+    transactions are in the order they are held in, whichever index is used.
+
+    A query of a Budget uses its indexes of accounts, categories and payees and its
+    index of dates to find candidate transactions without scanning every one, and
+    reads the values filtered on from the json of transactions that have not been
+    created yet. A query made through a client requests only the matching
+    transactions, pushing the account, category or payee and start date down to
+    the YNAB API, then applies the remaining filters locally.
+
+    A query filtering or grouping by category or payee matches each part of a split
+    transaction as a transaction of its own, with the id, amount, category and payee
+    of its subtransaction.
+    """
+
+    def __init__(self, budget=None, client=None, budget_id=None):
+        if budget is None and (client is None or budget_id is None):
+            raise PynabError("A query needs a budget or a client and budget id")
+        self.budget = budget
+        self.client = client
+        self.budget_id = budget_id if budget is None else budget.budget_id
+        self._equals = ()
+        self._since = None
+        self._until = None
+        self._min_amount = None
+        self._max_amount = None
+        self._predicates = ()
+        self._order = None
+        self._limit = None
+        self._split = False
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.budget_id}>"
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def _copy(self, **changes):
+        query = TransactionQuery.__new__(TransactionQuery)
+        query.__dict__.update(self.__dict__, **changes)
+        return query
+
+    def filter(
+        self,
+        predicate=None,
+        since=None,
+        until=None,
+        min_amount: int = None,
+        max_amount: int = None,
+        **equals,
+    ):
+        """Narrows the query to transactions matching every filter given
+
+        :rtype: pynab.query.TransactionQuery
+        :param predicate: a function given each Transaction returning whether it matches
+        :param since: the earliest date included, as a date or in ISO format
+        :param until: the latest date included, as a date or in ISO format
+        :param min_amount: the smallest amount in milliunits included
+        :param max_amount: the largest amount in milliunits included
+        :param equals: values the fields account_id, category_id, payee_id, cleared,
+            approved, flag_color or deleted must have
+        :return: a new query
+        """
+        unknown = set(equals) - set(_EQUALS)
+        if unknown:
+            raise PynabError(f"Cannot filter transactions by {', '.join(sorted(unknown))}")
+        changes = {"_equals": self._equals + tuple(equals.items())}
+        if predicate is not None:
+            changes["_predicates"] = self._predicates + (predicate,)
+        if since is not None:
+            changes["_since"] = _narrow(self._since, _iso(since), max)
+        if until is not None:
+            changes["_until"] = _narrow(self._until, _iso(until), min)
+        if min_amount is not None:
+            changes["_min_amount"] = _narrow(self._min_amount, min_amount, max)
+        if max_amount is not None:
+            changes["_max_amount"] = _narrow(self._max_amount, max_amount, min)
+        return self._copy(**changes)
+
+    def order_by(self, key: str):
+        """Orders the transactions by a field, descending when prefixed with -
+
+        :rtype: pynab.query.TransactionQuery
+        :param key: the field, such as date or -amount
+        :return: a new query
+        """
+        return self._copy(_order=(key.lstrip("-"), key.startswith("-")))
+
+    def limit(self, count: int):
+        """Limits the number of transactions returned
+
+        :rtype: pynab.query.TransactionQuery
+        :param count: the maximum number of transactions
+        :return: a new query
+        """
+        return self._copy(_limit=count)
+
+    def all(self):
+        """Gets the transactions matching the query
+
+        :rtype: List[pynab.models.Transaction]
+        """
+        source, positions = self._positions()
+        if self._order is not None:
+            key, descending = self._order
+            # Transactions without a value for the field are ordered last
+            positions = sorted(
+                positions,
+                key=lambda position: _sort_key(_value(source, position, key), descending),
+                reverse=descending,
+            )
+        if self._limit is not None:
+            positions = islice(positions, self._limit)
+        return [source[position] for position in positions]
+
+    def first(self):
+        """Gets the first transaction matching the query, or None if there is none
+
+        :rtype: pynab.models.Transaction
+        """
+        transactions = self.limit(1).all()
+        return transactions[0] if transactions else None
+
+    def count(self):
+        """Gets the number of transactions matching the query"""
+        if self._limit is not None:
+            return len(self.all())
+        _, positions = self._positions()
+        return sum(1 for _ in positions)
+
+    def sum(self, field: str = "amount"):
+        """Gets the total of a field of the transactions matching the query
+
+        :param field: the field to total, amount by default
+        :return: the total
+        """
+        return sum(self.aggregate(None, field).values())
+
+    def aggregate(self, by: str, field: str = "amount"):
+        """Gets the total of a field of the transactions matching the query for
+        each value of another field, such as the spend of each category
+
+        :param by: the field to group by, or None for a single group
+        :param field: the field to total, amount by default
+        :return: a dict of each value of the grouped field to its total
+        """
+        query = self._copy(_split=True) if by in _SPLIT else self
+        if self._limit is not None:
+            source = query.all()
+            positions = range(len(source))
+        else:
+            source, positions = query._positions()
+        totals = {}
+        for position in positions:
+            group = None if by is None else _value(source, position, by)
+            totals[group] = totals.get(group, 0) + (_value(source, position, field) or 0)
+        return totals
+
+    def _positions(self):
+        """Gets the transactions to be filtered along with a generator of the
+        positions of those that match the query
+        """
+        if self.budget is not None:
+            source, candidates = self._local_candidates()
+        else:
+            source = self._remote_transactions()
+            candidates = range(len(source))
+        return source, (position for position in candidates if self._matches(source, position))
+
+    def _local_candidates(self):
+        """Gets the positions of the transactions of the budget that may match,
+        using the most selective index available
+        """
+        transactions = self.budget.transactions
+        split = self._split
+        candidates = None
+        for key, value in self._equals:
+            if key in _INDEXED:
+                index = self.budget._index("transactions", key, unique=False)
+                positions = index.positions(transactions).get(value, [])
+                if key in _SPLIT:
+                    split = True
+                    positions = positions + self._split_positions(key, value)
+                if candidates is None or len(positions) < len(candidates):
+                    candidates = positions
+        if self._since is not None or self._until is not None:
+            index = self.budget._sorted_index("transactions", "date")
+            positions = index.range(transactions, self._since, self._until)
+            if candidates is None or len(positions) < len(candidates):
+                candidates = positions
+        if candidates is None:
+            candidates = range(len(transactions))
+        else:
+            # Transactions are in the order of the budget whichever index was used
+            candidates = sorted(set(candidates))
+        if not split:
+            return transactions, candidates
+        rows = _SplitRows(transactions)
+        for position in candidates:
+            rows.add(position, self._parts(position))
+        return rows, range(len(rows))
+
+    def _split_positions(self, key, value):
+        """Gets the positions of the transactions with a subtransaction having a
+        value of a field
+        """
+        subtransactions = self.budget.subtransactions
+        index = self.budget._index("subtransactions", key, unique=False)
+        ids = self.budget._index("transactions", "id").positions(self.budget.transactions)
+        positions = []
+        for position in index.positions(subtransactions).get(value, []):
+            transaction_id = _value(subtransactions, position, "transaction_id")
+            if transaction_id in ids:
+                positions.append(ids[transaction_id])
+        return positions
+
+    def _parts(self, position):
+        """Gets the subtransactions of the transaction at a position of the budget
+        that have not been deleted, which are empty unless it is split
+        """
+        transactions = self.budget.transactions
+        parts = _value(transactions, position, "subtransactions")
+        if not parts:
+            subtransactions = self.budget.subtransactions
+            index = self.budget._index("subtransactions", "transaction_id", unique=False)
+            transaction_id = _value(transactions, position, "id")
+            positions = index.positions(subtransactions).get(transaction_id, [])
+            parts = [subtransactions[each] for each in positions]
+        return [part for part in parts if not _field(part, "deleted")]
+
+    def _remote_transactions(self):
+        """Requests the transactions that may match from the narrowest endpoint"""
+        equals = dict(self._equals)
+        options = {"since_date": self._since}
+        if equals.get("approved") is False:
+            options["type"] = "unapproved"
+        if "account_id" in equals:
+            return self.client.account_transactions(
+                self.budget_id, equals["account_id"], **options
+            )
+        if "category_id" in equals:
+            return self.client.category_transactions(
+                self.budget_id, equals["category_id"], **options
+            )
+        if "payee_id" in equals:
+            return self.client.payee_transactions(self.budget_id, equals["payee_id"], **options)
+        return self.client.transactions(self.budget_id, **options)
+
+    def _matches(self, source, position):
+        for key, value in self._equals:
+            if _value(source, position, key) != value:
+                return False
+        if self._since is not None or self._until is not None:
+            date = _value(source, position, "date")
+            if date is None:
+                return False
+            if self._since is not None and date < self._since:
+                return False
+            if self._until is not None and date > self._until:
+                return False
+        if self._min_amount is not None or self._max_amount is not None:
+            amount = _value(source, position, "amount")
+            if self._min_amount is not None and amount < self._min_amount:
+                return False
+            if self._max_amount is not None and amount > self._max_amount:
+                return False
+        return all(predicate(source[position]) for predicate in self._predicates)
+
+
+class _SplitRows:
+    """The transactions of a budget with each split transaction replaced by a part
+    for each of its subtransactions, reading values of the transactions that are
+    not split without creating them
+    """
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self._rows = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, row):
+        position, part = self._rows[row]
+        transaction = self.transactions[position]
+        if part is None:
+            return transaction
+        values = {key: _field(part, key) for key in _PART}
+        return replace(transaction, subtransactions=None, **values)
+
+    def add(self, position, parts):
+        """Adds the transaction at a position, or its parts when it is split"""
+        self._rows.extend((position, part) for part in parts or [None])
+
+    def attribute(self, row, key):
+        position, part = self._rows[row]
+        if part is not None and key in _PART:
+            return _field(part, key)
+        return _value(self.transactions, position, key)
+
+
+def _field(entity, key):
+    return entity.get(key) if isinstance(entity, dict) else getattr(entity, key)
+
+
+def _sort_key(value, descending):
+    return (value is None) != descending, value if value is not None else 0
+
+
+def _value(source, position, key):
+    """Gets a field of a transaction, without creating it when it is in a lazy list"""
+    if hasattr(source, "attribute"):
+        return source.attribute(position, key)
+    return getattr(source[position], key)
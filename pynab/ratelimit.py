@@ -0,0 +1,151 @@
+import json
+import random
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from pynab.exceptions import PynabError
+
+# Status codes of responses that are worth retrying after a delay
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_rate_limit(header: str):
+    """Parses the X-Rate-Limit header returned by the YNAB API
+
+    :param header: the value of the header in the form used/limit, e.g. 36/200
+    :return: a tuple of requests used and the limit, or None if the header is invalid
+    """
+    try:
+        used, limit = header.split("/")
+        return int(used), int(limit)
+    except (AttributeError, ValueError):
+        return None
+
+
+def backoff(attempt: int, base: float = 1.0, cap: float = 60.0, retry_after=None):
+    """Calculates a jittered exponential delay before retrying a request
+
+    :param attempt: the number of the retry, starting from zero
+    :param base: the delay in seconds that doubles with each attempt
+    :param cap: the maximum delay in seconds
+    :param retry_after: the value of a Retry-After header, used as the minimum delay
+    :return: the number of seconds to wait before retrying
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    try:
+        return max(delay, float(retry_after))
+    except (TypeError, ValueError):
+        return delay
+
+
+class RateLimiter:
+    """Token bucket rate limiter for requests made with an access token. Tokens are
+    refilled continuously at limit / period per second up to the burst size, so
+    requests are spread across the period instead of exhausting the limit at once.
+
+    A limiter can be shared between threads, and between processes by giving
+    each the same state file path, and is kept in step with the server through
+    the X-Rate-Limit header of each response.
+    """
+
+    def __init__(
+        self, limit: int = 200, period: float = 3600.0, burst: int = None, path: str = None
+    ):
+        if path is not None and fcntl is None:
+            raise PynabError("Sharing a rate limiter between processes is not supported here")
+        self.limit = limit
+        self.period = period
+        self.burst = limit if burst is None else burst
+        self.path = path
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic() if path is None else time.time()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.limit}/{self.period:g}s>"
+
+    @property
+    def rate(self):
+        """The number of tokens refilled each second"""
+        return self.limit / self.period
+
+    @property
+    def remaining(self):
+        """The number of requests that can currently be made without waiting"""
+        return int(self._update(lambda tokens: (tokens, tokens)))
+
+    def acquire(self, timeout: float = None):
+        """Takes a token, waiting until one is available
+
+        :param timeout: the maximum number of seconds to wait, or None to wait forever
+        :return: True if a token was taken, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._update(self._take)
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def update(self, header: str):
+        """Brings the limiter in step with the X-Rate-Limit header of a response,
+        never allowing more tokens than the server says are left
+
+        :param header: the value of the X-Rate-Limit header
+        """
+        parsed = parse_rate_limit(header)
+        if parsed is not None:
+            used, limit = parsed
+            left = max(0, limit - used)
+            self._update(lambda tokens: (min(tokens, left), None))
+
+    def exhaust(self):
+        """Empties the bucket, used when the server reports the limit was exceeded"""
+        self._update(lambda tokens: (0.0, None))
+
+    def _take(self, tokens):
+        if tokens >= 1:
+            return tokens - 1, 0
+        return tokens, (1 - tokens) / self.rate
+
+    def _update(self, change):
+        """Refills the bucket then applies a change to the number of tokens under a
+        lock, returning the result of the change
+        """
+        with self._lock:
+            if self.path is None:
+                now = time.monotonic()
+                tokens = self._refill(self._tokens, self._updated, now)
+                self._tokens, result = change(tokens)
+                self._updated = now
+                return result
+            return self._update_shared(change)
+
+    def _update_shared(self, change):
+        with open(self.path, "a+") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                try:
+                    state = json.loads(state_file.read())
+                except ValueError:
+                    state = {"tokens": self.burst, "updated": time.time()}
+                now = time.time()
+                tokens, result = change(self._refill(state["tokens"], state["updated"], now))
+                state_file.seek(0)
+                state_file.truncate()
+                state_file.write(json.dumps({"tokens": tokens, "updated": now}))
+                state_file.flush()
+                return result
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+    def _refill(self, tokens, updated, now):
+        return min(float(self.burst), tokens + max(0.0, now - updated) * self.rate)
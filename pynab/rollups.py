@@ -0,0 +1,254 @@
+from bisect import bisect_right
+from dataclasses import dataclass, replace
+from itertools import accumulate
+
+from pynab.index import _stamp
+
+
+@dataclass
+class Totals:
+    """Data Class to represent the transaction totals of an account, category or month"""
+
+    inflow: int = 0
+    outflow: int = 0
+    count: int = 0
+
+    @property
+    def activity(self):
+        """The net amount of the transactions"""
+        return self.inflow + self.outflow
+
+    def add(self, amount: int, sign: int = 1):
+        if amount >= 0:
+            self.inflow += sign * amount
+        else:
+            self.outflow += sign * amount
+        self.count += sign
+
+
+@dataclass
+class GroupTotals:
+    """Data Class to represent the totals of the categories of a category group for a month"""
+
+    budgeted: int = 0
+    activity: int = 0
+    balance: int = 0
+
+
+def _value(entity, key):
+    return entity.get(key) if isinstance(entity, dict) else getattr(entity, key)
+
+
+def _values(entities, *keys):
+    """Generates tuples of attribute values of every entity in a list, reading them
+    from the json of lazy lists without creating each entity
+    """
+    if hasattr(entities, "attribute_values"):
+        return zip(*(entities.attribute_values(key) for key in keys))
+    return (tuple(getattr(entity, key) for key in keys) for entity in entities)
+
+
+def month_of(date: str):
+    """Gets the month a date in ISO format falls in, in the form used by YNAB
+
+    :param date: a date such as 2018-11-23
+    :return: the first day of the month, such as 2018-11-01
+    """
+    return f"{date[:7]}-01"
+
+
+class Rollups:
+    """Totals of the transactions of a budget per account, month and category,
+    built with a single pass over the transactions on first use and then kept
+    up to date by applying the transactions that change rather than scanning the
+    budget again. The totals of category groups are calculated from the months
+    of the budget once per month and recalculated only when that month is replaced.
+    """
+
+    def __init__(self):
+        self.accounts = {}
+        self.account_months = {}
+        self.months = {}
+        self.categories = {}
+        self._balances = {}
+        self._transactions = {}
+        self._splits = {}
+        self._groups = {}
+        self._stamp = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self._transactions)} transactions>"
+
+    def copy(self):
+        """Creates rollups with the same totals that can be updated without changing
+        these, sharing the parts that are replaced rather than changed in place
+
+        :rtype: pynab.rollups.Rollups
+        """
+        other = Rollups()
+        other.accounts = dict(self.accounts)
+        other.account_months = {
+            account_id: dict(months) for account_id, months in self.account_months.items()
+        }
+        other.months = {month: replace(totals) for month, totals in self.months.items()}
+        other.categories = dict(self.categories)
+        other._balances = dict(self._balances)
+        other._transactions = dict(self._transactions)
+        other._splits = dict(self._splits)
+        other._groups = dict(self._groups)
+        return other
+
+    def is_current(self, budget):
+        """Whether the rollups are up to date with the transactions of a budget"""
+        return self._stamp == self._budget_stamp(budget)
+
+    def mark_current(self, budget):
+        """Records that the rollups have been kept up to date with changes made to
+        the transactions of a budget, so they do not need to be rebuilt
+        """
+        self._stamp = self._budget_stamp(budget)
+
+    def build(self, budget):
+        """Calculates every total from the transactions of a budget, with a single
+        pass that reads lazy lists without creating each entity
+        """
+        keys = "id", "transaction_id", "category_id", "amount", "deleted"
+        self._apply_splits(_values(budget.subtransactions, *keys), refresh=False)
+        keys = "id", "account_id", "date", "amount", "category_id", "deleted", "subtransactions"
+        for values in _values(budget.transactions, *keys):
+            self._apply(*values)
+        self.mark_current(budget)
+
+    def apply_transactions(self, transactions):
+        """Applies transactions that have been created, changed or deleted
+
+        :param transactions: Transaction objects or dicts of json
+        """
+        for transaction in transactions:
+            self._apply(
+                _value(transaction, "id"),
+                _value(transaction, "account_id"),
+                _value(transaction, "date"),
+                _value(transaction, "amount"),
+                _value(transaction, "category_id"),
+                _value(transaction, "deleted"),
+                _value(transaction, "subtransactions"),
+            )
+
+    def apply_subtransactions(self, subtransactions):
+        """Applies subtransactions of split transactions that have been created,
+        changed or deleted, moving the activity of their transaction between categories
+
+        :param subtransactions: Subtransaction objects or dicts of json
+        """
+        keys = "id", "transaction_id", "category_id", "amount", "deleted"
+        self._apply_splits(
+            tuple(_value(subtransaction, key) for key in keys) for subtransaction in subtransactions
+        )
+
+    def _apply_splits(self, subtransactions, refresh=True):
+        """Records the category and amount of each subtransaction, given as tuples of
+        id, transaction_id, category_id, amount and deleted, then reapplies the
+        transactions they belong to
+        """
+        changed = set()
+        for id, transaction_id, category_id, amount, deleted in subtransactions:
+            # Replaced rather than changed so that copies can share the parts
+            parts = self._splits[transaction_id] = dict(self._splits.get(transaction_id, ()))
+            if deleted:
+                parts.pop(id, None)
+            else:
+                parts[id] = (category_id, amount)
+            changed.add(transaction_id)
+        for transaction_id in changed if refresh else ():
+            contribution = self._transactions.get(transaction_id)
+            if contribution is not None:
+                account_id, date, amount, category_id, subtransactions = contribution[-1]
+                self._apply(
+                    transaction_id, account_id, date, amount, category_id, False, subtransactions
+                )
+
+    def account_balance(self, account_id: str, month: str):
+        """Gets the balance of an account at the end of a month from the running
+        totals of its months, which are kept until the account next changes
+
+        :param account_id: the UUID of the account
+        :param month: the month, such as 2018-11-01
+        :return: the balance in milliunits
+        """
+        balances = self._balances.get(account_id)
+        if balances is None:
+            months = sorted(self.account_months.get(account_id, {}).items())
+            balances = self._balances[account_id] = (
+                [each for each, _ in months],
+                list(accumulate(amount for _, amount in months)),
+            )
+        months, totals = balances
+        position = bisect_right(months, month)
+        return totals[position - 1] if position else 0
+
+    def group_totals(self, month, category_group_id: str):
+        """Gets the totals of the categories of a group for a month
+
+        :rtype: pynab.rollups.GroupTotals
+        :param month: the Month of the budget
+        :param category_group_id: the UUID of the category group
+        :return: the totals, which are zero when the group has no categories
+        """
+        # A month replaced by a delta sync is a new object, so is recalculated
+        cached, groups = self._groups.get(month.month, (None, None))
+        if cached is not month:
+            groups = {}
+            self._groups[month.month] = month, groups
+            for category in month.categories or []:
+                if category.deleted:
+                    continue
+                totals = groups.setdefault(category.category_group_id, GroupTotals())
+                totals.budgeted += category.budgeted
+                totals.activity += category.activity
+                totals.balance += category.balance
+        return groups.get(category_group_id, GroupTotals())
+
+    def _apply(self, id, account_id, date, amount, category_id, deleted, subtransactions):
+        """Replaces the contribution of a transaction to the totals"""
+        previous = self._transactions.pop(id, None)
+        if previous is not None:
+            self._contribute(*previous[:-1], sign=-1)
+        if not deleted:
+            parts = self._parts(id, category_id, amount, subtransactions)
+            source = account_id, date, amount, category_id, subtransactions
+            contribution = account_id, month_of(date), amount, parts, source
+            self._transactions[id] = contribution
+            self._contribute(*contribution[:-1])
+
+    def _contribute(self, account_id, month, amount, parts, sign=1):
+        self.accounts[account_id] = self.accounts.get(account_id, 0) + sign * amount
+        months = self.account_months.setdefault(account_id, {})
+        months[month] = months.get(month, 0) + sign * amount
+        self._balances.pop(account_id, None)
+        totals = self.months.get(month)
+        if totals is None:
+            totals = self.months[month] = Totals()
+        totals.add(amount, sign)
+        for category_id, part in parts:
+            key = category_id, month
+            self.categories[key] = self.categories.get(key, 0) + sign * part
+
+    def _parts(self, id, category_id, amount, subtransactions):
+        """Gets the amounts of a transaction assigned to each category, which are
+        those of its subtransactions when it is split
+        """
+        if subtransactions:
+            return [
+                (_value(subtransaction, "category_id"), _value(subtransaction, "amount"))
+                for subtransaction in subtransactions
+                if not _value(subtransaction, "deleted")
+            ]
+        splits = self._splits.get(id)
+        if splits:
+            return list(splits.values())
+        return [(category_id, amount)]
+
+    @staticmethod
+    def _budget_stamp(budget):
+        return _stamp(budget.transactions), _stamp(budget.subtransactions)
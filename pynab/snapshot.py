@@ -0,0 +1,69 @@
+import threading
+
+
+class SharedBudget:
+    """Budget shared between threads, where readers take the current snapshot
+    without locking while a writer publishes new versions. A published snapshot
+    is never changed, so a reader sees a consistent budget for as long as it
+    holds one. Updates from a delta copy only the collections that changed and
+    share the rest, including their indexes, with the previous snapshot.
+
+    Entities are shared between snapshots, so should not be changed by readers;
+    the frozen models in pynab.compact enforce this.
+    """
+
+    def __init__(self, budget):
+        self._snapshot = budget
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._snapshot.budget_id} v{self.version}>"
+
+    @property
+    def snapshot(self):
+        """The current version of the budget, which must not be changed
+
+        :rtype: pynab.models.Budget
+        """
+        return self._snapshot
+
+    def publish(self, budget):
+        """Replaces the current snapshot, such as with a budget downloaded in full
+
+        :param budget: the budget readers should see from now on
+        """
+        with self._lock:
+            self._publish(budget)
+
+    def apply_delta(self, server_knowledge, **data):
+        """Publishes a new snapshot with the changes of a delta request applied
+
+        :rtype: pynab.models.Budget
+        :param server_knowledge: the server knowledge returned with the delta
+        :param data: the budget data returned by the delta request
+        :return: the new snapshot
+        """
+        with self._lock:
+            changed = [
+                collection for collection in self._snapshot._collections if data.get(collection)
+            ]
+            budget = self._snapshot.fork(changed)
+            budget.apply_delta(server_knowledge, **data)
+            return self._publish(budget)
+
+    def sync(self, client):
+        """Requests the changes since the current snapshot and publishes a new
+        snapshot with them applied
+
+        :rtype: pynab.models.Budget
+        :param client: the Pynab client used to request the changes
+        :return: the new snapshot
+        """
+        with self._lock:
+            return self._publish(client.sync_budget(self._snapshot, copy_on_write=True))
+
+    def _publish(self, budget):
+        self._snapshot = budget
+        self.version += 1
+        return budget
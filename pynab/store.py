@@ -0,0 +1,161 @@
+import json
+import sqlite3
+import threading
+from dataclasses import asdict
+
+from pynab.models import Budget
+
+
+class BudgetStore:
+    """Class to persist parsed budgets in a local SQLite database so that they can
+    be loaded at startup and brought up to date with a delta request instead of
+    downloading the full budget again. A store can be shared between threads, which
+    take turns using its connection. Several stores, such as those of worker
+    processes, can use the same database, where the database is written in WAL mode
+    so that loads are not blocked by a save and saves wait for each other in turn.
+    """
+
+    def __init__(self, path: str, timeout: float = 300.0):
+        """
+        :param path: the path of the SQLite database
+        :param timeout: the number of seconds a save waits for a save by another
+            store using the same database to finish
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS budgets ("
+                "budget_id TEXT PRIMARY KEY, server_knowledge INTEGER, data TEXT)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS entities ("
+                "budget_id TEXT, collection TEXT, key TEXT, data TEXT, "
+                "PRIMARY KEY (budget_id, collection, key))"
+            )
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.path}>"
+
+    def close(self):
+        """Closes the connection to the underlying database"""
+        with self._lock:
+            self.connection.close()
+
+    def save(self, budget: Budget):
+        """Saves every entity of a budget along with its server knowledge,
+        replacing anything previously stored for the budget
+
+        :param budget: the budget to be saved
+        """
+        with self._lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM entities WHERE budget_id = ?", (budget.budget_id,)
+            )
+            self._save_budget(budget)
+            for collection, (_, key) in Budget._collections.items():
+                entities = getattr(budget, collection)
+                if hasattr(entities, "as_dicts"):
+                    entities = entities.as_dicts()
+                self._upsert(budget.budget_id, collection, key, entities)
+
+    def save_delta(self, budget: Budget, changes: dict):
+        """Saves only the entities of a budget that were changed by a delta request
+
+        :param budget: the budget the changes have already been merged into
+        :param changes: the budget data returned by the delta request
+        """
+        with self._lock, self.connection:
+            self._save_budget(budget)
+            for collection, (_, key) in Budget._collections.items():
+                entities = changes.get(collection) or []
+                deleted = [
+                    (budget.budget_id, collection, str(entity[key]))
+                    for entity in entities
+                    if entity.get("deleted")
+                ]
+                self.connection.executemany(
+                    "DELETE FROM entities WHERE budget_id = ? AND collection = ? AND key = ?",
+                    deleted,
+                )
+                if collection == "months":
+                    # Months in a delta only hold changed categories, so the merged
+                    # month is saved rather than the month returned in the delta
+                    entities = [
+                        budget.month(entity["month"])
+                        for entity in entities
+                        if not entity.get("deleted")
+                    ]
+                else:
+                    entities = [entity for entity in entities if not entity.get("deleted")]
+                self._upsert(budget.budget_id, collection, key, entities)
+
+    def load(self, budget_id: str, requests_session, models=None):
+        """Loads a budget previously saved in the store
+
+        :rtype: pynab.models.Budget
+        :param budget_id: the UUID of the budget to be loaded
+        :param requests_session: the session the loaded budget should use for requests
+        :param models: models to use in place of the defaults for collections of the budget
+        :return: the stored budget or None if the budget has not been saved
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT server_knowledge, data FROM budgets WHERE budget_id = ?", (budget_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            server_knowledge, data = row
+            data = json.loads(data)
+            for collection in Budget._collections:
+                data[collection] = []
+            rows = self.connection.execute(
+                "SELECT collection, data FROM entities WHERE budget_id = ? ORDER BY rowid",
+                (budget_id,),
+            )
+            for collection, entity in rows:
+                data[collection].append(json.loads(entity))
+        return Budget(
+            requests_session, server_knowledge=server_knowledge, models=models, **data
+        )
+
+    def server_knowledge(self, budget_id: str):
+        """Gets the server knowledge of a stored budget
+
+        :param budget_id: the UUID of the stored budget
+        :return: the server knowledge of the budget or None if it has not been saved
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT server_knowledge FROM budgets WHERE budget_id = ?", (budget_id,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def _save_budget(self, budget):
+        data = {
+            "id": budget.budget_id,
+            "name": budget.name,
+            "last_modified_on": budget.last_modified_on,
+            "date_format": {"format": budget.date_format},
+            "currency_format": asdict(budget.currency_format),
+        }
+        self.connection.execute(
+            "INSERT INTO budgets (budget_id, server_knowledge, data) VALUES (?, ?, ?) "
+            "ON CONFLICT (budget_id) DO UPDATE SET "
+            "server_knowledge = excluded.server_knowledge, data = excluded.data",
+            (budget.budget_id, budget.server_knowledge, json.dumps(data)),
+        )
+
+    def _upsert(self, budget_id, collection, key, entities):
+        rows = []
+        for entity in entities:
+            if not isinstance(entity, dict):
+                entity = asdict(entity)
+            rows.append((budget_id, collection, str(entity[key]), json.dumps(entity)))
+        self.connection.executemany(
+            "INSERT INTO entities (budget_id, collection, key, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (budget_id, collection, key) DO UPDATE SET data = excluded.data",
+            rows,
+        )
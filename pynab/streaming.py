@@ -0,0 +1,201 @@
+import codecs
+import json
+import re
+
+from pynab.builders import builder
+from pynab.exceptions import PynabError
+from pynab.factory import _handle_error_response
+from pynab.lazy import LazyEntityList
+from pynab.models import Budget
+
+_WHITESPACE = " \t\n\r"
+# Characters a number may continue with after those already read
+_NUMBER = re.compile(r"[0-9.eE+-]*")
+
+# Paths to the arrays within a budget or transactions response whose elements are streamed one
+# at a time rather than decoded as a whole
+_STREAMED = {("data", "budget", collection) for collection in Budget._collections}
+_STREAMED.add(("data", "transactions"))
+_NESTED = {("data",), ("data", "budget")}
+
+
+class _Reader:
+    """Reads json values one at a time from an iterable of text chunks, keeping only
+    the part of the document that has not been read yet in memory
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self._position = 0
+        self._exhausted = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, minimum: int = 1):
+        """Reads chunks into the buffer until at least minimum more characters have
+        been read, returning False if the stream ended without reading any
+        """
+        if self._exhausted:
+            return False
+        pieces = [self._buffer[self._position :]]
+        read = 0
+        for chunk in self._chunks:
+            if chunk:
+                pieces.append(chunk)
+                read += len(chunk)
+                if read >= minimum:
+                    break
+        else:
+            self._exhausted = True
+        if not read:
+            return False
+        self._buffer = "".join(pieces)
+        self._position = 0
+        return True
+
+    def peek(self):
+        """Gets the next character that is not whitespace without consuming it"""
+        while True:
+            buffer = self._buffer
+            while self._position < len(buffer) and buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(buffer):
+                return buffer[self._position]
+            if not self._fill():
+                raise PynabError("Unexpected end of response from YNAB API")
+
+    def expect(self, character):
+        """Consumes the next character, which must be the one given"""
+        if self.peek() != character:
+            raise PynabError("Unable to parse response from YNAB API")
+        self._position += 1
+
+    def value(self):
+        """Decodes the next complete json value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except ValueError:
+                # At least as much again is read before decoding again, so that a
+                # value spanning many chunks is decoded a few times rather than once
+                # per chunk
+                if not self._fill(max(1, len(self._buffer) - self._position)):
+                    raise PynabError("Unable to parse response from YNAB API")
+                continue
+            # A number at the end of the buffer, such as 1. or 1e, may continue in
+            # the next chunk
+            if not _NUMBER.fullmatch(self._buffer, end) or not self._fill():
+                self._position = end
+                return value
+
+
+def _events(reader, path):
+    """Generates (path, value) events for the members of the object being read,
+    descending into nested objects and streaming the elements of arrays on the
+    streamed paths
+    """
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        member = path + (key,)
+        if member in _STREAMED and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield member, reader.value()
+                    if reader.peek() == "]":
+                        reader.expect("]")
+                        break
+                    reader.expect(",")
+        elif member in _NESTED and reader.peek() == "{":
+            yield from _events(reader, member)
+        else:
+            yield member, reader.value()
+        if reader.peek() == "}":
+            reader.expect("}")
+            return
+        reader.expect(",")
+
+
+def iter_budget(chunks):
+    """Parses a budget response incrementally, generating each entity as soon as
+    it has been read so that the full response never has to be held in memory
+
+    :param chunks: an iterable of text chunks making up the response body
+    :return: a generator of (name, value) tuples where name is a collection such as
+        transactions with an entity dict as the value, a field of the budget with
+        its value, or server_knowledge
+    """
+    for path, value in _events(_Reader(chunks), ()):
+        if path == ("error",):
+            _handle_error_response(value)
+        elif path[:2] == ("data", "budget") and len(path) == 3:
+            yield path[2], value
+        elif path == ("data", "server_knowledge"):
+            yield "server_knowledge", value
+
+
+def iter_transactions(chunks):
+    """Parses a transactions response incrementally, generating the json of each
+    transaction as soon as it has been read
+
+    :param chunks: an iterable of text chunks making up the response body
+    :return: a generator of transaction dicts
+    """
+    for path, value in _events(_Reader(chunks), ()):
+        if path == ("error",):
+            _handle_error_response(value)
+        elif path == ("data", "transactions"):
+            yield value
+
+
+def decode_chunks(chunks, encoding="utf-8"):
+    """Decodes an iterable of byte chunks into text chunks
+
+    :param chunks: an iterable of bytes, such as response.iter_content()
+    :param encoding: the encoding of the bytes
+    :return: a generator of str chunks
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def parse_budget_stream(chunks, session=None, models=None, callback=None):
+    """Creates a Budget from a streamed budget response, creating each entity as
+    it is read so that the json of the whole budget is never held in memory
+
+    :rtype: pynab.models.Budget
+    :param chunks: an iterable of text chunks making up the response body
+    :param session: the requests session the budget should use for further requests
+    :param models: models to use in place of the defaults for collections of the budget
+    :param callback: called with the name of the collection and each entity created
+    :return: the budget parsed from the stream
+    """
+    fields = {collection: [] for collection in Budget._collections}
+    collections = {}
+    server_knowledge = None
+    resolved = Budget.resolve_models(models)
+    builders = {name: builder(model) for name, model in resolved.items()}
+    for name, value in iter_budget(chunks):
+        if name == "server_knowledge":
+            server_knowledge = value
+        elif name in resolved:
+            entity = builders[name](value)
+            if callback is not None:
+                callback(name, entity)
+            collections.setdefault(name, LazyEntityList(resolved[name])).append(entity)
+        else:
+            fields[name] = value
+    budget = Budget(session, server_knowledge=server_knowledge, models=models, **fields)
+    for name, entities in collections.items():
+        setattr(budget, name, entities)
+    return budget
@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from pynab.builders import builder
+from pynab.exceptions import PynabError
+from pynab.models import Budget
+from pynab.rollups import month_of
+
+
+def add_months(month: str, months: int):
+    """Gets the month a number of months after another, in the form used by YNAB
+
+    :param month: a date in ISO format, such as 2018-11-23
+    :param months: the number of months to add
+    :return: the first day of the later month, such as 2019-01-01
+    """
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}-01"
+
+
+class TransactionWindows:
+    """Iterates over the transaction history of a budget a window of months at a
+    time, generating each Transaction as its window arrives. Each window is
+    requested with the start of the window as since_date and its response is
+    streamed, so only the transactions of the current and next window are held in
+    memory. The next window is requested in the background while the transactions
+    of the current window are processed.
+
+    As the YNAB API has no end date, the response for a window also holds the
+    transactions after it. As the API returns transactions in date order, the rest
+    of the response is not read once a transaction after the window is reached,
+    unless an earlier transaction has arrived out of order. Windows without any
+    transactions are skipped.
+
+    checkpoint is the start of the first window whose transactions have not all
+    been generated, or the end of the last window once every window has been,
+    which can be given as since_date to resume the iteration.
+    """
+
+    def __init__(
+        self, client, budget_id: str, since_date=None, months: int = 1, type=None, prefetch=True
+    ):
+        """
+        :param client: the Pynab client the windows are requested with
+        :param budget_id: the UUID of the budget that contains the transactions
+        :param since_date: the date to start from, as a date or in ISO format, by
+            default the earliest transaction
+        :param months: the number of months in each window
+        :param type: only uncategorized or unapproved transactions are returned
+        :param prefetch: whether the next window is requested while the current
+            one is processed
+        """
+        if months < 1:
+            raise PynabError("Windows must be at least one month long")
+        self.client = client
+        self.budget_id = budget_id
+        self.months = months
+        self.type = type
+        self.prefetch = prefetch
+        if since_date is not None and hasattr(since_date, "isoformat"):
+            since_date = since_date.isoformat()
+        self.checkpoint = since_date
+        self._build = builder(Budget.resolve_models(client.models)["transactions"])
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.budget_id} from {self.checkpoint}>"
+
+    def __iter__(self):
+        for start, transactions in self.windows():
+            yield from transactions
+
+    def windows(self):
+        """Generates each window as a tuple of its start date and a list of its
+        transactions, advancing the checkpoint as each window is finished with
+
+        :return: a generator of (str, List[pynab.models.Transaction]) tuples
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        try:
+            window = self._request(executor, self.checkpoint)
+            while window is not None:
+                start, transactions, following = _result(window)
+                # The next window is requested before this one is handed out
+                window = None if following is None else self._request(executor, following)
+                yield start, transactions
+                if following is None and start is not None:
+                    # Resuming after the last window only requests later transactions
+                    following = add_months(start, self.months)
+                self.checkpoint = following
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _request(self, executor, start):
+        if executor is None:
+            return self._window(start)
+        return executor.submit(self._window, start)
+
+    def _window(self, start):
+        """Requests the transactions of the window beginning at a date
+
+        :return: a tuple of the start of the window, its transactions and the start
+            of the next window, which is None when there are no later transactions
+        """
+        transactions = []
+        end = None if start is None else add_months(start, self.months)
+        following = None
+        ordered = True
+        previous = ""
+        stream = self.client._stream_transactions(self.budget_id, start, self.type)
+        with closing(stream):
+            for transaction in stream:
+                date = transaction["date"]
+                if end is None:
+                    # Without a start date the first window begins with the first transaction
+                    start = month_of(date)
+                    end = add_months(start, self.months)
+                ordered = ordered and date >= previous
+                previous = date
+                if date < end:
+                    transactions.append(self._build(transaction))
+                    continue
+                # Windows before the first later transaction are empty, so are skipped
+                if following is None or month_of(date) < following:
+                    following = month_of(date)
+                if ordered:
+                    break
+        return start, transactions, following
+
+
+def _result(window):
+    return window.result() if hasattr(window, "result") else window
@@ -22,4 +22,5 @@ setup(
     packages=["pynab"],
     include_package_data=True,
     install_requires=["requests"],
+    extras_require={"columnar": ["numpy"], "async": ["aiohttp"], "export": ["msgpack"]},
 )
@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks.fake_server import FakeYnabServer
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "fake_server(**options): sizes of the synthetic budgets of the server fixture"
+    )
+
+
+@pytest.fixture
+def server(request):
+    """Setup a fake YNAB server with synthetic budgets of the sizes given by the
+    fake_server marker of the test or its module
+    """
+    marker = request.node.get_closest_marker("fake_server")
+    options = {} if marker is None else marker.kwargs
+    with FakeYnabServer(**options) as server:
+        yield server
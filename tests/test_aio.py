@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from pynab import models
+
+aio = pytest.importorskip("pynab.aio")
+pytest.importorskip("aiohttp")
+
+from .test_pynab import pynab_vcr  # noqa: E402
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pynab_vcr.use_cassette("./cassettes/test_user_id")
+def test_async_user():
+    """Tests an async API call to get information about authenticated user"""
+
+    async def user():
+        async with aio.AsyncPynab("auth_token") as ynab:
+            return await ynab.user
+
+    assert run(user()).id == "string"
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget", allow_playback_repeats=True)
+def test_async_budgets_concurrently():
+    """Tests that several budgets can be fetched concurrently"""
+
+    async def budgets():
+        async with aio.AsyncPynab("auth_token", concurrency=2) as ynab:
+            return await ynab.budgets(["string"] * 3)
+
+    budgets = run(budgets())
+    assert len(budgets) == 3
+    assert all(isinstance(budget, models.Budget) for budget in budgets)
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_async_budget_can_make_requests():
+    """Tests that a budget returned by the async client has a session to make requests with"""
+
+    async def budget():
+        async with aio.AsyncPynab("auth_token") as ynab:
+            return await ynab.budget("string")
+
+    budget = run(budget())
+    assert budget.session is not None
+    assert budget.base_url == aio.AsyncPynab._base_url
@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from pynab import Pynab, ResponseCache
+from pynab.cache import DiskBackend, MemoryBackend, SharedFileBackend
+
+pytestmark = pytest.mark.fake_server(years=1, transactions_per_month=5)
+
+
+def test_cached_responses_are_reused(server):
+    """Tests that repeated requests within the TTL are served from the cache"""
+    cache = ResponseCache()
+    ynab = Pynab("token", base_url=server.url, cache=cache)
+
+    users = [ynab.user for _ in range(3)]
+
+    assert users[0] == users[2]
+    assert len(server.requests["token"]) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_uncached_endpoints(server):
+    """Tests that endpoints without a TTL are always requested"""
+    budget_id = next(iter(server.budgets))
+    ynab = Pynab("token", base_url=server.url, cache=ResponseCache())
+
+    ynab.accounts(budget_id)
+    ynab.accounts(budget_id)
+
+    assert len(server.requests["token"]) == 2
+
+
+def test_expired_responses_are_revalidated(server):
+    """Tests that an expired response is revalidated with its ETag"""
+    budget_id = next(iter(server.budgets))
+    cache = ResponseCache(ttls={"/budgets/*/settings": 0})
+    ynab = Pynab("token", base_url=server.url, cache=cache)
+
+    first = ynab.budget_settings(budget_id)
+    second = ynab.budget_settings(budget_id)
+
+    assert first.currency_format == second.currency_format
+    assert cache.revalidations == 1
+
+
+def test_import_invalidates_budget(server):
+    """Tests that importing transactions removes cached responses of the budget"""
+    budget_id = next(iter(server.budgets))
+    cache = ResponseCache(default_ttl=60)
+    ynab = Pynab("token", base_url=server.url, cache=cache)
+    before = len(ynab.transactions(budget_id))
+
+    ynab.import_transactions(budget_id, [])
+
+    assert len(ynab.transactions(budget_id)) == before
+    assert cache.misses == 2
+
+
+def test_memory_backend_evicts_least_recently_used():
+    """Tests that the memory backend evicts the entry read least recently"""
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", {"body": "1"})
+    backend.set("b", {"body": "2"})
+    backend.get("a")
+    backend.set("c", {"body": "3"})
+
+    assert backend.get("b") is None
+    assert backend.get("a") == {"body": "1"}
+
+
+def test_disk_backend_persists(tmp_path):
+    """Tests that entries kept on disk are kept when the backend is reopened"""
+    path = str(tmp_path / "cache.db")
+    backend = DiskBackend(path, max_entries=1)
+    backend.set("a", {"body": "1"})
+    backend.set("b", {"body": "2"})
+    backend.close()
+
+    reopened = DiskBackend(path)
+
+    assert reopened.get("a") is None
+    assert reopened.get("b") == {"body": "2"}
+
+
+def test_shared_file_backend(tmp_path):
+    """Tests that entries written by one backend are read and invalidated by another"""
+    path = str(tmp_path / "cache.json")
+    SharedFileBackend(path).set("https://api/budgets/a", {"body": "1"})
+    backend = SharedFileBackend(path)
+
+    assert backend.get("https://api/budgets/a") == {"body": "1"}
+    backend.invalidate("https://api/budgets")
+    assert backend.get("https://api/budgets/a") is None
+
+
+def test_budgets_and_deltas_not_cached(server):
+    """Tests that full budgets and delta syncs are always requested"""
+    budget_id, fake_budget = next(iter(server.budgets.items()))
+    ynab = Pynab("token", base_url=server.url, cache=ResponseCache(default_ttl=60))
+    budget = ynab.budget(budget_id)
+    knowledge = budget.server_knowledge
+
+    fake_budget.mutate(2)
+    ynab.sync_budget(budget)
+    budget.server_knowledge = knowledge
+    fake_budget.mutate(2, seed=1)
+    ynab.sync_budget(budget)
+
+    assert budget.server_knowledge == fake_budget.server_knowledge
+    ynab.budget(budget_id)
+    assert len(server.requests["token"]) == 4
+
+
+def test_import_invalidates_budgets_list(server):
+    """Tests that importing transactions removes the cached list of budgets"""
+    budget_id = next(iter(server.budgets))
+    cache = ResponseCache()
+    ynab = Pynab("token", base_url=server.url, cache=cache)
+    ynab.budgets_list()
+
+    ynab.import_transactions(budget_id, [])
+    ynab.budgets_list()
+
+    assert cache.misses == 2
+
+
+def test_shared_file_backend_reads_leave_file_unchanged(tmp_path):
+    """Tests that reading entries does not rewrite the shared file"""
+    path = tmp_path / "cache.json"
+    backend = SharedFileBackend(str(path))
+    backend.set("a", {"body": "1"})
+    modified = path.stat().st_mtime_ns
+
+    assert backend.get("a") == {"body": "1"}
+    assert backend.get("b") is None
+    assert path.stat().st_mtime_ns == modified
+    assert SharedFileBackend(str(tmp_path / "missing.json")).get("a") is None
+
+
+def test_shared_file_backend_evicts_least_recently_used(tmp_path):
+    """Tests that an entry read by another process is kept over one written later"""
+    path = str(tmp_path / "cache.json")
+    backend = SharedFileBackend(path, max_entries=2)
+    backend.set("a", {"body": "1"})
+    backend.set("b", {"body": "2"})
+    SharedFileBackend(path, max_entries=2).get("a")
+    backend.set("c", {"body": "3"})
+
+    assert backend.get("b") is None
+    assert backend.get("a") == {"body": "1"}
+
+
+def test_counters_shared_between_threads():
+    """Tests that hits counted by several threads at once are all counted"""
+    cache = ResponseCache(default_ttl=60)
+    response = SimpleNamespace(status_code=200, text="{}", headers={})
+    cache.fetch("/user", "https://api/user", None, lambda headers: response)
+
+    def fetch(_):
+        for _ in range(200):
+            cache.fetch("/user", "https://api/user", None, lambda headers: response)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(fetch, range(8)))
+
+    assert (cache.hits, cache.misses) == (1600, 1)
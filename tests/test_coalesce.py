@@ -0,0 +1,125 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pynab import BudgetStore, Pynab
+from pynab.coalesce import SingleFlight
+from pynab.instrumentation import Stats
+from benchmarks.fake_server import FakeYnabServer
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def _run_together(single_flight, count, function, key="key"):
+    """Makes a number of calls with the same key, holding the first until every
+    call has been made so that they all overlap
+    """
+    release = threading.Event()
+
+    def call():
+        release.wait()
+        return function()
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(single_flight.do, key, call) for _ in range(count)]
+        try:
+            _wait_for(lambda: single_flight.calls == count)
+        finally:
+            release.set()
+    return futures
+
+
+def test_single_flight_shares_result():
+    single_flight = SingleFlight()
+    results = iter(range(100))
+
+    futures = _run_together(single_flight, 8, lambda: next(results))
+
+    assert sorted(future.result() for future in futures) == [(0, False)] + [(0, True)] * 7
+    assert (single_flight.executed, single_flight.coalesced) == (1, 7)
+    assert single_flight.do("key", lambda: next(results)) == (1, False)
+
+
+def test_single_flight_shares_error():
+    single_flight = SingleFlight()
+
+    def fail():
+        raise ValueError("failed")
+
+    futures = _run_together(single_flight, 4, fail)
+
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result()
+    assert single_flight.executed == 1
+
+
+def _hold(ynab, name):
+    """Replaces a method of a client with one waiting until released"""
+    method = getattr(ynab, name)
+    release = threading.Event()
+
+    def held(*args, **kwargs):
+        release.wait()
+        return method(*args, **kwargs)
+
+    setattr(ynab, name, held)
+    return release
+
+
+def test_client_coalesces_budget_requests(tmp_path):
+    """Tests that concurrent requests for the same budget make a single request and
+    save the budget once, with each call getting a budget of its own
+    """
+    with FakeYnabServer(years=1, transactions_per_month=20) as server:
+        budget_id, fake_budget = next(iter(server.budgets.items()))
+        stats = Stats()
+        store = BudgetStore(str(tmp_path / "budgets.db"))
+        ynab = Pynab("token", base_url=server.url, coalesce=True, hooks=[stats], store=store)
+        saves = []
+        save = store.save
+        store.save = lambda budget: saves.append(save(budget))
+        release = _hold(ynab, "_fetch_once")
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            futures = [executor.submit(ynab.budget, budget_id) for _ in range(6)]
+            try:
+                _wait_for(lambda: ynab.single_flight.coalesced == 5)
+            finally:
+                release.set()
+        budgets = [future.result() for future in futures]
+
+        assert len(server.requests["token"]) == 1
+        assert len(saves) == 1
+        assert len({id(budget) for budget in budgets}) == 6
+        assert stats.endpoints["/budgets/{id}"].coalesced == 5
+        fake_budget.mutate(3)
+        ynab.sync_budget(budgets[0])
+        assert budgets[0].server_knowledge == fake_budget.server_knowledge
+        assert budgets[1].server_knowledge != fake_budget.server_knowledge
+        assert list(budgets[1].transactions) != list(budgets[0].transactions)
+
+
+def test_fetch_key_includes_options():
+    """Tests that calls differing only in their options are not coalesced"""
+    with FakeYnabServer(years=1, transactions_per_month=5) as server:
+        ynab = Pynab("token", base_url=server.url, coalesce=True)
+        release = _hold(ynab, "_fetch_once")
+        path = f"{server.url}/user"
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(ynab._fetch, path, models=models) for models in ({}, {})
+            ]
+            try:
+                _wait_for(lambda: ynab.single_flight.calls == 2)
+            finally:
+                release.set()
+        [future.result() for future in futures]
+
+        assert ynab.single_flight.coalesced == 0
@@ -0,0 +1,96 @@
+import pytest
+
+from pynab import models
+
+np = pytest.importorskip("numpy")
+
+CURRENCY_FORMAT = {
+    "iso_code": "GBP",
+    "example_format": "123,456.78",
+    "decimal_digits": 2,
+    "decimal_separator": ".",
+    "symbol_first": True,
+    "group_separator": ",",
+    "currency_symbol": "£",
+    "display_symbol": True,
+}
+
+
+def transaction(id, date, amount, account_id, category_id, deleted=False):
+    return {
+        "id": id,
+        "date": date,
+        "amount": amount,
+        "memo": None,
+        "cleared": "cleared",
+        "approved": True,
+        "flag_color": None,
+        "account_id": account_id,
+        "payee_id": "payee",
+        "category_id": category_id,
+        "transfer_account_id": None,
+        "transfer_transaction_id": None,
+        "import_id": None,
+        "deleted": deleted,
+    }
+
+
+def subtransaction(id, transaction_id, amount, category_id):
+    return {
+        "id": id,
+        "transaction_id": transaction_id,
+        "amount": amount,
+        "memo": None,
+        "payee_id": "payee",
+        "category_id": category_id,
+        "transfer_account_id": None,
+        "deleted": False,
+    }
+
+
+@pytest.fixture
+def budget():
+    """Setup a budget containing a split and a deleted transaction"""
+    data = {
+        "id": "budget",
+        "date_format": {"format": "DD/MM/YYYY"},
+        "currency_format": CURRENCY_FORMAT,
+        "transactions": [
+            transaction("t1", "2018-01-05", -1000, "checking", "food"),
+            transaction("t2", "2018-01-20", -3000, "checking", None),
+            transaction("t3", "2018-02-02", -500, "savings", "food"),
+            transaction("t4", "2018-02-03", -9999, "savings", "food", deleted=True),
+        ],
+        "subtransactions": [
+            subtransaction("s1", "t2", -2000, "food"),
+            subtransaction("s2", "t2", -1000, "fuel"),
+        ],
+    }
+    for collection in models.Budget._collections:
+        data.setdefault(collection, [])
+    return models.Budget(None, **data)
+
+
+def test_transaction_table_replaces_split_transactions(budget):
+    """Tests that split transactions are represented by their subtransactions"""
+    table = budget.transaction_table()
+    assert len(table) == 4
+    assert table.total_by("category") == {"food": -3500, "fuel": -1000}
+    assert budget.transactions.materialized == 0
+
+
+def test_spend_by_category_month(budget):
+    """Tests totals are grouped by category and month"""
+    pivot = budget.transaction_table().spend_by_category_month()
+    assert pivot.columns == ["2018-01", "2018-02"]
+    assert pivot.get("food", "2018-01") == -3000
+    assert pivot.get("food", "2018-02") == -500
+    assert pivot.get("fuel", "2018-02") == 0
+
+
+def test_balance_by_account_month(budget):
+    """Tests account balances accumulate across months"""
+    pivot = budget.transaction_table().balance_by_account_month()
+    assert pivot.get("checking", "2018-02") == -4000
+    assert pivot.get("savings", "2018-01") == 0
+    assert pivot.get("savings", "2018-02") == -500
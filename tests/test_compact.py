@@ -0,0 +1,31 @@
+import dataclasses
+
+import pytest
+
+from pynab import Pynab, models
+from pynab.compact import COMPACT_MODELS, FROZEN_MODELS, CompactTransaction
+from .test_pynab import pynab_vcr
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_budget_with_compact_models():
+    """Tests that a budget can be created using the compact model variants"""
+    budget = Pynab("auth_token", models=COMPACT_MODELS).budget("string")
+    transaction = budget.transaction("string")
+
+    assert isinstance(transaction, CompactTransaction)
+    assert not hasattr(transaction, "__dict__")
+    assert [field.name for field in dataclasses.fields(transaction)] == [
+        field.name for field in dataclasses.fields(models.Transaction)
+    ]
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_budget_with_frozen_models():
+    """Tests that entities created with the frozen model variants cannot be changed"""
+    budget = Pynab("auth_token", models=FROZEN_MODELS).budget("string")
+    account = budget.account("string")
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        account.balance = 100
+    assert dataclasses.replace(account, balance=100).balance == 100
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from pynab.currency import formatter
+from pynab.exceptions import PynabError
+from pynab.factory import parse
+from pynab.models import CurrencyFormat
+from benchmarks.synthetic import generate_budget
+
+USD = CurrencyFormat("USD", "123,456.78", 2, ".", True, ",", "$", True)
+EUR = CurrencyFormat("EUR", "123.456,78", 2, ",", False, ".", "€", True)
+JPY = CurrencyFormat("JPY", "123,456", 0, ".", True, ",", "¥", True)
+
+
+@pytest.mark.parametrize(
+    "currency_format, expected",
+    [
+        (USD, ["$1,234.56", "-$0.01", "-$1.01", "$0.00"]),
+        (EUR, ["1.234,56€", "-0,01€", "-1,01€", "0,00€"]),
+        (JPY, ["¥1,235", "-¥0", "-¥1", "¥0"]),
+    ],
+)
+def test_format_many(currency_format, expected):
+    """Tests that amounts are rounded half away from zero and shown in the format"""
+    amounts = [1234560, -5, -1005, 0]
+
+    assert formatter(currency_format).format_many(amounts) == expected
+    assert formatter(currency_format).format_many(np.array(amounts)) == expected
+
+
+def test_formatter_cached():
+    assert formatter(USD) is formatter(CurrencyFormat(**vars(USD)))
+    assert formatter(USD) is not formatter(EUR)
+
+
+def test_parse_round_trip():
+    amounts = [1234560, -10, 0, 999999990]
+
+    for currency_format in (USD, EUR):
+        currency = formatter(currency_format)
+        assert currency.parse_many(currency.format_many(amounts)) == amounts
+    assert formatter(EUR).parse("-1.234,57€") == -1234570
+
+
+def test_decimals():
+    currency = formatter(USD)
+
+    assert currency.to_decimals([1234560, -1005]) == [Decimal("1234.56"), Decimal("-1.01")]
+    assert currency.from_decimals([Decimal("1234.56"), 0.1, "-1.0005"]) == [1234560, 100, -1001]
+
+
+def test_parse_invalid():
+    with pytest.raises(PynabError):
+        formatter(USD).parse("twelve dollars")
+
+
+def test_unsupported_digits():
+    with pytest.raises(PynabError):
+        formatter(CurrencyFormat("XXX", "1.2345", 4, ".", True, ",", "X", True))
+
+
+def test_budget_formatter():
+    budget = parse(generate_budget(years=1, transactions_per_month=5))
+    amounts = budget.transactions.attribute_values("amount")
+
+    formatted = budget.formatter.format_many(amounts)
+
+    assert len(formatted) == len(budget.transactions)
+    assert budget.formatter is formatter(budget.currency_format)
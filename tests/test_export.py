@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from pynab import models
+from pynab.exceptions import PynabError
+from pynab.export import export_budget, export_collection, load_budget, load_collection
+from pynab.factory import parse
+from benchmarks.synthetic import generate_budget
+
+
+@pytest.fixture
+def budget():
+    """Setup a small synthetic budget with split transactions"""
+    return parse(generate_budget(years=1, transactions_per_month=20, split_ratio=0.2))
+
+
+@pytest.mark.parametrize("format", ["msgpack", "jsonl", "columnar"])
+def test_export_round_trip(budget, format):
+    """Tests that a loaded budget matches the budget that was exported"""
+    budget.transactions[0]
+    file = io.BytesIO()
+
+    export_budget(budget, file, format)
+    file.seek(0)
+    loaded = load_budget(file, format)
+
+    assert loaded.budget_id == budget.budget_id
+    assert loaded.server_knowledge == budget.server_knowledge
+    assert loaded.currency_format == budget.currency_format
+    assert loaded.transactions.materialized == 0
+    for collection in models.Budget._collections:
+        assert list(getattr(loaded, collection)) == list(getattr(budget, collection))
+
+
+def test_export_gzip_path(budget, tmp_path):
+    """Tests that a budget is compressed when exported to a path ending in .gz"""
+    path = str(tmp_path / "budget.msgpack.gz")
+
+    export_budget(budget, path, collections=["accounts", "months"])
+    loaded = load_budget(path)
+
+    assert loaded.months == budget.months
+    assert len(loaded.transactions) == 0
+
+
+def test_export_collection(budget):
+    """Tests that a loaded collection matches the collection that was exported"""
+    file = io.BytesIO()
+
+    export_collection(budget.transactions, file, "jsonl")
+    file.seek(0)
+    transactions = load_collection(file, models.Transaction, "jsonl")
+
+    assert transactions == budget.transactions
+
+
+def test_load_invalid_file():
+    """Tests that loading a file not written by export_budget raises an error"""
+    with pytest.raises(PynabError):
+        load_budget(io.BytesIO(b'{"data": {}}\n'), "jsonl")
+
+
+def test_export_empty_collection():
+    """Tests that an empty collection is exported when its model is given"""
+    file = io.BytesIO()
+
+    with pytest.raises(PynabError):
+        export_collection([], io.BytesIO())
+    export_collection([], file, "jsonl", model=models.Transaction)
+    file.seek(0)
+
+    assert len(load_collection(file, models.Transaction, "jsonl")) == 0
@@ -0,0 +1,58 @@
+import pytest
+
+import pynab.exceptions
+from pynab import models
+from pynab.factory import parse
+
+
+def test_parse_accounts_ignores_unknown_fields():
+    """Tests that fields the models do not have are ignored when parsing"""
+    account = {
+        "id": "string",
+        "name": "string",
+        "type": "checking",
+        "on_budget": True,
+        "closed": False,
+        "note": None,
+        "balance": 1000,
+        "cleared_balance": 1000,
+        "uncleared_balance": 0,
+        "transfer_payee_id": "string",
+        "deleted": False,
+        "direct_import_linked": False,
+    }
+
+    accounts = parse({"data": {"accounts": [account], "server_knowledge": 1}})
+
+    assert len(accounts) == 1
+    assert accounts[0].balance == 1000
+    assert not hasattr(accounts[0], "direct_import_linked")
+
+
+def test_parse_month_with_categories():
+    month = {
+        "month": "2018-11-01",
+        "note": None,
+        "income": 0,
+        "budgeted": 0,
+        "activity": 0,
+        "to_be_budgeted": 0,
+        "age_of_money": 10,
+        "deleted": False,
+        "categories": [],
+    }
+
+    parsed = parse({"data": {"month": month}})
+
+    assert isinstance(parsed, models.Month)
+    assert parsed.categories == []
+
+
+def test_parse_missing_field():
+    with pytest.raises(pynab.exceptions.PynabError, match="Missing field 'id'"):
+        parse({"data": {"payee": {"name": "string", "deleted": False}}})
+
+
+def test_parse_unknown_response():
+    with pytest.raises(pynab.exceptions.PynabError, match="Unable to parse"):
+        parse({"data": {"unknown": {}}})
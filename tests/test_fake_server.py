@@ -0,0 +1,75 @@
+import pytest
+
+from pynab import Pynab
+from pynab.exceptions import PynabRateLimitExceededError
+
+pytestmark = pytest.mark.fake_server(years=1, transactions_per_month=20, rate_limit=20)
+
+
+def test_sync_budget_against_fake_server(server):
+    """Tests that a budget kept up to date by delta syncs matches the server"""
+    budget_id, fake_budget = next(iter(server.budgets.items()))
+    ynab = Pynab("token", base_url=server.url)
+    budget = ynab.budget(budget_id)
+
+    fake_budget.mutate(5, seed=3)
+    ynab.sync_budget(budget)
+
+    expected = [
+        transaction
+        for transaction in fake_budget.budget["transactions"]
+        if not transaction["deleted"]
+    ]
+    assert budget.server_knowledge == fake_budget.server_knowledge
+    assert len(budget.transactions) == len(expected)
+    assert {transaction.id: transaction.amount for transaction in budget.transactions} == {
+        transaction["id"]: transaction["amount"] for transaction in expected
+    }
+
+
+def test_fake_server_rate_limit(server):
+    """Tests that the fake server enforces its rate limit per access token"""
+    ynab = Pynab("token", base_url=server.url)
+    for _ in range(server.rate_limit):
+        ynab.user
+    with pytest.raises(PynabRateLimitExceededError):
+        ynab.user
+    assert Pynab("other_token", base_url=server.url).user.id == "fake-user"
+
+
+def test_fine_grained_endpoints(server):
+    """Tests that single resources can be requested without the whole budget"""
+    budget_id, fake_budget = next(iter(server.budgets.items()))
+    ynab = Pynab("token", base_url=server.url)
+    account = fake_budget.budget["accounts"][0]
+    category = fake_budget.budget["categories"][0]
+    month = fake_budget.budget["months"][0]["month"]
+
+    assert len(ynab.accounts(budget_id)) == len(fake_budget.budget["accounts"])
+    assert ynab.account(budget_id, account["id"]).name == account["name"]
+    assert ynab.payees(budget_id)[0].id == fake_budget.budget["payees"][0]["id"]
+    groups = ynab.categories(budget_id)
+    assert sum(len(group.categories) for group in groups) == len(fake_budget.budget["categories"])
+    assert ynab.category(budget_id, category["id"], month=month).id == category["id"]
+    assert [month.categories for month in ynab.months(budget_id)] == [None] * 12
+    assert ynab.month(budget_id, month).month == month
+    assert len(ynab.scheduled_transactions(budget_id)) == len(
+        fake_budget.budget["scheduled_transactions"]
+    )
+
+
+def test_transactions_since_date(server):
+    """Tests that the transactions of an account can be filtered by date"""
+    budget_id, fake_budget = next(iter(server.budgets.items()))
+    ynab = Pynab("token", base_url=server.url)
+    account_id = fake_budget.budget["accounts"][0]["id"]
+
+    transactions = ynab.account_transactions(budget_id, account_id, since_date="2018-12-01")
+
+    expected = [
+        transaction["id"]
+        for transaction in fake_budget.budget["transactions"]
+        if transaction["account_id"] == account_id and transaction["date"] >= "2018-12-01"
+    ]
+    assert [transaction.id for transaction in transactions] == expected
+    assert all(transaction.date >= "2018-12-01" for transaction in transactions)
@@ -0,0 +1,118 @@
+import gzip
+import io
+
+import pytest
+import requests
+import urllib3
+
+import pynab.pynab
+from pynab import Pynab, ResponseCache
+from pynab.exceptions import PynabRateLimitExceededError
+from pynab.instrumentation import Stats, endpoint
+
+pytestmark = pytest.mark.fake_server(years=1, transactions_per_month=5, rate_limit=3)
+
+
+def test_endpoint():
+    """Tests that ids in request paths are replaced to give the endpoint"""
+    assert endpoint("/user") == "/user"
+    assert endpoint("/budgets/abc") == "/budgets/{id}"
+    assert (
+        endpoint("/budgets/abc/months/2018-11-01/categories/def")
+        == "/budgets/{id}/months/{id}/categories/{id}"
+    )
+
+
+def test_hooks_receive_events(server):
+    """Tests that the steps of a request are emitted to the hooks in order"""
+    budget_id = next(iter(server.budgets))
+    events = []
+    ynab = Pynab("token", base_url=server.url, hooks=[events.append])
+
+    ynab.accounts(budget_id)
+
+    assert [event.name for event in events] == ["request_start", "request_end", "decode", "build"]
+    assert {event.endpoint for event in events} == {"/budgets/{id}/accounts"}
+    assert events[1].status == 200
+    assert events[1].size > 0
+    assert events[1].rate_limit_remaining == 2
+
+
+def test_stats_aggregates_per_endpoint(server, monkeypatch):
+    """Tests that the stats aggregator counts requests, retries and rate limit headroom"""
+    monkeypatch.setattr(pynab.pynab, "backoff", lambda *args, **kwargs: 0)
+    budget_id = next(iter(server.budgets))
+    stats = Stats()
+    ynab = Pynab("token", base_url=server.url, hooks=[stats], max_retries=1)
+
+    ynab.payees(budget_id)
+    ynab.payees(budget_id)
+    ynab.user
+    with pytest.raises(PynabRateLimitExceededError):
+        ynab.user
+
+    payees = stats.endpoints["/budgets/{id}/payees"]
+    user = stats.endpoints["/user"]
+    assert (payees.requests, payees.errors, payees.min_rate_limit_remaining) == (2, 0, 1)
+    assert payees.build_time > 0
+    assert (user.requests, user.errors, user.retries) == (3, 2, 1)
+    assert "/budgets/{id}/payees" in stats.report()
+
+
+def test_failed_requests_counted_as_errors(server):
+    """Tests that a request failing without a response still ends with an event"""
+    stats = Stats()
+    ynab = Pynab("token", base_url=server.url, hooks=[stats])
+
+    def timeout(*args, **kwargs):
+        raise requests.Timeout()
+
+    ynab.session.request = timeout
+    with pytest.raises(requests.Timeout):
+        ynab.user
+
+    assert stats.endpoints["/user"].requests == 1
+    assert stats.endpoints["/user"].errors == 1
+
+
+def test_failing_hook_does_not_fail_request(server):
+    """Tests that an exception raised by a hook is logged rather than failing the request"""
+    def hook(event):
+        raise RuntimeError("Hook failed")
+
+    ynab = Pynab("token", base_url=server.url, hooks=[hook])
+
+    assert ynab.user.id == "fake-user"
+
+
+def test_cache_hits_emit_decode(server):
+    """Tests that a response served from the cache emits decode and build events
+    without a request
+    """
+    events = []
+    ynab = Pynab("token", base_url=server.url, hooks=[events.append], cache=ResponseCache())
+
+    ynab.user
+    events.clear()
+    ynab.user
+
+    assert [event.name for event in events] == ["decode", "build"]
+
+
+def test_size_without_content_length():
+    """Tests that the size of a response without Content-Length is the number of
+    bytes sent, before decompression, as when the header is given
+    """
+    body = gzip.compress(b'{"data": {"user": {"id": "string"}}}')
+    response = requests.Response()
+    response.raw = urllib3.HTTPResponse(
+        body=io.BytesIO(body), headers={"Content-Encoding": "gzip"}, preload_content=False
+    )
+    response.status_code = 200
+    response.content
+    events = []
+    ynab = Pynab("token", hooks=[events.append])
+
+    ynab._emit_response("/user", "GET", "/user", response, 0.1, stream=False)
+
+    assert events[0].size == len(body)
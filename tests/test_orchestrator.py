@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+import pytest
+
+from pynab.orchestrator import SyncOrchestrator, SyncTarget, _sync_budget
+
+pytestmark = pytest.mark.fake_server(budgets=3, years=1, transactions_per_month=5)
+
+
+def _orchestrator(server, **options):
+    targets = [(f"token-{index % 2}", budget_id) for index, budget_id in enumerate(server.budgets)]
+    return SyncOrchestrator(targets, workers=3, base_url=server.url, **options)
+
+
+def test_orchestrator_syncs_budgets(server):
+    """Tests that every budget is synced and later runs only request changes"""
+    orchestrator = _orchestrator(server)
+    progress = []
+
+    first = orchestrator.run(callback=lambda result, state: progress.append(state.completed))
+    for budget in server.budgets.values():
+        budget.mutate(2)
+    second = orchestrator.run()
+
+    assert progress == [1, 2, 3]
+    assert all(result.ok and not result.delta for result in first)
+    assert all(result.ok and result.delta for result in second)
+    for target, budget in orchestrator.budgets.items():
+        assert budget.server_knowledge == server.budgets[target.budget_id].server_knowledge
+    assert set(server.requests) == {"token-0", "token-1"}
+
+
+def test_orchestrator_prioritises_stale_budgets(server):
+    """Tests that budgets never synced are scheduled before those synced recently"""
+    orchestrator = _orchestrator(server)
+    synced, *unsynced = orchestrator.targets
+    orchestrator.last_synced[synced] = 1.0
+
+    assert orchestrator.schedule() == unsynced + [synced]
+
+
+def test_orchestrator_reports_failures(server):
+    """Tests that a budget failing to sync is reported without stopping the others"""
+    orchestrator = _orchestrator(server)
+    orchestrator.add("token-0", "missing")
+
+    results = orchestrator.run()
+
+    failed = [result for result in results if not result.ok]
+    assert [result.target for result in failed] == [SyncTarget("token-0", "missing")]
+    assert orchestrator.progress.completed == 3
+    assert orchestrator.progress.failed == 1
+
+
+def test_orchestrator_processes(server, tmp_path):
+    """Tests that budgets can be synced in worker processes through a store"""
+    orchestrator = _orchestrator(
+        server,
+        processes=True,
+        store_path=str(tmp_path / "budgets.db"),
+        state_dir=str(tmp_path),
+    )
+
+    first = orchestrator.run()
+    second = orchestrator.run()
+
+    assert all(result.ok and not result.delta for result in first)
+    assert all(result.ok and result.delta for result in second)
+    assert orchestrator.budgets == {}
+
+
+@pytest.mark.fake_server(budgets=8, years=1, transactions_per_month=200)
+def test_orchestrator_processes_share_store(server, tmp_path):
+    """Tests that many worker processes saving to the same store all succeed"""
+    targets = [("token", budget_id) for budget_id in server.budgets]
+    orchestrator = SyncOrchestrator(
+        targets,
+        workers=8,
+        processes=True,
+        store_path=str(tmp_path / "budgets.db"),
+        state_dir=str(tmp_path),
+        base_url=server.url,
+    )
+
+    results = orchestrator.run()
+
+    assert [result.error for result in results] == [None] * 8
+
+
+def test_orchestrator_reports_unexpected_errors(server, tmp_path):
+    """Tests that errors other than PynabError are reported for each budget"""
+    orchestrator = _orchestrator(server, store_path=str(tmp_path / "missing" / "store.db"))
+
+    results = orchestrator.run()
+
+    assert len(results) == 3
+    assert all(not result.ok for result in results)
+    assert orchestrator.progress.failed == 3
+
+
+def test_sync_budget_reports_any_exception():
+    class FailingClient:
+        store = None
+
+        def budget(self, budget_id):
+            raise ValueError("Invalid json")
+
+    result = _sync_budget(FailingClient(), SyncTarget("token", "budget"))
+
+    assert isinstance(result.error, ValueError)
+
+
+def test_sync_budget_delta_from_zero_knowledge():
+    """Tests that a budget saved with a server knowledge of 0 is reported as a delta"""
+
+    class Store:
+        def server_knowledge(self, budget_id):
+            return 0
+
+    class Client:
+        store = Store()
+
+        def budget(self, budget_id):
+            return SimpleNamespace(server_knowledge=1)
+
+    assert _sync_budget(Client(), SyncTarget("token", "budget")).delta
+
+
+def test_orchestrator_session_options(server):
+    orchestrator = _orchestrator(server, compress=False)
+
+    session, _ = orchestrator._token_state("token-0")
+
+    assert session.headers["Accept-Encoding"] == "identity"
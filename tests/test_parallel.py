@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from pynab.factory import parse
+from pynab.parallel import _array_limit, _decode_elements, _split, parse_budget_parallel
+from benchmarks.synthetic import generate_budget
+
+
+@pytest.fixture
+def response():
+    """Setup the text of a synthetic budget response with split transactions"""
+    data = generate_budget(years=1, transactions_per_month=40, split_ratio=0.2)
+    return json.dumps(data, separators=(",", ":"))
+
+
+def test_parse_budget_parallel(response):
+    """Tests that a budget decoded in parts matches one decoded at once"""
+    expected = parse(json.loads(response))
+
+    budget = parse_budget_parallel(response, workers=2, threshold=0)
+
+    assert budget.server_knowledge == expected.server_knowledge
+    assert len(budget.transactions) == len(expected.transactions)
+    assert budget.transactions.materialized == 0
+    assert list(budget.transactions) == list(expected.transactions)
+    assert list(budget.subtransactions) == list(expected.subtransactions)
+    assert budget.months == expected.months
+
+
+def test_split_starts_at_objects(response):
+    start = response.index('"transactions":[') + len('"transactions":[')
+
+    limit = _array_limit(response, start)
+
+    starts = _split(response, start, limit, 4)
+
+    assert limit == response.index('"subtransactions":')
+    assert starts[0] == start
+    assert all(position < limit for position in starts)
+    assert all(response[position - 2 : position + 2] == '},{"' for position in starts[1:])
+
+
+def test_decode_elements_overrun():
+    """Tests that a part ending within an object is reported rather than decoded"""
+    chunk = '{"a":1},{"b":[{"c":2},'
+
+    elements, _, status = _decode_elements(chunk, final=False)
+
+    assert elements == [{"a": 1}]
+    assert status == "overrun"
+
+
+def test_decode_elements_ended():
+    elements, position, status = _decode_elements('{"a":1}, {"b":2}],"c":[]}', final=True)
+
+    assert elements == [{"a": 1}, {"b": 2}]
+    assert status == "ended"
+    assert position == 16
+
+
+def test_string_ending_like_boundary(response):
+    """Tests that a memo ending with the characters between objects is decoded"""
+    data = json.loads(response)
+    for transaction in data["data"]["budget"]["transactions"]:
+        transaction["memo"] = "},{"
+    text = json.dumps(data, separators=(",", ":"))
+
+    budget = parse_budget_parallel(text, workers=3, threshold=0)
+
+    assert list(budget.transactions) == list(parse(data).transactions)
@@ -1,7 +1,13 @@
+import dataclasses
+
 import pytest
+import requests
 import vcr
 
 from pynab import Pynab, models
+from pynab.exceptions import PynabInternalServerError, PynabNotFoundError
+from pynab.factory import parse
+from benchmarks.synthetic import generate_budget
 
 pynab_vcr = vcr.VCR(
     serializer="yaml",
@@ -117,3 +123,170 @@ def test_get_scheduled_transaction_by_scheduled_transaction_id_from_budget(ynab)
     scheduled_transaction = budget.scheduled_transaction("string")
     assert isinstance(scheduled_transaction, models.ScheduledTransaction)
     assert scheduled_transaction.id == "string"
+
+
+@pynab_vcr.use_cassette()
+def test_sync_budget(ynab):
+    """Tests that a delta sync merges changes into an existing budget in place"""
+    budget = ynab.budget("string")
+    synced = ynab.sync_budget(budget)
+
+    assert synced is budget
+    assert budget.server_knowledge == 5
+    assert [account.id for account in budget.accounts] == ["string", "new-account"]
+    assert budget.payees == []
+    assert budget.transaction("string").amount == -5000
+    assert budget.month("string").budgeted == 1000
+    assert budget.month("string").categories[0].budgeted == 1000
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_get_missing_account_from_budget_raises_not_found(ynab):
+    """Tests that retrieving an account that does not exist raises a not found error"""
+    budget = ynab.budget("string")
+    with pytest.raises(PynabNotFoundError):
+        budget.account("missing")
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_get_transactions_by_account_category_and_payee_from_budget(ynab):
+    """Tests that transactions can be retrieved from a Budget object by related IDs"""
+    budget = ynab.budget("string")
+    transaction = budget.transaction("string")
+    assert budget.account_transactions("string") == [transaction]
+    assert budget.category_transactions("string") == [transaction]
+    assert budget.payee_transactions("string") == [transaction]
+    assert budget.account_transactions("missing") == []
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_budget_indexes_follow_changes_to_collections(ynab):
+    """Tests that lookups see entities added to a collection after the first lookup"""
+    budget = ynab.budget("string")
+    budget.account("string")
+    budget.accounts.append(dataclasses.replace(budget.accounts[0], id="added"))
+    assert budget.account("added").id == "added"
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_budget_collections_are_created_on_access(ynab):
+    """Tests that entities of a budget are only created when they are accessed"""
+    budget = ynab.budget("string")
+    assert budget.transactions.materialized == 0
+
+    budget.transaction("string")
+    assert budget.transactions.materialized == 1
+    assert budget.months.materialized == 0
+
+
+def test_delta_deletion_does_not_create_entities():
+    """Tests that a delta deleting a transaction only creates the entities it changes"""
+    budget = parse(generate_budget(years=1, transactions_per_month=50))
+    first, second, *_ = budget.transactions.as_dicts()
+    count = len(budget.transactions)
+
+    budget.apply_delta(
+        budget.server_knowledge + 1,
+        transactions=[dict(first, deleted=True), dict(second, amount=-10)],
+    )
+
+    assert len(budget.transactions) == count - 1
+    assert budget.transactions.materialized == 1
+    assert budget.transaction(second["id"]).amount == -10
+    with pytest.raises(PynabNotFoundError):
+        budget.transaction(first["id"])
+
+
+def test_clients_have_separate_sessions():
+    """Tests that each client authenticates its own session with its own token"""
+    first = Pynab("first_token")
+    second = Pynab("second_token", keep_alive=False, compress=False)
+
+    assert first.session is not second.session
+    assert first.session.headers["Authorization"] == "Bearer first_token"
+    assert second.session.headers["Authorization"] == "Bearer second_token"
+    assert second.session.headers["Connection"] == "close"
+    assert second.session.headers["Accept-Encoding"] == "identity"
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_budget_uses_client_session(ynab):
+    """Tests that a budget makes further requests with the session of its client"""
+    budget = ynab.budget("string")
+    assert budget.session is ynab.session
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_get_single_budget_streamed(ynab):
+    """Tests that a budget can be parsed incrementally from a streamed response"""
+    budget = ynab.budget("string", stream=True)
+    assert isinstance(budget, models.Budget)
+    assert budget.server_knowledge == 0
+    assert budget.currency_format.currency_symbol == "string"
+    assert budget.transaction("string").amount == 0
+    assert budget.month("string").categories[0].id == "string"
+
+
+@pynab_vcr.use_cassette("./cassettes/test_full_budget")
+def test_iter_budget(ynab):
+    """Tests that the entities of a budget can be streamed one at a time"""
+    entities = dict(ynab.iter_budget("string"))
+    assert isinstance(entities["transactions"], models.Transaction)
+    assert isinstance(entities["accounts"], models.Account)
+    assert entities["server_knowledge"] == 0
+
+
+@pynab_vcr.use_cassette()
+def test_create_transactions(ynab):
+    """Tests that created transactions are returned and added to the budget, with
+    the request made through the client
+    """
+    budget = ynab.budget("string")
+    events = []
+    ynab.hooks.append(events.append)
+    created = budget.create_transactions([models.NewTransaction("string", "2018-12-01", -1000)])
+
+    assert [transaction.id for transaction in created] == ["new"]
+    assert budget.transaction("new") == created[0]
+    assert [(event.name, event.method) for event in events][:2] == [
+        ("request_start", "POST"),
+        ("request_end", "POST"),
+    ]
+
+
+@pynab_vcr.use_cassette()
+def test_import_transactions(ynab):
+    """Tests that an import reports created, duplicate and failed rows"""
+    rows = [
+        models.NewTransaction("string", "2018-12-01", -1000, import_id="a"),
+        models.NewTransaction("string", "2018-12-01", -1000, import_id="b"),
+        models.NewTransaction("string", "2018-12-01", -1000, import_id="a"),
+        models.NewTransaction("string", "2018-12-02", -2000, import_id="c"),
+    ]
+    result = ynab.import_transactions("string", rows, chunk_size=2)
+
+    assert [transaction.id for transaction in result.created] == ["t1"]
+    assert result.duplicates == [rows[2], rows[1]]
+    assert result.failed_transactions == [rows[3]]
+    assert isinstance(result.failed[0][1], PynabInternalServerError)
+    assert result.server_knowledge == 10
+    assert not result.complete
+
+
+def test_import_transactions_unexpected_errors(ynab):
+    """Tests that an error other than PynabError fails only the chunk it was raised for"""
+    rows = [models.NewTransaction("string", "2018-12-01", -1000, import_id=id) for id in "abc"]
+    responses = iter([requests.Timeout(), ValueError("Invalid json")])
+
+    def send(path, method="GET", json=None, **options):
+        raise next(responses)
+
+    ynab._send = send
+    result = ynab.import_transactions("string", rows, chunk_size=2)
+
+    assert result.failed_transactions == rows
+    assert [type(error) for _, error in result.failed] == [
+        requests.Timeout,
+        requests.Timeout,
+        ValueError,
+    ]
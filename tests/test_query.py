@@ -0,0 +1,117 @@
+import pytest
+
+from pynab import Pynab
+from pynab.exceptions import PynabError
+from pynab.factory import parse
+from benchmarks.fake_server import FakeYnabServer
+from benchmarks.synthetic import generate_budget
+
+
+@pytest.fixture
+def budget():
+    """Setup a small synthetic budget"""
+    return parse(generate_budget(years=1, transactions_per_month=30))
+
+
+def test_query_filters_with_indexes(budget):
+    """Tests that a query matches the same transactions as scanning them"""
+    account_id = budget.accounts[0].id
+
+    transactions = (
+        budget.query()
+        .filter(account_id=account_id, since="2018-06-01")
+        .filter(until="2018-09-30", max_amount=0)
+        .order_by("-amount")
+        .all()
+    )
+
+    expected = sorted(
+        (
+            transaction
+            for transaction in budget.transactions
+            if transaction.account_id == account_id
+            and "2018-06-01" <= transaction.date <= "2018-09-30"
+            and transaction.amount <= 0
+        ),
+        key=lambda transaction: -transaction.amount,
+    )
+    assert transactions == expected
+
+
+def test_query_default_order(budget):
+    """Tests that without order_by transactions are in the order of the budget,
+    whichever index is used
+    """
+    account_id = budget.accounts[0].id
+    by_date = budget.query().filter(since="2018-03-01", until="2018-08-31").all()
+    by_account = budget.query().filter(account_id=account_id).all()
+
+    assert by_date == [
+        transaction
+        for transaction in budget.transactions
+        if "2018-03-01" <= transaction.date <= "2018-08-31"
+    ]
+    assert by_account == [
+        transaction for transaction in budget.transactions if transaction.account_id == account_id
+    ]
+
+
+def test_query_aggregates_without_creating_transactions(budget):
+    """Tests that aggregates are calculated from the json of the transactions"""
+    query = budget.query().filter(since="2018-12-01")
+
+    totals = query.aggregate("category_id")
+
+    assert budget.transactions.materialized == 0
+    assert query.count() == 30
+    assert sum(totals.values()) == query.sum()
+    assert query.limit(5).count() == 5
+
+
+def test_query_matches_parts_of_split_transactions():
+    """Tests that filtering and grouping by category matches the parts of split
+    transactions, as the rollups and the YNAB API do
+    """
+    budget = parse(generate_budget(years=1, transactions_per_month=30, split_ratio=0.3))
+    month = budget.months[4].month
+    until = f"{month[:8]}31"
+    split = budget.subtransactions[0]
+    category_id = split.category_id
+
+    query = budget.query().filter(category_id=category_id)
+    by_category = budget.query().filter(since=month, until=until).aggregate("category_id")
+
+    assert query.filter(since=month, until=until).sum() == budget.category_activity(
+        category_id, month
+    )
+    assert by_category[category_id] == budget.category_activity(category_id, month)
+    assert sum(by_category.values()) == budget.query().filter(since=month, until=until).sum()
+    part = next(transaction for transaction in query.all() if transaction.id == split.id)
+    assert (part.amount, part.category_id) == (split.amount, split.category_id)
+    assert part.date == budget.transaction(split.transaction_id).date
+
+
+def test_query_unknown_filter(budget):
+    """Tests that filtering by a field that cannot be filtered on raises an error"""
+    with pytest.raises(PynabError):
+        budget.query().filter(memo="string")
+
+
+def test_query_pushed_down_to_api():
+    """Tests that a query through the client requests only the matching transactions"""
+    with FakeYnabServer(years=1, transactions_per_month=30) as server:
+        budget_id, fake_budget = next(iter(server.budgets.items()))
+        payee_id = fake_budget.budget["payees"][0]["id"]
+        ynab = Pynab("token", base_url=server.url)
+
+        first = ynab.query(budget_id).filter(payee_id=payee_id, since="2018-06-01").first()
+        count = ynab.query(budget_id).filter(payee_id=payee_id, since="2018-06-01").count()
+
+    expected = [
+        transaction
+        for transaction in fake_budget.budget["transactions"]
+        if transaction["payee_id"] == payee_id and transaction["date"] >= "2018-06-01"
+    ]
+    assert count == len(expected)
+    assert first.id == expected[0]["id"]
+    assert len(server.requests["token"]) == 2
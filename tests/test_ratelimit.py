@@ -0,0 +1,53 @@
+import pytest
+
+import pynab.pynab
+from pynab import Pynab
+from pynab.ratelimit import RateLimiter, parse_rate_limit
+from .test_pynab import pynab_vcr
+
+
+def test_parse_rate_limit_header():
+    assert parse_rate_limit("36/200") == (36, 200)
+    assert parse_rate_limit(None) is None
+    assert parse_rate_limit("invalid") is None
+
+
+def test_rate_limiter_waits_when_empty():
+    """Tests that no token is available until the bucket has been refilled"""
+    limiter = RateLimiter(limit=2, period=3600)
+    assert limiter.acquire(timeout=0)
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0)
+
+
+def test_rate_limiter_follows_rate_limit_header():
+    """Tests that the limiter never allows more requests than the server has left"""
+    limiter = RateLimiter()
+    limiter.update("195/200")
+    assert limiter.remaining == 5
+
+
+def test_rate_limiter_shared_between_instances(tmp_path):
+    """Tests that limiters with the same state file share their tokens"""
+    path = str(tmp_path / "limit.json")
+    first = RateLimiter(limit=1, period=3600, path=path)
+    second = RateLimiter(limit=1, period=3600, path=path)
+    assert first.acquire(timeout=0)
+    assert not second.acquire(timeout=0)
+
+
+@pynab_vcr.use_cassette()
+def test_retry_server_error(monkeypatch):
+    """Tests that a server error is retried and the rate limit header is tracked"""
+    monkeypatch.setattr(pynab.pynab, "backoff", lambda *args, **kwargs: 0)
+    limiter = RateLimiter()
+    ynab = Pynab("auth_token", rate_limiter=limiter, max_retries=1)
+    assert ynab.user.id == "string"
+    assert limiter.remaining == 187
+
+
+@pynab_vcr.use_cassette("./cassettes/test_retry_server_error")
+def test_server_error_raised_without_retries():
+    """Tests that a server error is raised when retries are not enabled"""
+    with pytest.raises(pynab.exceptions.PynabInternalServerError):
+        Pynab("auth_token").user
@@ -0,0 +1,137 @@
+from pynab.factory import parse
+from pynab.rollups import Rollups, month_of
+from benchmarks.synthetic import generate_budget
+
+
+def _budget():
+    return parse(generate_budget(years=1, transactions_per_month=50, split_ratio=0.2))
+
+
+def _scan_category_activity(budget, category_id, month):
+    splits = {}
+    for subtransaction in budget.subtransactions:
+        splits.setdefault(subtransaction.transaction_id, []).append(subtransaction)
+    activity = 0
+    for transaction in budget.transactions:
+        if month_of(transaction.date) != month:
+            continue
+        for part in splits.get(transaction.id, [transaction]):
+            if part.category_id == category_id:
+                activity += part.amount
+    return activity
+
+
+def test_rollups_match_scan():
+    """Tests that the rollups built from a budget match scanning its transactions"""
+    budget = _budget()
+    account_id = budget.accounts[0].id
+    category_id = budget.categories[0].id
+    month = budget.months[3].month
+
+    assert budget.account_balance(account_id) == sum(
+        transaction.amount
+        for transaction in budget.transactions
+        if transaction.account_id == account_id
+    )
+    assert budget.account_balance(account_id, month) == sum(
+        transaction.amount
+        for transaction in budget.transactions
+        if transaction.account_id == account_id and month_of(transaction.date) <= month
+    )
+    assert budget.month_totals(month).count == 50
+    assert budget.category_activity(category_id, month) == _scan_category_activity(
+        budget, category_id, month
+    )
+    group_id = budget.category_groups[0].id
+    assert budget.category_group_totals(group_id, month).budgeted == sum(
+        category.budgeted
+        for category in budget.month(month).categories
+        if category.category_group_id == group_id
+    )
+
+
+def test_rollups_updated_incrementally_by_delta():
+    """Tests that a delta updates the rollups in place to match a rebuild"""
+    budget = _budget()
+    budget.account_balance(budget.accounts[0].id)
+    rollups = budget._rollups
+    changed = dict(next(budget.transactions.as_dicts()), amount=-123450)
+    deleted = dict(list(budget.transactions.as_dicts())[1], deleted=True)
+    subtransaction = dict(next(budget.subtransactions.as_dicts()), amount=-10)
+
+    budget.apply_delta(
+        budget.server_knowledge + 1,
+        transactions=[changed, deleted],
+        subtransactions=[subtransaction],
+    )
+
+    assert budget._rollup() is rollups
+    rebuilt = Rollups()
+    rebuilt.build(budget)
+    assert rollups.accounts == rebuilt.accounts
+    assert rollups.account_months == rebuilt.account_months
+    assert rollups.months == rebuilt.months
+    assert {key: value for key, value in rollups.categories.items() if value} == {
+        key: value for key, value in rebuilt.categories.items() if value
+    }
+
+
+def test_rollups_rebuilt_after_direct_change():
+    """Tests that the rollups are rebuilt when transactions are changed directly"""
+    budget = _budget()
+    account_id = budget.transactions[0].account_id
+    before = budget.account_balance(account_id)
+
+    del budget.transactions[0]
+
+    assert budget.account_balance(account_id) != before
+
+
+def test_rollups_month_balance_after_delta():
+    """Tests that the balance at the end of a month follows changes to the account"""
+    budget = _budget()
+    transaction = next(budget.transactions.as_dicts())
+    account_id, month = transaction["account_id"], month_of(transaction["date"])
+    before = budget.account_balance(account_id, month)
+
+    budget.apply_delta(
+        budget.server_knowledge + 1,
+        transactions=[dict(transaction, amount=transaction["amount"] - 1000)],
+    )
+
+    assert budget.account_balance(account_id, month) == before - 1000
+    assert budget.account_balance(account_id, "1900-01-01") == 0
+
+
+def test_forked_budget_has_its_own_rollups():
+    """Tests that a forked budget updates a copy of the rollups of the original in
+    place, without changing those of the original or building them again
+    """
+    budget = _budget()
+    account_id = budget.accounts[0].id
+    before = budget.account_balance(account_id)
+    fork = budget.fork(["transactions", "subtransactions"])
+    rollups = fork._rollups
+    assert rollups is not budget._rollups
+    transaction = dict(
+        next(budget.transactions.as_dicts()), id="new", account_id=account_id, amount=1000
+    )
+    subtransaction = dict(next(budget.subtransactions.as_dicts()), amount=-10)
+
+    fork.apply_delta(
+        budget.server_knowledge + 1,
+        transactions=[transaction],
+        subtransactions=[subtransaction],
+    )
+
+    assert fork._rollup() is rollups
+    assert fork.account_balance(account_id) == before + 1000
+    rebuilt = Rollups()
+    rebuilt.build(fork)
+    assert {key: value for key, value in rollups.categories.items() if value} == {
+        key: value for key, value in rebuilt.categories.items() if value
+    }
+    assert budget.account_balance(account_id) == before
+    rebuilt = Rollups()
+    rebuilt.build(budget)
+    assert budget._rollup().categories == rebuilt.categories
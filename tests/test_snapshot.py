@@ -0,0 +1,60 @@
+import threading
+
+from pynab import Pynab
+from pynab.compact import FROZEN_MODELS
+from pynab.factory import parse
+from pynab.snapshot import SharedBudget
+from benchmarks.fake_server import FakeYnabServer
+from benchmarks.synthetic import generate_budget
+
+
+def test_delta_publishes_new_snapshot():
+    """Tests that a delta leaves the previous snapshot unchanged and shares the
+    collections without changes
+    """
+    shared = SharedBudget(parse(generate_budget(years=1, transactions_per_month=20)))
+    before = shared.snapshot
+    transaction = dict(next(before.transactions.as_dicts()), amount=-1)
+
+    after = shared.apply_delta(before.server_knowledge + 1, transactions=[transaction])
+
+    assert shared.snapshot is after
+    assert shared.version == 1
+    assert before.transaction(transaction["id"]).amount != -1
+    assert after.transaction(transaction["id"]).amount == -1
+    assert after.accounts is before.accounts
+    assert after.transactions is not before.transactions
+    assert after.server_knowledge == before.server_knowledge + 1
+
+
+def test_readers_see_consistent_snapshots():
+    """Tests that readers running alongside syncs always see a consistent budget"""
+    with FakeYnabServer(years=1, transactions_per_month=50) as server:
+        budget_id, fake_budget = next(iter(server.budgets.items()))
+        ynab = Pynab("token", base_url=server.url, models=FROZEN_MODELS)
+        shared = SharedBudget(ynab.budget(budget_id))
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                budget = shared.snapshot
+                try:
+                    total = sum(transaction.amount for transaction in budget.transactions)
+                    assert total == budget.query().sum()
+                except Exception as error:
+                    errors.append(error)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for seed in range(5):
+            fake_budget.mutate(10, seed=seed)
+            shared.sync(ynab)
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert errors == []
+    assert shared.version == 5
+    assert shared.snapshot.server_knowledge == fake_budget.server_knowledge
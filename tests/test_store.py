@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pynab import Pynab, BudgetStore, models
+from .test_pynab import pynab_vcr
+
+
+@pynab_vcr.use_cassette("./cassettes/test_sync_budget")
+def test_budget_warm_start_from_store(tmp_path):
+    """Tests that a stored budget is loaded and only changes are requested"""
+    store = BudgetStore(str(tmp_path / "budgets.db"))
+    Pynab("auth_token", store=store).budget("string")
+    assert store.server_knowledge("string") == 0
+
+    budget = Pynab("auth_token", store=store).budget("string")
+    assert isinstance(budget, models.Budget)
+    assert budget.server_knowledge == 5
+    assert budget.transaction("string").amount == -5000
+
+
+@pynab_vcr.use_cassette("./cassettes/test_sync_budget")
+def test_store_saves_delta(tmp_path):
+    """Tests that changes merged by a delta sync are persisted in the store"""
+    store = BudgetStore(str(tmp_path / "budgets.db"))
+    ynab = Pynab("auth_token", store=store)
+    ynab.sync_budget(ynab.budget("string"))
+
+    budget = store.load("string", None)
+    assert budget.server_knowledge == 5
+    assert [account.id for account in budget.accounts] == ["string", "new-account"]
+    assert budget.payees == []
+    assert budget.month("string").categories[0].budgeted == 1000
+    assert len(budget.scheduled_subtransactions) == 1
+
+
+@pynab_vcr.use_cassette("./cassettes/test_sync_budget")
+def test_store_shared_between_threads(tmp_path):
+    """Tests that saves and loads made by several threads at once do not interfere"""
+    store = BudgetStore(str(tmp_path / "budgets.db"))
+    budget = Pynab("auth_token", store=store).budget("string")
+
+    def save_and_load(_):
+        store.save(budget)
+        return store.load("string", None).server_knowledge
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert set(executor.map(save_and_load, range(32))) == {budget.server_knowledge}
+
+
+@pynab_vcr.use_cassette("./cassettes/test_sync_budget")
+def test_stores_share_database(tmp_path):
+    """Tests that a store loads while another connection holds the write lock of the
+    database, and saves once the lock is released
+    """
+    path = str(tmp_path / "budgets.db")
+    store = BudgetStore(path)
+    budget = Pynab("auth_token", store=store).budget("string")
+    other = BudgetStore(path, timeout=10)
+    writer = sqlite3.connect(path, check_same_thread=False)
+    writer.execute("BEGIN EXCLUSIVE")
+    release = threading.Timer(0.5, writer.rollback)
+    release.start()
+    try:
+        start = time.monotonic()
+        assert other.load("string", None).server_knowledge == budget.server_knowledge
+        assert time.monotonic() - start < 0.5
+
+        other.save(budget)
+        assert time.monotonic() - start >= 0.5
+    finally:
+        release.join()
+        writer.close()
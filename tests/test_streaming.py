@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from pynab.exceptions import PynabNotFoundError
+from pynab.streaming import _Reader, iter_budget
+
+BUDGET = {
+    "data": {
+        "budget": {
+            "id": "budget",
+            "name": "Budget",
+            "accounts": [],
+            "transactions": [{"id": "first", "amount": -12345}, {"id": "second", "amount": 6}],
+        },
+        "server_knowledge": 1234567,
+    }
+}
+
+
+def chunked(text, size):
+    return [text[index : index + size] for index in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 1024])
+def test_iter_budget_across_chunk_boundaries(size):
+    """Tests that values split across chunks, including numbers, are read whole"""
+    events = list(iter_budget(chunked(json.dumps(BUDGET, indent=2), size)))
+    assert events == [
+        ("id", "budget"),
+        ("name", "Budget"),
+        ("transactions", {"id": "first", "amount": -12345}),
+        ("transactions", {"id": "second", "amount": 6}),
+        ("server_knowledge", 1234567),
+    ]
+
+
+def test_iter_budget_error_response():
+    """Tests that an error response raises the matching exception"""
+    error = {"error": {"id": "404.2", "name": "resource_not_found", "detail": "Not found"}}
+    with pytest.raises(PynabNotFoundError):
+        list(iter_budget(chunked(json.dumps(error), 5)))
+
+
+@pytest.mark.parametrize("split", ["1", "1.", "1.5", "1.5e", "1.5e+"])
+def test_reader_number_cut_after_separator(split):
+    """Tests that a number cut at a decimal point or exponent is read whole"""
+    text = '{"amount":1.5e+2}'
+    cut = text.index(split) + len(split)
+    reader = _Reader([text[:cut], text[cut:]])
+    reader.expect("{")
+    assert reader.value() == "amount"
+    reader.expect(":")
+    assert reader.value() == 150.0
+
+
+def test_reader_value_spanning_many_chunks():
+    """Tests that a value spanning many chunks is decoded a few times rather than
+    once per chunk
+    """
+    text = json.dumps([{"id": str(index)} for index in range(1000)])
+    reader = _Reader(chunked(text, 1))
+    decode = reader._decoder.raw_decode
+    calls = []
+    reader._decoder.raw_decode = lambda *args: calls.append(args) or decode(*args)
+
+    assert len(reader.value()) == 1000
+    assert len(calls) < 40
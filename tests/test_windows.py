@@ -0,0 +1,128 @@
+import pytest
+
+from pynab import Pynab
+from pynab.exceptions import PynabError
+from pynab.windows import TransactionWindows, add_months
+
+pytestmark = pytest.mark.fake_server(years=1, transactions_per_month=20)
+
+
+class StubClient:
+    """Client streaming a fixed list of transactions in the order given"""
+
+    models = None
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.requests = []
+
+    def _stream_transactions(self, budget_id, since_date=None, type=None):
+        self.requests.append(since_date)
+        return iter(
+            transaction
+            for transaction in self.transactions
+            if since_date is None or transaction["date"] >= since_date
+        )
+
+
+def _transaction(id, date):
+    return {
+        "id": id,
+        "date": date,
+        "amount": -1000,
+        "memo": None,
+        "cleared": "cleared",
+        "approved": True,
+        "flag_color": None,
+        "account_id": "account",
+        "account_name": "Account",
+        "payee_id": None,
+        "payee_name": None,
+        "category_id": None,
+        "category_name": None,
+        "transfer_account_id": None,
+        "transfer_transaction_id": None,
+        "matched_transaction_id": None,
+        "import_id": None,
+        "deleted": False,
+        "subtransactions": [],
+    }
+
+
+def test_add_months():
+    assert add_months("2018-11-23", 2) == "2019-01-01"
+    assert add_months("2018-01-01", -1) == "2017-12-01"
+
+
+def test_iter_transactions(server):
+    """Tests that every transaction is generated once, a month at a time"""
+    budget_id, fake_budget = next(iter(server.budgets.items()))
+    ynab = Pynab("token", base_url=server.url)
+
+    windows = ynab.iter_transactions(budget_id, months=3)
+    starts = [start for start, _ in windows.windows()]
+    transactions = list(ynab.iter_transactions(budget_id, since_date="2018-07-01"))
+
+    assert starts == ["2018-01-01", "2018-04-01", "2018-07-01", "2018-10-01"]
+    assert windows.checkpoint == "2019-01-01"
+    expected = [t for t in fake_budget.budget["transactions"] if t["date"] >= "2018-07-01"]
+    assert sorted(t.id for t in transactions) == sorted(t["id"] for t in expected)
+
+
+def test_checkpoint_resumes(server):
+    budget_id, _ = next(iter(server.budgets.items()))
+    ynab = Pynab("token", base_url=server.url)
+    windows = ynab.iter_transactions(budget_id, since_date="2018-01-01", prefetch=False)
+
+    generator = windows.windows()
+    first, _ = next(generator)
+    next(generator)
+    generator.close()
+
+    assert first == "2018-01-01"
+    assert windows.checkpoint == "2018-02-01"
+
+
+def test_empty_windows_skipped():
+    client = StubClient([_transaction("a", "2018-01-05"), _transaction("b", "2018-06-05")])
+
+    windows = list(TransactionWindows(client, "budget", since_date="2018-01-01").windows())
+
+    assert [(start, [t.id for t in ts]) for start, ts in windows] == [
+        ("2018-01-01", ["a"]),
+        ("2018-06-01", ["b"]),
+    ]
+    assert client.requests == ["2018-01-01", "2018-06-01"]
+
+
+def test_out_of_order_transactions_read_to_end():
+    """Tests that once transactions arrive out of order the response is read to the
+    end, so that none after a transaction from a later window are missed
+    """
+    dates = {"a": "2018-01-09", "b": "2018-01-05", "c": "2018-03-05", "d": "2018-01-20"}
+    client = StubClient([_transaction(id, date) for id, date in dates.items()])
+
+    windows = TransactionWindows(client, "budget", prefetch=False)
+
+    assert [t.id for t in windows] == ["a", "b", "d", "c"]
+
+
+def test_invalid_window():
+    with pytest.raises(PynabError):
+        TransactionWindows(StubClient([]), "budget", months=0)
+
+
+def test_resume_after_completion():
+    """Tests that resuming from the checkpoint of a finished iteration only
+    generates transactions added since
+    """
+    client = StubClient([_transaction("a", "2018-01-05"), _transaction("b", "2018-02-05")])
+    windows = TransactionWindows(client, "budget")
+    assert [t.id for t in windows] == ["a", "b"]
+
+    client.transactions.append(_transaction("c", "2018-03-05"))
+    resumed = TransactionWindows(client, "budget", since_date=windows.checkpoint)
+
+    assert windows.checkpoint == "2018-03-01"
+    assert [t.id for t in resumed] == ["c"]
+    assert [t.id for t in TransactionWindows(client, "budget", since_date="2018-04-01")] == []